@@ -0,0 +1,129 @@
+"""
+Token authentication with expiry and an in-process token cache.
+
+Tokens expire ``TOKEN_EXPIRE_AFTER`` after they were issued. Successful
+lookups are kept in a bounded LRU cache for ``TOKEN_CACHE_TTL`` seconds so
+most requests skip the Token + User query. Entries are dropped when a token
+is deleted (logout) or its user is saved (password change, deactivation),
+see accounts/signals.py. The cache is per process, so another gunicorn
+worker may keep accepting a revoked token for at most ``TOKEN_CACHE_TTL``.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """Thread-safe LRU cache of token key -> Token (with its user) with a TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, valid_until = entry
+            if valid_until <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token, max_age=None):
+        lifetime = self.ttl if max_age is None else min(self.ttl, max_age)
+        if lifetime <= 0:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (token, time.monotonic() + lifetime)
+            self._keys_by_user.setdefault(token.user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[0].user_id
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+
+def token_expires_at(token):
+    return token.created + settings.TOKEN_EXPIRE_AFTER
+
+
+def is_token_expired(token):
+    return token_expires_at(token) <= timezone.now()
+
+
+def get_or_rotate_token(user):
+    """Return the user's token, replacing it with a new one if it expired."""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and is_token_expired(token):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that rejects expired tokens and caches lookups."""
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+
+            if is_token_expired(token):
+                token.delete()
+                raise exceptions.AuthenticationFailed('Token has expired.')
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+            remaining = (token_expires_at(token) - timezone.now()).total_seconds()
+            token_cache.set(key, token, max_age=remaining)
+
+        # Hand each request its own copy so views that modify request.user
+        # never touch the cached instance.
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return (token.user, token)
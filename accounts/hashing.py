@@ -0,0 +1,81 @@
+"""
+Password hashing on a small bounded thread pool.
+
+A PBKDF2 check costs a few hundred milliseconds of CPU. Login and
+registration hand it to ``PASSWORD_HASH_WORKERS`` threads per process
+(hashlib releases the GIL while it hashes), so a burst of sign-in attempts
+can keep at most that many cores of each worker process busy, however many
+requests the process is serving. Up to ``PASSWORD_HASH_QUEUE`` more
+attempts may wait for a thread. Anything beyond that, and anything that
+waited ``PASSWORD_HASH_TIMEOUT`` seconds, fails fast with ``HashingBusy``
+(503 with Retry-After) instead of tying up the request thread.
+
+Only the hashing runs on the pool, never a query, so the pool threads hold
+no database connections.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import exceptions, status
+
+
+class HashingBusy(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in attempts are being processed, try again shortly.'
+    default_code = 'hashing_busy'
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+class HashingPool:
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+                queue = getattr(settings, 'PASSWORD_HASH_QUEUE', 8)
+                self._slots = threading.BoundedSemaphore(workers + queue)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    def run(self, fn, *args):
+        """``fn(*args)`` on the pool. Raises HashingBusy when full or too slow."""
+        executor = self._start()
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._slots.release())
+        try:
+            return future.result(timeout=getattr(settings, 'PASSWORD_HASH_TIMEOUT', 5))
+        except TimeoutError:
+            # Still queued: it will never run. Already running: it finishes
+            # and frees its slot, but nobody waits for it.
+            future.cancel()
+            raise HashingBusy()
+
+
+pool = HashingPool()
+
+
+def make_password(raw_password):
+    return pool.run(hashers.make_password, raw_password)
+
+
+def check_password(user, raw_password):
+    """Like ``user.check_password``, with the hashing on the pool."""
+    is_correct, must_update = pool.run(hashers.verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        # The hasher or its iteration count changed since the password was set.
+        user.password = make_password(raw_password)
+        user.save(update_fields=['password'])
+    return is_correct
@@ -0,0 +1,452 @@
+import csv
+import multiprocessing
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Max
+from django.utils import timezone
+
+from companies.models import Company
+from jobapi.geo import locate
+from jobapi.response_cache import bump_namespace
+from jobs.models import Bookmark, Job, JobApplication
+from jobs.search import compose_search_document, index_jobs
+from jobs.skills import resolve_skills
+
+User = get_user_model()
+
+# Vocabularies, most popular first: the Zipf draws favour the head.
+SKILLS = (
+    'python', 'javascript', 'sql', 'java', 'react', 'aws', 'docker', 'typescript', 'git', 'linux',
+    'node.js', 'kubernetes', 'c#', 'excel', 'go', 'postgresql', 'django', 'html', 'css', 'c++',
+    'azure', 'spring', 'terraform', 'angular', 'vue', 'php', 'kotlin', 'swift', 'redis', 'graphql',
+    'rust', 'scala', 'machine learning', 'pandas', 'tableau', 'figma', 'salesforce', 'sap', 'ruby',
+    'rails', 'flask', 'spark', 'kafka', 'airflow', 'mongodb', 'elasticsearch', 'jenkins', 'ansible',
+    'gcp', 'power bi', 'r', 'matlab', 'tensorflow', 'pytorch', 'hadoop', 'snowflake', 'dbt', 'jira',
+    'seo', 'copywriting', 'accounting', 'negotiation', 'public speaking', 'project management',
+)
+ROLES = (
+    'Software Engineer', 'Data Analyst', 'Backend Developer', 'Frontend Developer', 'DevOps Engineer',
+    'Product Manager', 'Data Scientist', 'Full Stack Developer', 'QA Engineer', 'Sales Representative',
+    'Customer Success Manager', 'UX Designer', 'Mobile Developer', 'Site Reliability Engineer',
+    'Marketing Manager', 'Business Analyst', 'Machine Learning Engineer', 'Account Executive',
+    'Security Engineer', 'Data Engineer', 'Technical Writer', 'Support Engineer', 'Recruiter',
+    'Financial Analyst', 'Solutions Architect', 'Engineering Manager', 'Content Strategist',
+)
+INDUSTRIES = (
+    'Technology', 'Finance', 'Healthcare', 'Retail', 'Education', 'Manufacturing', 'Consulting',
+    'Media', 'Logistics', 'Energy', 'Telecommunications', 'Real Estate', 'Government', 'Travel',
+)
+NAME_WORDS = (
+    'Blue', 'North', 'Bright', 'Iron', 'Silver', 'Swift', 'Prime', 'Green', 'Cloud', 'Atlas',
+    'Summit', 'Nova', 'Peak', 'River', 'Stone', 'Vertex', 'Orbit', 'Pine', 'Harbor', 'Signal',
+)
+NAME_SUFFIXES = ('Labs', 'Systems', 'Group', 'Works', 'Analytics', 'Health', 'Capital', 'Logistics', 'Media', 'Inc')
+SIZES = ('1-10', '11-50', '51-200', '201-500', '501-1000', '1000+')
+LEVELS = ('entry', 'mid', 'senior', 'executive')
+LEVEL_WEIGHTS = (30, 40, 25, 5)
+LEVEL_PREFIXES = {'entry': 'Junior ', 'mid': '', 'senior': 'Senior ', 'executive': 'Lead '}
+LEVEL_SALARIES = {'entry': 40000, 'mid': 65000, 'senior': 95000, 'executive': 140000}
+JOB_TYPES = tuple(choice for choice, _ in Job.JOB_TYPE_CHOICES)
+JOB_TYPE_WEIGHTS = (70, 8, 14, 5, 3)
+STATUSES = tuple(choice for choice, _ in JobApplication.STATUS_CHOICES)
+STATUS_WEIGHTS = (60, 20, 4, 15, 1)
+# Share of applications and bookmarks per job falls off as 1 / rank ** this.
+# Flatter than the vocabularies, so the hottest job does not take everything.
+HOT_JOB_EXPONENT = 0.7
+REMOTE_RANK = 2
+# Companies, users or jobs per unit of work and transaction.
+CHUNK_SIZE = 1000
+
+
+def zipf_cum_weights(count, exponent):
+    return list(accumulate(rank ** -exponent for rank in range(1, count + 1)))
+
+
+def load_locations():
+    """Gazetteer place names in file order (roughly by size), plus Remote."""
+    path = getattr(settings, 'GEO_GAZETTEER_PATH', None)
+    names = []
+    if path:
+        with open(path, newline='', encoding='utf-8') as gazetteer:
+            names = [row['name'] for row in csv.DictReader(gazetteer)]
+    if not names:
+        raise CommandError('Need a gazetteer (GEO_GAZETTEER_PATH) to draw locations from')
+    names.insert(REMOTE_RANK, 'Remote')
+    return names
+
+
+@lru_cache(maxsize=None)
+def cached_locate(location):
+    return locate(location)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Make bulk_create keep the generated timestamps instead of stamping now()."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+@contextmanager
+def bulk_load_connections():
+    """
+    Tune every connection opened meanwhile, the workers' included, for bulk
+    loading: no fsync on commit (a crash loses the last chunks, nothing
+    else) and, on SQLite, waiting for the write lock instead of failing.
+    """
+    def tune(connection, **kwargs):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('PRAGMA synchronous = OFF')
+                cursor.execute('PRAGMA busy_timeout = 60000')
+            elif connection.vendor == 'postgresql':
+                cursor.execute('SET synchronous_commit = off')
+
+    connection_created.connect(tune)
+    # Reopen the current connection so it is tuned too.
+    connections.close_all()
+    try:
+        yield
+    finally:
+        connection_created.disconnect(tune)
+        connections.close_all()
+
+
+# The command of the running generate_dataset, inherited by forked workers.
+_command = None
+
+
+def _create_chunk(args):
+    return _command.create_chunk(*args)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a synthetic dataset of companies, employers, job seekers, jobs, '
+        'applications and bookmarks with realistic skew: Zipf-distributed skills, '
+        'locations and company sizes, and a few hot jobs that draw most of the '
+        'applications and bookmarks. The same seed and volumes give the same rows '
+        'whatever the number of processes. Rows are added next to any existing data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1000)
+        parser.add_argument('--employers', type=int, default=2000)
+        parser.add_argument('--seekers', type=int, default=50000)
+        parser.add_argument('--jobs', type=int, default=100000)
+        parser.add_argument('--applications', type=int, default=1000000, help='Approximate total')
+        parser.add_argument('--bookmarks', type=int, default=300000, help='Approximate total')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of skills, locations and companies')
+        parser.add_argument('--days', type=int, default=365, help='Jobs are spread over this many days back')
+        parser.add_argument('--password', default='password', help='Password of every generated user')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Run with DEBUG off too. Only for scratch databases: commits are not durable while it runs',
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Worker processes building and inserting chunks. Building the rows is the bottleneck, '
+                 'so this helps on SQLite too',
+        )
+
+    def handle(self, *args, **options):
+        global _command
+        if min(options['companies'], options['employers'], options['seekers'], options['jobs']) < 1:
+            raise CommandError('--companies, --employers, --seekers and --jobs must be at least 1')
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG is off, so this may be a real database. generate_dataset turns off durable commits '
+                'and gives every user the same known password. Pass --force if it is a scratch database'
+            )
+        if options['processes'] > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('--processes needs a platform that can fork')
+        self.options = options
+        self.now = timezone.now()
+        self.locations = load_locations()
+        self.location_weights = zipf_cum_weights(len(self.locations), options['skew'])
+        self.skill_weights = zipf_cum_weights(len(SKILLS), options['skew'])
+        self.role_weights = zipf_cum_weights(len(ROLES), options['skew'])
+        self.industry_weights = zipf_cum_weights(len(INDUSTRIES), options['skew'])
+        # New rows get ids after the existing ones, so nothing has to be read back.
+        self.first_ids = {
+            model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in (Company, User, Job, JobApplication, Bookmark)
+        }
+        self.first_employer_id = self.first_ids[User]
+        self.first_seeker_id = self.first_employer_id + options['employers']
+        self.password = make_password(options['password'])
+        self.skill_ids = resolve_skills(SKILLS)
+
+        started = time.perf_counter()
+        self.plan_companies()
+        self.plan_jobs()
+        self.stdout.write(f'planned in {time.perf_counter() - started:.1f}s')
+
+        total = 0
+        _command = self
+        try:
+            with bulk_load_connections(), explicit_timestamps(Company, Job, JobApplication, Bookmark):
+                total += self.run_stage('companies', options['companies'])
+                total += self.run_stage('employers', options['employers'])
+                total += self.run_stage('seekers', options['seekers'])
+                total += self.run_stage('jobs', options['jobs'])
+                total += self.run_stage('applications', options['jobs'])
+                total += self.run_stage('bookmarks', options['jobs'])
+                self.reset_sequences()
+        finally:
+            _command = None
+        bump_namespace('jobs', 'companies')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total:,} rows in {elapsed:.1f}s ({total / elapsed * 60:,.0f} rows/min). '
+            f'Run refresh_similar_jobs to compute similar jobs.'
+        ))
+
+    def run_stage(self, stage, items):
+        """Create the rows of ``items`` companies, users or jobs, one chunk per transaction."""
+        started = time.perf_counter()
+        chunks = [(stage, start, min(start + CHUNK_SIZE, items)) for start in range(0, items, CHUNK_SIZE)]
+        if self.options['processes'] > 1 and len(chunks) > 1:
+            # Forked workers must not share the parent's connection.
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(self.options['processes']) as pool:
+                rows = sum(pool.imap_unordered(_create_chunk, chunks))
+        else:
+            rows = sum(map(_create_chunk, chunks))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{stage}: {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f}/s)')
+        return rows
+
+    def create_chunk(self, stage, start, stop):
+        # Every chunk has its own random stream, so neither the number of
+        # processes nor the order chunks run in changes what they generate.
+        rng = random.Random(f"{self.options['seed']}:{stage}:{start}")
+        batches = getattr(self, f'build_{stage}')(rng, start, stop)
+        with transaction.atomic():
+            for model, objs in batches:
+                model.objects.bulk_create(objs)
+                if model is Job:
+                    index_jobs(objs)
+        return sum(len(objs) for _, objs in batches)
+
+    def draw_skills(self, rng, low, high):
+        picked = rng.choices(SKILLS, cum_weights=self.skill_weights, k=rng.randint(low, high))
+        return list(dict.fromkeys(picked))
+
+    def plan_companies(self):
+        """Names and places of the companies, which their jobs repeat."""
+        rng = random.Random(f"{self.options['seed']}:plan-companies")
+        self.company_names, self.company_locations, self.company_points = [], [], []
+        for _ in range(self.options['companies']):
+            self.company_names.append(f'{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {rng.choice(NAME_SUFFIXES)}')
+            location = rng.choices(self.locations, cum_weights=self.location_weights)[0]
+            self.company_locations.append(location)
+            self.company_points.append(cached_locate(location))
+
+    def plan_jobs(self):
+        """Company, age, activity and popularity of every job, so ids and counters are known up front."""
+        options = self.options
+        rng = random.Random(f"{options['seed']}:plan-jobs")
+        jobs, companies, seekers = options['jobs'], options['companies'], options['seekers']
+        company_weights = zipf_cum_weights(companies, options['skew'])
+        self.job_company = array('l')
+        for start in range(0, jobs, CHUNK_SIZE):
+            count = min(CHUNK_SIZE, jobs - start)
+            self.job_company.extend(rng.choices(range(companies), cum_weights=company_weights, k=count))
+
+        # Ids follow posting time like they would in production.
+        span = options['days'] * 86400
+        self.job_age = array('d', (max(0.0, span * (1 - (index + rng.random()) / jobs)) for index in range(jobs)))
+        self.job_active = bytearray(rng.random() < (0.95 if age < 30 * 86400 else 0.3) for age in self.job_age)
+        self.company_active_jobs = array('l', [0]) * companies
+        for company, active in zip(self.job_company, self.job_active):
+            self.company_active_jobs[company] += active
+
+        # The same jobs are hot for applications and bookmarks.
+        ranks = list(range(1, jobs + 1))
+        rng.shuffle(ranks)
+        norm = sum(rank ** -HOT_JOB_EXPONENT for rank in range(1, jobs + 1))
+        self.job_applications = self.skewed_counts(rng, ranks, options['applications'] / norm, seekers)
+        self.job_bookmarks = self.skewed_counts(rng, ranks, options['bookmarks'] / norm, seekers)
+        # The id of the first application and bookmark of each job.
+        self.application_offsets = array('q', accumulate(self.job_applications, initial=0))
+        self.bookmark_offsets = array('q', accumulate(self.job_bookmarks, initial=0))
+
+    def skewed_counts(self, rng, ranks, scale, cap):
+        # Random rounding keeps the expected total at the requested one.
+        return array('l', (min(cap, int(scale * rank ** -HOT_JOB_EXPONENT + rng.random())) for rank in ranks))
+
+    def joined_at(self, rng):
+        return self.now - timedelta(seconds=rng.randrange(self.options['days'] * 86400))
+
+    def build_companies(self, rng, start, stop):
+        companies = []
+        for index in range(start, stop):
+            pk = self.first_ids[Company] + index
+            name, location = self.company_names[index], self.company_locations[index]
+            industry = rng.choices(INDUSTRIES, cum_weights=self.industry_weights)[0]
+            latitude, longitude, geo_cell = self.company_points[index]
+            created_at = self.now - timedelta(days=self.options['days'] + rng.randrange(365))
+            companies.append(Company(
+                id=pk, name=name, industry=industry, location=location,
+                description=f'{name} is a {industry.lower()} company based in {location}.',
+                website=f'https://company{pk}.example.com',
+                founded_year=rng.randint(1950, self.now.year), size=rng.choice(SIZES),
+                created_at=created_at, updated_at=created_at,
+                active_job_count=self.company_active_jobs[index],
+                latitude=latitude, longitude=longitude, geo_cell=geo_cell,
+            ))
+        return [(Company, companies)]
+
+    def build_employers(self, rng, start, stop):
+        # Employer i works for company i modulo the number of companies.
+        employers = [
+            User(
+                id=self.first_employer_id + index, username=f'gen-employer-{self.first_employer_id + index}',
+                email=f'employer{self.first_employer_id + index}@example.com', password=self.password,
+                user_type='employer', first_name='Employer', last_name=str(index),
+                company_id=self.first_ids[Company] + index % self.options['companies'],
+                date_joined=self.joined_at(rng),
+            )
+            for index in range(start, stop)
+        ]
+        return [(User, employers)]
+
+    def build_seekers(self, rng, start, stop):
+        through = User.normalized_skills.through
+        seekers, links = [], []
+        for index in range(start, stop):
+            pk = self.first_seeker_id + index
+            skills = self.draw_skills(rng, 2, 8)
+            seekers.append(User(
+                id=pk, username=f'gen-seeker-{pk}', email=f'seeker{pk}@example.com', password=self.password,
+                user_type='job_seeker', first_name='Seeker', last_name=str(index),
+                skills=', '.join(skills), date_joined=self.joined_at(rng),
+            ))
+            links.extend(through(user_id=pk, skill_id=self.skill_ids[name]) for name in skills)
+        return [(User, seekers), (through, links)]
+
+    def job_poster(self, rng, company):
+        """One of the company's employers, see build_employers. Shared when there are too few."""
+        companies, employers = self.options['companies'], self.options['employers']
+        if company >= employers:
+            return self.first_employer_id + company % employers
+        return self.first_employer_id + company + companies * rng.randrange((employers - company - 1) // companies + 1)
+
+    def build_jobs(self, rng, start, stop):
+        through = Job.normalized_skills.through
+        jobs, links = [], []
+        for index in range(start, stop):
+            pk = self.first_ids[Job] + index
+            company = self.job_company[index]
+            company_name = self.company_names[company]
+            level = rng.choices(LEVELS, weights=LEVEL_WEIGHTS)[0]
+            title = LEVEL_PREFIXES[level] + rng.choices(ROLES, cum_weights=self.role_weights)[0]
+            location = rng.choices(self.locations, cum_weights=self.location_weights)[0]
+            skills = self.draw_skills(rng, 3, 8)
+            skills_required = ', '.join(skills)
+            description = (
+                f'{company_name} is hiring a {title} in {location}. You will work with '
+                f'{", ".join(skills[:3])} on a team that ships every week.'
+            )
+            # Like Job.set_coordinates: the job's own location, else the company's.
+            latitude, longitude, geo_cell = cached_locate(location)
+            if latitude is None:
+                latitude, longitude, geo_cell = self.company_points[company]
+            salary_min = salary_max = None
+            if rng.random() < 0.7:
+                base = LEVEL_SALARIES[level] * rng.uniform(0.8, 1.3)
+                salary_min = Decimal(round(base, -3))
+                salary_max = Decimal(round(base * rng.uniform(1.1, 1.5), -3))
+            posted_at = self.now - timedelta(seconds=self.job_age[index])
+            jobs.append(Job(
+                id=pk, title=title, company_id=self.first_ids[Company] + company,
+                description=description, requirements=f'Experience with {skills_required}.',
+                responsibilities=f'Own the {title.lower()} work of the team.',
+                location=location, salary_min=salary_min, salary_max=salary_max,
+                posted_by_id=self.job_poster(rng, company),
+                job_type=rng.choices(JOB_TYPES, weights=JOB_TYPE_WEIGHTS)[0], experience_level=level,
+                skills_required=skills_required, is_active=bool(self.job_active[index]),
+                posted_at=posted_at, updated_at=posted_at,
+                deadline=posted_at + timedelta(days=rng.randint(14, 90)) if rng.random() < 0.5 else None,
+                latitude=latitude, longitude=longitude, geo_cell=geo_cell,
+                search_document=compose_search_document(title, company_name, skills_required, description),
+                application_count=self.job_applications[index], bookmark_count=self.job_bookmarks[index],
+                # Synthetic jobs should not alert the saved searches of real users.
+                alerts_pending=False,
+            ))
+            links.extend(through(job_id=pk, skill_id=self.skill_ids[name]) for name in skills)
+        return [(Job, jobs), (through, links)]
+
+    def build_applications(self, rng, start, stop):
+        seekers = range(self.first_seeker_id, self.first_seeker_id + self.options['seekers'])
+        applications = []
+        for index in range(start, stop):
+            count = self.job_applications[index]
+            if not count:
+                continue
+            first_id = self.first_ids[JobApplication] + self.application_offsets[index]
+            age = self.job_age[index]
+            posted_at = self.now - timedelta(seconds=age)
+            statuses = rng.choices(STATUSES, weights=STATUS_WEIGHTS, k=count)
+            for offset, applicant_id in enumerate(rng.sample(seekers, count)):
+                applied_at = posted_at + timedelta(seconds=rng.random() * min(age, 30 * 86400))
+                applications.append(JobApplication(
+                    id=first_id + offset, job_id=self.first_ids[Job] + index, applicant_id=applicant_id,
+                    status=statuses[offset], applied_at=applied_at, updated_at=applied_at,
+                    cover_letter='I would love to join the team.' if rng.random() < 0.3 else None,
+                ))
+        return [(JobApplication, applications)]
+
+    def build_bookmarks(self, rng, start, stop):
+        seekers = range(self.first_seeker_id, self.first_seeker_id + self.options['seekers'])
+        bookmarks = []
+        for index in range(start, stop):
+            count = self.job_bookmarks[index]
+            if not count:
+                continue
+            first_id = self.first_ids[Bookmark] + self.bookmark_offsets[index]
+            age = self.job_age[index]
+            posted_at = self.now - timedelta(seconds=age)
+            for offset, user_id in enumerate(rng.sample(seekers, count)):
+                bookmarks.append(Bookmark(
+                    id=first_id + offset, job_id=self.first_ids[Job] + index, user_id=user_id,
+                    created_at=posted_at + timedelta(seconds=rng.random() * age),
+                ))
+        return [(Bookmark, bookmarks)]
+
+    def reset_sequences(self):
+        # Explicit ids leave PostgreSQL sequences behind. SQLite needs nothing.
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Company, User, Job, JobApplication, Bookmark]
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
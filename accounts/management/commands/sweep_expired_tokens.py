@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired API tokens and tokens of inactive users in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cutoff = timezone.now() - settings.TOKEN_EXPIRE_AFTER
+        stale = Token.objects.filter(Q(created__lte=cutoff) | Q(user__is_active=False))
+
+        deleted = 0
+        while True:
+            keys = list(stale.values_list('pk', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += Token.objects.filter(pk__in=keys).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} stale tokens'))
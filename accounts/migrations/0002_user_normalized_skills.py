@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0007_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='normalized_skills',
+            field=models.ManyToManyField(blank=True, related_name='users', to='jobs.skill'),
+        ),
+    ]
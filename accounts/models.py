@@ -22,6 +22,8 @@ class User(AbstractUser):
     # For job seekers
     resume = models.FileField(upload_to='resumes/', blank=True, null=True)
     skills = models.TextField(blank=True, null=True)
+    # Parsed from skills by the signals in accounts/signals.py
+    normalized_skills = models.ManyToManyField('jobs.Skill', blank=True, related_name='users')
     
     # For employers
     company = models.ForeignKey(
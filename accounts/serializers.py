@@ -2,13 +2,15 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
+from . import hashing
+
 User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        exclude = ('password', 'is_superuser', 'is_staff', 'user_permissions', 'groups')
+        exclude = ('password', 'is_superuser', 'is_staff', 'user_permissions', 'groups', 'normalized_skills')
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -26,7 +28,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         
     def create(self, validated_data):
         validated_data.pop('password2')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        # What create_user does, with the hashing on the pool.
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = hashing.make_password(password)
+        user.save()
         return user
 
 
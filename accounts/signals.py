@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from jobs.ranking import invalidate_match_scores
+from jobs.skills import sync_skills
+from .authentication import token_cache
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    # Covers password changes, deactivation and profile edits alike.
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_init, sender=User)
+def remember_user_skills(sender, instance, **kwargs):
+    instance._skills_text = instance.__dict__.get('skills')
+
+
+@receiver(post_save, sender=User)
+def update_user_skills(sender, instance, created, using, **kwargs):
+    # A deferred field was not loaded, so it cannot have changed either.
+    text = instance.__dict__.get('skills', instance._skills_text)
+    if text != instance._skills_text or (created and text):
+        sync_skills([instance], 'skills', using=using)
+        if not created:
+            invalidate_match_scores(applicant=instance)
+    instance._skills_text = text
@@ -1,3 +1,200 @@
-from django.test import TestCase
+import io
+import threading
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from jobapi.metrics import registry
+from .authentication import ExpiringTokenAuthentication, TokenCache, token_cache
+from .hashing import HashingBusy, HashingPool
+from .models import User
+
+
+def throttled_count(endpoint):
+    series = registry.snapshot()['counters'].get('auth_attempts_total', {})
+    return sum(value for key, value in series.items() if f'"{endpoint}"' in key and '"throttled"' in key)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'login_ip': '5/min', 'login_username': '2/min', 'register_ip': '5/min'},
+})
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, username, password):
+        return self.client.post('/api/accounts/login/', {'username': username, 'password': password}, format='json')
+
+    def test_registered_user_can_log_in(self):
+        response = self.client.post('/api/accounts/register/', {
+            'username': 'seeker', 'email': 'Seeker@EXAMPLE.com', 'password': 'Zq8!kvw2Lp',
+            'password2': 'Zq8!kvw2Lp', 'first_name': 'S', 'last_name': 'K',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['user']['email'], 'Seeker@example.com')
+        self.assertEqual(self.login('seeker', 'Zq8!kvw2Lp').status_code, 200)
+
+    def test_username_bucket_rejects_after_its_burst(self):
+        throttled = throttled_count('login')
+        self.assertEqual(self.login('victim', 'guess1').status_code, 401)
+        self.assertEqual(self.login('Victim', 'guess2').status_code, 401)
+        response = self.login('victim', 'guess3')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(throttled_count('login') - throttled, 1)
+        # The IP bucket still has tokens for other accounts.
+        self.assertEqual(self.login('someone', 'guess').status_code, 401)
+
+    def test_forwarded_for_header_does_not_reset_the_ip_bucket(self):
+        for attempt in range(5):
+            response = self.client.post(
+                '/api/accounts/login/', {'username': f'user{attempt}', 'password': 'guess'},
+                format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{attempt}',
+            )
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            '/api/accounts/login/', {'username': 'another', 'password': 'guess'},
+            format='json', HTTP_X_FORWARDED_FOR='10.0.0.99',
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_behind_a_proxy_the_address_it_saw_is_used(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for attempt in range(6):
+                response = self.client.post(
+                    '/api/accounts/login/', {'username': f'user{attempt}', 'password': 'guess'},
+                    format='json', HTTP_X_FORWARDED_FOR=f'203.0.113.7, 10.0.0.{attempt}',
+                )
+                self.assertEqual(response.status_code, 401)
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = User.objects.create_user('seeker', password='Zq8!kvw2Lp')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def profile(self):
+        return self.client.get('/api/accounts/profile/')
+
+    def expire(self, token):
+        Token.objects.filter(pk=token.pk).update(created=timezone.now() - settings.TOKEN_EXPIRE_AFTER)
+
+    def test_expired_token_is_rejected_and_deleted(self):
+        self.expire(self.token)
+        response = self.profile()
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Token.objects.filter(pk=self.token.pk).exists())
+
+    def test_cached_token_needs_no_queries(self):
+        self.assertEqual(self.profile().status_code, 200)
+        with self.assertNumQueries(0):
+            user, token = ExpiringTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        # Every request gets its own copy of the cached user.
+        self.assertIsNot(user, token_cache.get(self.token.key).user)
+
+    def test_logout_evicts_the_token(self):
+        self.assertEqual(self.profile().status_code, 200)
+        self.assertEqual(self.client.post('/api/accounts/logout/').status_code, 200)
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_password_change_evicts_the_token(self):
+        self.assertEqual(self.profile().status_code, 200)
+        response = self.client.patch('/api/accounts/change-password/', {
+            'old_password': 'Zq8!kvw2Lp', 'new_password': 'Hv4#nrt8Wq', 'new_password2': 'Hv4#nrt8Wq',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_deactivation_evicts_the_token(self):
+        self.assertEqual(self.profile().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_login_replaces_an_expired_token(self):
+        self.expire(self.token)
+        response = self.client.post(
+            '/api/accounts/login/', {'username': 'seeker', 'password': 'Zq8!kvw2Lp'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['token'], self.token.key)
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [response.data['token']])
+
+    def test_sweeper_deletes_stale_tokens_in_batches(self):
+        self.expire(self.token)
+        for index in range(4):
+            token = Token.objects.create(user=User.objects.create_user(f'expired{index}', password='pw'))
+            self.expire(token)
+        Token.objects.create(user=User.objects.create_user('inactive', password='pw', is_active=False))
+        fresh = Token.objects.create(user=User.objects.create_user('fresh', password='pw'))
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('sweep_expired_tokens', batch_size=2, stdout=io.StringIO())
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(list(Token.objects.values_list('pk', flat=True)), [fresh.pk])
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'user{index}', password='pw') for index in range(3)]
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tokens = TokenCache(maxsize=2, ttl=60)
+        for name, user in zip('abc', self.users):
+            if name == 'c':
+                tokens.get('a')
+            tokens.set(name, Token(key=name, user=user))
+        self.assertIsNotNone(tokens.get('a'))
+        self.assertIsNone(tokens.get('b'))
+        self.assertIsNotNone(tokens.get('c'))
+        self.assertEqual(len(tokens._entries), 2)
+
+    def test_entries_never_outlive_their_token(self):
+        tokens = TokenCache(maxsize=2, ttl=60)
+        tokens.set('a', Token(key='a', user=self.users[0]), max_age=0)
+        self.assertIsNone(tokens.get('a'))
+        tokens.set('b', Token(key='b', user=self.users[1]), max_age=-1)
+        self.assertIsNone(tokens.get('b'))
+
+
+class HashingPoolTests(TestCase):
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=0)
+    def test_full_pool_fails_fast(self):
+        pool = HashingPool()
+        release = threading.Event()
+        worker = threading.Thread(target=pool.run, args=(release.wait,))
+        worker.start()
+        try:
+            with self.assertRaises(HashingBusy):
+                pool.run(lambda: None)
+        finally:
+            release.set()
+            worker.join()
+        self.assertEqual(pool.run(lambda: 'done'), 'done')
+
+
+class GenerateDatasetTests(TestCase):
+    @override_settings(DEBUG=False)
+    def test_refuses_without_force_when_debug_is_off(self):
+        with self.assertRaisesMessage(CommandError, '--force'):
+            call_command('generate_dataset', companies=1, employers=1, seekers=1, jobs=1)
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,103 @@
+"""
+Token-bucket throttles for login and registration.
+
+Each rate in ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` uses DRF's
+``<requests>/<period>`` format. Here it describes a bucket that holds
+``requests`` tokens and refills evenly over ``period``. A client can burst
+up to the full bucket and then keeps one attempt per ``period / requests``.
+A rejected attempt takes no token and costs one cache read, which makes it
+far cheaper than a password hash.
+
+Buckets live in the default cache, which is Redis in production, so every
+worker shares them. The read-modify-write is not atomic. A few concurrent
+attempts from the same client across workers can each take the last token,
+which bounds the overshoot by the number of workers.
+
+Logins are limited per client IP and per username, registrations per
+client IP. The username bucket keeps an attacker with many addresses from
+trying unlimited passwords against one account. It is only charged once
+the IP bucket lets the attempt through.
+"""
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from jobapi.metrics import register_counter, registry
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+register_counter('auth_attempts_total', 'Login and registration attempts by outcome.')
+
+
+def record_attempt(endpoint, outcome):
+    """Count an attempt as success, failure, throttled or busy."""
+    registry.inc('auth_attempts_total', endpoint=endpoint, outcome=outcome)
+
+
+def parse_rate(rate):
+    requests, period = rate.split('/')
+    return int(requests), PERIODS[period[0]]
+
+
+class TokenBucket:
+    def __init__(self, key, capacity, period):
+        self.key = key
+        self.capacity = capacity
+        self.period = period
+        self.refill = capacity / period
+
+    def take(self):
+        """Take a token. Returns 0 on success, else the seconds until one is available."""
+        now = time.time()
+        tokens = self.capacity
+        state = cache.get(self.key)
+        if state is not None:
+            tokens, updated_at = state
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill)
+        if tokens < 1:
+            return (1 - tokens) / self.refill
+        # A bucket left alone for a full period is full again, so it can expire.
+        cache.set(self.key, (tokens - 1, now), timeout=math.ceil(self.period))
+        return 0
+
+
+class AuthRateThrottle(BaseThrottle):
+    """Takes a token from each of the attempt's buckets in turn."""
+    scope = None
+    by_username = False
+
+    def get_buckets(self, request):
+        yield f'{self.scope}_ip', self.get_ident(request)
+        username = request.data.get('username') if self.by_username and isinstance(request.data, dict) else None
+        if isinstance(username, str) and username.strip():
+            yield f'{self.scope}_username', hashlib.sha256(username.strip().lower().encode()).hexdigest()[:32]
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        for name, ident in self.get_buckets(request):
+            rate = rates.get(name)
+            if not rate:
+                continue
+            wait = TokenBucket(f'throttle:{name}:{ident}', *parse_rate(rate)).take()
+            if wait:
+                self.wait_seconds = wait
+                record_attempt(self.scope, 'throttled')
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginRateThrottle(AuthRateThrottle):
+    scope = 'login'
+    by_username = True
+
+
+class RegisterRateThrottle(AuthRateThrottle):
+    scope = 'register'
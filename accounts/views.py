@@ -1,6 +1,6 @@
 from django.shortcuts import render
 from rest_framework import status, viewsets, permissions, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authtoken.models import Token
@@ -8,6 +8,9 @@ from django.contrib.auth import authenticate, get_user_model
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import logging
+from .authentication import get_or_rotate_token, token_expires_at
+from .hashing import HashingBusy
+from .throttling import LoginRateThrottle, RegisterRateThrottle, record_attempt
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, 
     UserLoginSerializer, PasswordChangeSerializer
@@ -19,37 +22,44 @@ logger = logging.getLogger(__name__)
 @method_decorator(csrf_exempt, name='dispatch')
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
+    # A stale token sent along must not turn registration into a 401.
+    authentication_classes = ()
     permission_classes = (AllowAny,)
     serializer_class = UserRegistrationSerializer
+    throttle_classes = [RegisterRateThrottle]
 
     def create(self, request, *args, **kwargs):
-        logger.info(f"Register attempt: {request.data}")
-        logger.info(f"Request headers: {request.headers}")
         try:
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
                 user = serializer.save()
-                token, created = Token.objects.get_or_create(user=user)
+                token = get_or_rotate_token(user)
                 response_data = {
                     "user": UserSerializer(user, context=self.get_serializer_context()).data,
-                    "token": token.key
+                    "token": token.key,
+                    "token_expires_at": token_expires_at(token)
                 }
                 logger.info(f"User created successfully: {user.username}")
+                record_attempt('register', 'success')
                 return Response(response_data, status=status.HTTP_201_CREATED)
             else:
                 logger.error(f"Serializer errors: {serializer.errors}")
+                record_attempt('register', 'failure')
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except HashingBusy:
+            record_attempt('register', 'busy')
+            raise
         except Exception as e:
             logger.error(f"Exception in register: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['POST'])
+@authentication_classes([])  # a client may still send its expired token
 @permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle])
 @csrf_exempt
 def login_view(request):
-    logger.info(f"Login attempt: {request.data}")
-    logger.info(f"Login request headers: {request.headers}")
     try:
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -59,21 +69,28 @@ def login_view(request):
             user = authenticate(username=username, password=password)
             
             if user:
-                token, created = Token.objects.get_or_create(user=user)
+                token = get_or_rotate_token(user)
                 logger.info(f"User {username} authenticated successfully, token: {token.key[:5]}...")
+                record_attempt('login', 'success')
                 return Response({
                     'token': token.key,
+                    'token_expires_at': token_expires_at(token),
                     'user_id': user.pk,
                     'username': user.username,
                     'user_type': user.user_type
                 })
             logger.warning(f"Invalid login credentials for user: {username}")
+            record_attempt('login', 'failure')
             return Response(
                 {"error": "Invalid credentials"}, 
                 status=status.HTTP_401_UNAUTHORIZED
             )
         logger.error(f"Login serializer errors: {serializer.errors}")
+        record_attempt('login', 'failure')
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    except HashingBusy:
+        record_attempt('login', 'busy')
+        raise
     except Exception as e:
         logger.error(f"Exception in login: {str(e)}")
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -82,8 +99,9 @@ def login_view(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
-    if request.user.auth_token:
-        request.user.auth_token.delete()
+    # Deleting through the queryset fires post_delete, which also evicts the
+    # token from the authentication cache.
+    Token.objects.filter(user=request.user).delete()
     return Response({"message": "Successfully logged out."}, status=status.HTTP_200_OK)
 
 
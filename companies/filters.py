@@ -0,0 +1,8 @@
+from jobapi.geo import RadiusFilterSet
+from .models import Company
+
+
+class CompanyFilter(RadiusFilterSet):
+    class Meta:
+        model = Company
+        fields = ['industry', 'location']
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_company_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['geo_cell'], name='company_geo_cell_idx'),
+        ),
+    ]
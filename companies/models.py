@@ -1,4 +1,5 @@
 from django.db import models
+from jobapi.geo import locate
 
 # Create your models here.
 
@@ -13,10 +14,30 @@ class Company(models.Model):
     size = models.CharField(max_length=50, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by the Job signals in jobs/signals.py
+    active_job_count = models.PositiveIntegerField(default=0, editable=False)
+    # Geocoded from location on save, see jobapi/geo.py
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
+    geo_cell = models.IntegerField(blank=True, null=True, editable=False)
     
     class Meta:
         verbose_name = "Company"
         verbose_name_plural = "Companies"
+        indexes = [
+            models.Index(fields=['name'], name='company_name_idx'),
+            models.Index(fields=['geo_cell'], name='company_geo_cell_idx'),
+        ]
         
     def __str__(self):
         return self.name
+
+    def set_coordinates(self):
+        self.latitude, self.longitude, self.geo_cell = locate(self.location)
+
+    def save(self, *args, **kwargs):
+        self.set_coordinates()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude', 'geo_cell'}
+        super().save(*args, **kwargs)
@@ -9,11 +9,8 @@ class CompanySerializer(serializers.ModelSerializer):
 
 
 class CompanyDetailSerializer(serializers.ModelSerializer):
-    job_count = serializers.SerializerMethodField()
+    job_count = serializers.IntegerField(source='active_job_count', read_only=True)
     
     class Meta:
         model = Company
-        fields = '__all__'
-    
-    def get_job_count(self, obj):
-        return obj.jobs.filter(is_active=True).count() 
\ No newline at end of file
+        fields = '__all__' 
\ No newline at end of file
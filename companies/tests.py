@@ -1,3 +1,19 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Company
+
+
+class CompanyListQueryCountTests(TestCase):
+
+    def test_company_list_query_count_is_constant(self):
+        client = APIClient(SERVER_NAME='localhost')
+        for rows in (2, 8):
+            for i in range(rows - Company.objects.count()):
+                Company.objects.create(name=f'Company {i}', description='d', industry='Tech', location='Berlin')
+            cache.clear()
+            # COUNT + page
+            with self.assertNumQueries(2):
+                response = client.get('/api/companies/')
+            self.assertEqual(len(response.data['results']), rows)
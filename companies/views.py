@@ -2,6 +2,10 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions, filters
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
+from jobapi.async_views import AsyncPageNumberPagination, AsyncReadMixin
+from jobapi.query_optimization import QueryOptimizationMixin
+from jobapi.response_cache import CachedResponseMixin
+from .filters import CompanyFilter
 from .models import Company
 from .serializers import CompanySerializer, CompanyDetailSerializer
 
@@ -19,13 +23,16 @@ class IsEmployerOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_authenticated and request.user.user_type == 'employer'
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(AsyncReadMixin, CachedResponseMixin, QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsEmployerOrReadOnly]
+    pagination_class = AsyncPageNumberPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['industry', 'location']
+    filterset_class = CompanyFilter
     search_fields = ['name', 'description', 'industry']
     ordering_fields = ['name', 'created_at']
+    cache_name = 'companies'
+    cache_namespaces = ('companies', 'jobs')
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
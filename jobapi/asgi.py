@@ -2,6 +2,9 @@
 ASGI config for jobapi project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+``GET`` and ``HEAD`` requests for the list and retrieve routes of viewsets
+with ``AsyncReadMixin`` are served by their async views (see
+jobapi/async_views.py); everything else runs the same views as WSGI.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +12,22 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobapi.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from jobapi.async_views import AsyncRouteMixin  # noqa: E402
+
+
+class JobAPIASGIHandler(AsyncRouteMixin, ASGIHandler):
+    pass
+
+
+application = JobAPIASGIHandler()
+
+from jobapi.startup import start_background_builds  # noqa: E402
+
+start_background_builds()
@@ -0,0 +1,183 @@
+"""
+Async list and retrieve for the public read endpoints.
+
+DRF views are synchronous, so a sync worker is held for the whole time a
+request waits on the database. Viewsets with ``AsyncReadMixin`` also get
+async ``list`` and ``retrieve`` views. The ASGI application (jobapi/asgi.py)
+sends ``GET`` and ``HEAD`` requests for those actions there through
+``async_variant``. WSGI and every other method keep the sync viewset.
+
+The async views run the viewset's own authentication, permissions,
+throttling, response cache, filters, search and query optimization, and
+its serializers and paginator. The responses are therefore the same as the
+sync ones. Only the page, its count and the retrieved object are read with
+the async ORM (``acount``, ``aiterator``, ``aget``), so the event loop keeps
+serving other requests in the meantime. The steps around those reads may
+touch the database (token lookups, cache misses, the personal fields of a
+job), so they run as one ``sync_to_async`` call each.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .response_cache import CachedResponseMixin
+
+
+async def fetch(queryset, chunk_size=2000):
+    """The rows of ``queryset``, read with the async ORM."""
+    # aiterator() only runs prefetch_related lookups when given a chunk size.
+    return [obj async for obj in queryset.aiterator(chunk_size=chunk_size)]
+
+
+class AsyncPageNumberPagination(pagination.PageNumberPagination):
+    """PageNumberPagination with an async ``apaginate_queryset``."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached property; fill it in so it never runs sync.
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.page.object_list = await fetch(self.page.object_list, page_size)
+        return list(self.page)
+
+
+class AsyncReadMixin:
+    """
+    Viewset mixin adding async variants of ``list`` and ``retrieve``.
+    Paginators with an ``apaginate_queryset`` method read pages with the
+    async ORM. Other paginators run in a thread.
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_async_view(cls, action, initkwargs):
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.action_map = {'get': action, 'head': action}
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.actions = {'get': action}
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``dispatch`` for the async actions."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            handler = getattr(self, f'a{self.action}')
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        response, queryset = await sync_to_async(self.prepare_read)(request)
+        if response is not None:
+            return response
+        page = await self.apaginate_queryset(queryset)
+        if page is None:
+            return await sync_to_async(self.finish_read)(await fetch(queryset), many=True)
+        return await sync_to_async(self.finish_read)(page, many=True, paginated=True)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        response, queryset = await sync_to_async(self.prepare_read)(request)
+        if response is not None:
+            return response
+        instance = await self.aget_object(queryset)
+        return await sync_to_async(self.finish_read)(instance)
+
+    async def apaginate_queryset(self, queryset):
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        if hasattr(paginator, 'apaginate_queryset'):
+            return await paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def aget_object(self, queryset):
+        """``get_object`` on an already filtered queryset, without the permission check."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            return await queryset.aget(**filter_kwargs)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+
+    def prepare_read(self, request):
+        """
+        The sync steps before the read: ``initial`` and the cache lookup.
+        Returns ``(cached response, None)`` or ``(None, filtered queryset)``.
+        """
+        self.initial(request, *self.args, **self.kwargs)
+        self.read_cache_key = None
+        if isinstance(self, CachedResponseMixin) and self.is_cacheable(request):
+            self.read_cache_key, response = self.get_cached_response(request)
+            if response is not None:
+                return response, None
+        return None, self.filter_queryset(self.get_queryset())
+
+    def finish_read(self, result, many=False, paginated=False):
+        """The sync steps after the read: permissions, serialization and caching."""
+        if not many:
+            self.check_object_permissions(self.request, result)
+        data = self.get_serializer(result, many=many).data
+        response = self.get_paginated_response(data) if paginated else Response(data)
+        if self.read_cache_key is not None:
+            response = self.store_cached_response(self.read_cache_key, response)
+        return response
+
+
+_async_views = {}
+
+
+def async_variant(view):
+    """The async view for a sync viewset route, or None if it has none."""
+    try:
+        return _async_views[view]
+    except KeyError:
+        pass
+    cls = getattr(view, 'cls', None)
+    action = (getattr(view, 'actions', None) or {}).get('get')
+    async_view = None
+    if isinstance(cls, type) and issubclass(cls, AsyncReadMixin) and action in cls.async_actions:
+        async_view = cls.as_async_view(action, view.initkwargs)
+    _async_views[view] = async_view
+    return async_view
+
+
+class AsyncRouteMixin:
+    """Handler mixin sending ``GET`` and ``HEAD`` to ``async_variant`` views."""
+
+    def resolve_request(self, request):
+        match = super().resolve_request(request)
+        if request.method in ('GET', 'HEAD'):
+            view = async_variant(match.func)
+            if view is not None:
+                match.func = view
+        return match
@@ -0,0 +1,169 @@
+"""
+In-process fan-out of server-sent events with a cross-worker broadcast.
+
+Publishers call ``get_broadcast().publish(channel, message)`` from any
+thread or process, typically a model signal. With ``EVENT_BROADCAST_URL``
+set to a ``redis://`` URL the message goes through Redis pub/sub, and every
+ASGI worker runs one listener task that hands it to the local subscribers.
+With ``local`` (the default, and what the tests use) it is delivered to the
+subscribers of the current process only.
+
+Each subscriber is a bounded ``asyncio.Queue`` on the worker's event loop.
+Delivery never waits: a subscriber whose queue is full is marked as
+overflowed and dropped, so a slow client cannot hold back the others or
+grow memory. An idle subscriber costs one queue and one pending ``get``.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, channel, match, maxsize):
+        self.channel = channel
+        self.match = match
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, message):
+        if self.overflowed or not self.match(message):
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake the consumer even if it is waiting on an empty queue.
+            self.queue = asyncio.Queue(1)
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout):
+        """The next message, None once overflowed; TimeoutError when idle."""
+        message = await asyncio.wait_for(self.queue.get(), timeout)
+        return None if self.overflowed else message
+
+
+class LocalBroadcast:
+    """Delivers to the subscribers of this process."""
+
+    def __init__(self, max_subscribers=None, queue_size=None):
+        self.max_subscribers = max_subscribers or getattr(settings, 'SSE_MAX_CONNECTIONS', 10000)
+        self.queue_size = queue_size or getattr(settings, 'SSE_CLIENT_QUEUE_SIZE', 100)
+        self.subscriptions = {}
+        self.loop = None
+        self._count = 0
+
+    def subscribe(self, channel, match=lambda message: True):
+        """Register a subscriber; must be called on the worker's event loop."""
+        if self._count >= self.max_subscribers:
+            raise TooManySubscribers()
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # A new loop (tests, a restarted worker): old subscribers are gone.
+            self.loop, self.subscriptions, self._count = loop, {}, 0
+            self.started()
+        subscription = Subscription(channel, match, self.queue_size)
+        self.subscriptions.setdefault(channel, set()).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscribers = self.subscriptions.get(subscription.channel)
+        if subscribers and subscription in subscribers:
+            subscribers.discard(subscription)
+            self._count -= 1
+
+    def started(self):
+        """Hook run when subscriptions start on a new event loop."""
+
+    def deliver(self, channel, message):
+        """Fan out on the event loop thread."""
+        for subscription in list(self.subscriptions.get(channel, ())):
+            subscription.offer(message)
+            if subscription.overflowed:
+                self.unsubscribe(subscription)
+
+    def deliver_threadsafe(self, channel, message):
+        loop = self.loop
+        if loop is None or loop.is_closed() or not self.subscriptions.get(channel):
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.deliver(channel, message)
+        else:
+            loop.call_soon_threadsafe(self.deliver, channel, message)
+
+    def publish(self, channel, message):
+        self.deliver_threadsafe(channel, message)
+
+
+class RedisBroadcast(LocalBroadcast):
+    """Publishes through Redis pub/sub so every worker receives every message."""
+
+    def __init__(self, url, prefix='events:', **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+        self._listener = None
+
+    def publish(self, channel, message):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        try:
+            self._client.publish(self.prefix + channel, json.dumps(message))
+        except Exception:
+            # Live updates are best effort; the write itself has succeeded.
+            logger.exception('Could not publish to %s', channel)
+
+    def started(self):
+        self._listener = self.loop.create_task(self.listen())
+
+    async def listen(self):
+        import redis.asyncio as aioredis
+
+        while True:
+            try:
+                client = aioredis.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(self.prefix + '*')
+                    async for item in pubsub.listen():
+                        if item['type'] != 'pmessage':
+                            continue
+                        channel = item['channel'].decode()[len(self.prefix):]
+                        self.deliver(channel, json.loads(item['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Event broadcast listener failed, reconnecting')
+                await asyncio.sleep(1)
+
+
+_broadcast = None
+_broadcast_lock = threading.Lock()
+
+
+def get_broadcast():
+    """The process-wide broadcast configured by ``EVENT_BROADCAST_URL``."""
+    global _broadcast
+    if _broadcast is None:
+        with _broadcast_lock:
+            if _broadcast is None:
+                url = getattr(settings, 'EVENT_BROADCAST_URL', 'local')
+                if url.startswith(('redis://', 'rediss://', 'unix://')):
+                    _broadcast = RedisBroadcast(url)
+                else:
+                    _broadcast = LocalBroadcast()
+    return _broadcast
@@ -0,0 +1,205 @@
+"""
+Read replica routing with read-your-writes stickiness.
+
+``ReplicaRoutingMiddleware`` gives every request a ``ReadRoute``. Reads in
+safe-method requests go to one of the healthy ``DATABASE_REPLICAS``, chosen
+on the first query and kept for the rest of the request. Writes go to the
+primary, and so do the reads of unsafe requests and the reads of a request
+after its first write. Outside requests (management commands, background
+threads) the router stays out of the way and everything uses the primary.
+
+A request that wrote pins its client to the primary for
+``REPLICA_PIN_SECONDS``, so the client sees its own application, bookmark
+or job on the next read even while the replicas lag. A client is
+identified by its Authorization header or session cookie. The pins live
+in the shared cache so they hold across workers. Anonymous clients cannot
+write and are never pinned.
+
+Each process probes every replica at most every ``REPLICA_HEALTH_INTERVAL``
+seconds. A replica counts as down if it cannot be reached or, on
+PostgreSQL, if its replay lags more than ``REPLICA_MAX_LAG`` seconds.
+Replicas are skipped until their first probe succeeds, and reads fall
+back to the primary when none is healthy.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = DEFAULT_DB_ALIAS
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds the replica is behind. Zero when it has replayed everything it
+# received, so an idle primary does not look like lag.
+LAG_QUERIES = {
+    'postgresql': (
+        'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+    ),
+}
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+class ReplicaPool:
+    """Per-process health of the replicas."""
+
+    def __init__(self):
+        # alias -> (healthy, checked at)
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """A random healthy replica, or None."""
+        healthy = [alias for alias in replica_aliases() if self.is_healthy(alias)]
+        return random.choice(healthy) if healthy else None
+
+    def is_healthy(self, alias):
+        healthy, checked_at = self._health.get(alias, (False, None))
+        interval = getattr(settings, 'REPLICA_HEALTH_INTERVAL', 10)
+        if checked_at is not None and time.monotonic() - checked_at < interval:
+            return healthy
+        # One thread probes, the others go on with the last known state.
+        if not self._lock.acquire(blocking=False):
+            return healthy
+        try:
+            healthy = self.probe(alias)
+            self._health[alias] = (healthy, time.monotonic())
+        finally:
+            self._lock.release()
+        return healthy
+
+    def probe(self, alias):
+        try:
+            connection = connections[alias]
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_QUERIES.get(connection.vendor, 'SELECT 0'))
+                lag = cursor.fetchone()[0]
+        except Exception as exc:
+            logger.warning('Replica %s is unreachable: %s', alias, exc)
+            if alias in connections:
+                connections[alias].close()
+            return False
+        if lag is not None and float(lag) > getattr(settings, 'REPLICA_MAX_LAG', 5):
+            logger.warning('Replica %s is %.1fs behind', alias, float(lag))
+            return False
+        return True
+
+    def reset(self):
+        self._health.clear()
+
+
+replicas = ReplicaPool()
+
+
+class ReadRoute:
+    """Where the reads of one request go."""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+        self._alias = None
+
+    @property
+    def alias(self):
+        if not self.use_replica or self.wrote:
+            return PRIMARY
+        if self._alias is None:
+            self._alias = replicas.choose() or PRIMARY
+        return self._alias
+
+    @property
+    def used_replica(self):
+        """Whether any read of the request went to a replica."""
+        return self._alias not in (None, PRIMARY)
+
+
+current_route = ContextVar('db_read_route', default=None)
+
+
+class ReplicaRouter:
+    """Routes only inside requests; elsewhere Django's defaults apply."""
+
+    def db_for_read(self, model, **hints):
+        route = current_route.get()
+        if route is None:
+            return None
+        if model._meta.label_lower in getattr(settings, 'REPLICA_PRIMARY_MODELS', ()):
+            return PRIMARY
+        return route.alias
+
+    def db_for_write(self, model, **hints):
+        route = current_route.get()
+        if route is None:
+            return None
+        route.wrote = True
+        # Also for instances that were read from a replica.
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def pin_key(request):
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return 'db-pin:' + hashlib.sha256(credential.encode('utf-8')).hexdigest()[:32]
+
+
+class ReplicaRoutingMiddleware:
+    """Sets the request's ReadRoute and pins clients that wrote."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        key = pin_key(request)
+        pinned = key is not None and request.method in SAFE_METHODS and cache.get(key) is not None
+        route = ReadRoute(use_replica=request.method in SAFE_METHODS and not pinned)
+        token = current_route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_route.reset(token)
+        if route.wrote and key is not None:
+            cache.set(key, 1, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+        return response
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        key = pin_key(request)
+        pinned = key is not None and request.method in SAFE_METHODS and await cache.aget(key) is not None
+        route = ReadRoute(use_replica=request.method in SAFE_METHODS and not pinned)
+        token = current_route.set(route)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_route.reset(token)
+        if route.wrote and key is not None:
+            await cache.aset(key, 1, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+        return response
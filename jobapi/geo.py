@@ -0,0 +1,186 @@
+"""
+Offline geocoding and radius search helpers.
+
+Free-text locations such as "Berlin, Germany" or "Remote - NYC" are
+geocoded against a local gazetteer CSV (``GEO_GAZETTEER_PATH``; columns
+``name``, ``aliases``, ``country``, ``latitude``, ``longitude``) without any
+network access. The whole text is looked up first, then each comma, slash,
+dash or parenthesis separated part from left to right.
+
+Geocoded rows also store a ``geo_cell``: the id of the ``CELL_DEGREES``
+square grid cell holding the point. A radius query turns its bounding box
+into the few cells covering it, so the database answers it from an index
+on ``geo_cell`` and only computes exact haversine distances for the rows in
+those cells. Very large radii cover too many cells and fall back to a plain
+latitude/longitude range.
+"""
+import csv
+import math
+import re
+import unicodedata
+from functools import lru_cache
+
+import django_filters
+from django import forms
+from django.conf import settings
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+CELL_DEGREES = 0.25
+CELL_COLUMNS = int(360 / CELL_DEGREES)
+MAX_QUERY_CELLS = 400
+
+SPLIT_RE = re.compile(r'[,/;()|]|\s+-\s+')
+CLEAN_RE = re.compile(r'[^\w\s.\-]')
+SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_place(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return SPACE_RE.sub(' ', CLEAN_RE.sub(' ', text.lower())).strip(' .-')
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path=None):
+    """``{normalized name or alias: (latitude, longitude)}``, first entry wins."""
+    path = path or getattr(settings, 'GEO_GAZETTEER_PATH', None)
+    places = {}
+    if not path:
+        return places
+    with open(path, newline='', encoding='utf-8') as gazetteer:
+        for row in csv.DictReader(gazetteer):
+            point = (float(row['latitude']), float(row['longitude']))
+            for name in [row['name'], *(row.get('aliases') or '').split('|')]:
+                name = normalize_place(name)
+                if name:
+                    places.setdefault(name, point)
+    return places
+
+
+def geocode(location):
+    """``(latitude, longitude)`` of a free-text location, or None."""
+    places = load_gazetteer()
+    for part in [location or '', *SPLIT_RE.split((location or '').lower())]:
+        point = places.get(normalize_place(part))
+        if point is not None:
+            return point
+    return None
+
+
+def cell_of(latitude, longitude):
+    row = min(int((latitude + 90) // CELL_DEGREES), int(180 / CELL_DEGREES) - 1)
+    column = int((longitude + 180) // CELL_DEGREES) % CELL_COLUMNS
+    return row * CELL_COLUMNS + column
+
+
+def locate(location):
+    """``(latitude, longitude, geo_cell)``, all None when not geocodable."""
+    point = geocode(location)
+    if point is None:
+        return None, None, None
+    return point[0], point[1], cell_of(*point)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """``(min_lat, max_lat, min_lon, max_lon)``; longitudes may wrap past 180."""
+    delta_lat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if max_lat >= 90 or min_lat <= -90 or cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    delta_lon = radius_km / (KM_PER_DEGREE * cos_lat)
+    return min_lat, max_lat, longitude - delta_lon, longitude + delta_lon
+
+
+def _cell_columns(min_lon, max_lon):
+    if max_lon - min_lon >= 360:
+        return range(CELL_COLUMNS)
+    first = int((min_lon + 180) // CELL_DEGREES)
+    last = int((max_lon + 180) // CELL_DEGREES)
+    return sorted({column % CELL_COLUMNS for column in range(first, last + 1)})
+
+
+def cells_for_box(min_lat, max_lat, min_lon, max_lon):
+    """Grid cells covering the box, or None if there are too many."""
+    first_row = cell_of(min_lat, 0) // CELL_COLUMNS
+    last_row = cell_of(max_lat, 0) // CELL_COLUMNS
+    columns = _cell_columns(min_lon, max_lon)
+    if (last_row - first_row + 1) * len(columns) > MAX_QUERY_CELLS:
+        return None
+    return [row * CELL_COLUMNS + column for row in range(first_row, last_row + 1) for column in columns]
+
+
+def box_filter(latitude, longitude, radius_km, prefix=''):
+    """Index friendly Q for the rows that can be within ``radius_km``."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    cells = cells_for_box(min_lat, max_lat, min_lon, max_lon)
+    condition = Q(**{f'{prefix}latitude__gte': min_lat, f'{prefix}latitude__lte': max_lat})
+    if cells is not None:
+        condition &= Q(**{f'{prefix}geo_cell__in': cells})
+    elif max_lon - min_lon < 360:
+        if min_lon < -180:
+            condition &= Q(**{f'{prefix}longitude__gte': min_lon + 360}) | Q(**{f'{prefix}longitude__lte': max_lon})
+        elif max_lon > 180:
+            condition &= Q(**{f'{prefix}longitude__gte': min_lon}) | Q(**{f'{prefix}longitude__lte': max_lon - 360})
+        else:
+            condition &= Q(**{f'{prefix}longitude__gte': min_lon, f'{prefix}longitude__lte': max_lon})
+    return condition
+
+
+def distance_km(latitude, longitude, prefix=''):
+    """Haversine distance in km from the point to the row, as an expression."""
+    lat1 = math.radians(latitude)
+    lat2 = Radians(f'{prefix}latitude')
+    half_dlat = (lat2 - Value(lat1)) / 2
+    half_dlon = (Radians(f'{prefix}longitude') - Value(math.radians(longitude))) / 2
+    haversine = Power(Sin(half_dlat), 2) + Value(math.cos(lat1)) * Cos(lat2) * Power(Sin(half_dlon), 2)
+    # Rounding can push the argument of asin just past 1.
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(haversine), Value(1.0)), output_field=FloatField())
+
+
+class PointField(forms.CharField):
+    """``"lat,lon"`` as a ``(latitude, longitude)`` tuple."""
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if not value:
+            return None
+        try:
+            latitude, longitude = (float(part) for part in value.split(','))
+        except ValueError:
+            raise forms.ValidationError('Enter a point as "latitude,longitude".', code='invalid')
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise forms.ValidationError('Latitude or longitude out of range.', code='invalid')
+        return latitude, longitude
+
+
+class PointFilter(django_filters.Filter):
+    field_class = PointField
+
+
+class RadiusFilterSet(django_filters.FilterSet):
+    """
+    ``?near=lat,lon&radius_km=`` keeps the geocoded rows within the radius
+    (``GEO_DEFAULT_RADIUS_KM`` by default) and orders them nearest first.
+    The model needs ``latitude``, ``longitude`` and an indexed ``geo_cell``.
+    """
+    near = PointFilter(method='filter_near')
+    radius_km = django_filters.NumberFilter(method='filter_radius', min_value=0, max_value=20000)
+
+    def filter_radius(self, queryset, name, value):
+        # Only read by filter_near.
+        return queryset
+
+    def filter_near(self, queryset, name, value):
+        latitude, longitude = value
+        radius = self.form.cleaned_data.get('radius_km')
+        radius = float(radius if radius is not None else getattr(settings, 'GEO_DEFAULT_RADIUS_KM', 50))
+        return (
+            queryset.filter(box_filter(latitude, longitude, radius))
+            .annotate(distance_km=distance_km(latitude, longitude))
+            .filter(distance_km__lte=radius)
+            .order_by('distance_km', *queryset.query.order_by)
+        )
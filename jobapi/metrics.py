@@ -0,0 +1,274 @@
+"""
+Request metrics: per-route latency, DB query count/time and response size.
+
+``RequestMetricsMiddleware`` measures every request, adds a
+``Server-Timing`` header and records histograms in the process-wide
+``registry``. ``metrics_view`` serves them in the Prometheus text format.
+
+Gunicorn runs several worker processes, each with its own registry. When
+``METRICS_MULTIPROC_DIR`` is set every process periodically writes a
+snapshot file there and the metrics view sums all snapshot files, so a
+scrape sees the totals of every worker whichever one answers it. Point the
+directory at a fresh location on every deploy.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Wall time spent handling the request.', LATENCY_BUCKETS),
+    'http_request_db_duration_seconds': ('Time spent in database queries.', LATENCY_BUCKETS),
+    'http_request_db_queries': ('Number of database queries run.', QUERY_COUNT_BUCKETS),
+    'http_response_size_bytes': ('Size of the response body.', RESPONSE_SIZE_BUCKETS),
+}
+COUNTERS = {}
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """Thread-safe histograms and counters for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {name: {} for name in HISTOGRAMS}
+        self._counters = {}
+        self._last_flush = 0.0
+
+    def observe(self, name, value, **labels):
+        buckets = HISTOGRAMS[name][1]
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                # One slot per bucket, then sum and count.
+                series = self._histograms[name][key] = [0] * len(buckets) + [0.0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def inc(self, name, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'histograms': {name: {k: list(v) for k, v in series.items()}
+                               for name, series in self._histograms.items()},
+                'counters': {name: dict(series) for name, series in self._counters.items()},
+            }
+
+    def flush(self, force=False):
+        """Write this process's snapshot to the multiprocess directory."""
+        directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0):
+            return
+        self._last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp_path, path)
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush, force=True)
+
+
+def register_counter(name, documentation):
+    COUNTERS[name] = documentation
+
+
+def collect():
+    """Merged snapshot of every process (or just this one)."""
+    directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+    if not directory:
+        return registry.snapshot()
+
+    registry.flush(force=True)
+    merged = {'histograms': {name: {} for name in HISTOGRAMS}, 'counters': {}}
+    for filename in os.listdir(directory):
+        if not (filename.startswith('metrics_') and filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as fh:
+                snapshot = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for name, series in snapshot.get('histograms', {}).items():
+            target = merged['histograms'].setdefault(name, {})
+            for key, values in series.items():
+                if key in target:
+                    target[key] = [a + b for a, b in zip(target[key], values)]
+                else:
+                    target[key] = list(values)
+        for name, series in snapshot.get('counters', {}).items():
+            target = merged['counters'].setdefault(name, {})
+            for key, value in series.items():
+                target[key] = target.get(key, 0) + value
+    return merged
+
+
+def _format_labels(key, **extra):
+    pairs = [tuple(pair) for pair in json.loads(key)] + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus(snapshot):
+    lines = []
+    for name, (documentation, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} histogram')
+        for key, values in sorted(snapshot['histograms'].get(name, {}).items()):
+            for bound, count in zip(buckets, values):
+                lines.append(f'{name}_bucket{_format_labels(key, le=bound)} {count}')
+            lines.append(f'{name}_bucket{_format_labels(key, le="+Inf")} {values[-1]}')
+            lines.append(f'{name}_sum{_format_labels(key)} {values[-2]}')
+            lines.append(f'{name}_count{_format_labels(key)} {values[-1]}')
+    for name, series in sorted(snapshot['counters'].items()):
+        lines.append(f'# HELP {name} {COUNTERS.get(name, name)}')
+        lines.append(f'# TYPE {name} counter')
+        for key, value in sorted(series.items()):
+            lines.append(f'{name}{_format_labels(key)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires ``Authorization: Bearer
+    <METRICS_AUTH_TOKEN>`` when that setting is configured, a staff session
+    otherwise (or nothing in DEBUG).
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token:
+        allowed = request.headers.get('Authorization') == f'Bearer {token}'
+    else:
+        allowed = settings.DEBUG or request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class QueryTimer:
+    """Counts the queries and query time of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# The timer of the request being handled. Async views run their queries in
+# sync_to_async threads, which inherit this context but have their own
+# connections, so every connection gets the hook below instead of the
+# request wrapping the connections of its own thread.
+current_query_timer = ContextVar('current_query_timer', default=None)
+
+
+def timed_execute(execute, sql, params, many, context):
+    timer = current_query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
+
+
+connection_created.connect(install_query_timer, dispatch_uid='jobapi.metrics.install_query_timer')
+
+
+class RequestMetricsMiddleware:
+    """Times each request and records its DB usage per resolved route."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            # Connections opened before this module was imported.
+            install_query_timer(connection)
+        timer = QueryTimer()
+        token = current_query_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        return self.record(request, response, time.perf_counter() - start, timer)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = current_query_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        return self.record(request, response, time.perf_counter() - start, timer)
+
+    def record(self, request, response, duration, timer):
+        match = request.resolver_match
+        labels = {
+            'route': match.view_name if match else 'unmatched',
+            'method': request.method,
+        }
+        registry.observe('http_request_duration_seconds', duration, status=response.status_code, **labels)
+        registry.observe('http_request_db_duration_seconds', timer.duration, **labels)
+        registry.observe('http_request_db_queries', timer.count, **labels)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', len(response.content), **labels)
+        registry.flush()
+
+        response['Server-Timing'] = (
+            f'total;dur={duration * 1000:.1f}, '
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"'
+        )
+        return response
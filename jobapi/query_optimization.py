@@ -0,0 +1,121 @@
+"""
+Derive select_related/prefetch_related/only() from a serializer.
+
+``QueryOptimizationMixin`` walks the declared fields of the view's
+serializer class, follows each field's ``source`` through the model
+relations and applies the joins and column list the serializer will need.
+Lists then cost the same number of queries whatever the page size.
+
+Fields whose source cannot be traced to model fields (``SerializerMethodField``,
+``source='*'``, properties, methods) make the mixin load every column of
+the model they hang off, so they stay correct but gain nothing from
+``only()``. Prefer dotted sources such as ``source='company.name'``.
+"""
+from dataclasses import dataclass, field as dataclass_field
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import permissions, serializers
+
+
+@dataclass
+class QueryPlan:
+    select_related: set = dataclass_field(default_factory=set)
+    prefetch_related: set = dataclass_field(default_factory=set)
+    only: set = dataclass_field(default_factory=set)
+    # Relation paths ('' is the root model) whose every column is needed.
+    full: set = dataclass_field(default_factory=set)
+    models: dict = dataclass_field(default_factory=dict)
+
+    def only_fields(self):
+        fields = set(self.only)
+        for path in self.full:
+            prefix = f'{path}__' if path else ''
+            fields.update(
+                prefix + f.name for f in self.models[path]._meta.concrete_fields
+            )
+        return sorted(fields)
+
+
+def _join(path, name):
+    return f'{path}__{name}' if path else name
+
+
+def _walk_serializer(serializer, model, path, plan):
+    plan.models[path] = model
+    for serializer_field in serializer.fields.values():
+        if serializer_field.write_only:
+            continue
+        if serializer_field.source == '*':
+            if isinstance(serializer_field, serializers.BaseSerializer):
+                _walk_serializer(serializer_field, model, path, plan)
+            else:
+                plan.full.add(path)
+            continue
+        _walk_source(serializer_field, serializer_field.source_attrs, model, path, plan)
+
+
+def _walk_source(serializer_field, attrs, model, path, plan):
+    for index, attr in enumerate(attrs):
+        is_last = index == len(attrs) - 1
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # A property or method: whatever it reads must be loaded.
+            plan.full.add(path)
+            return
+
+        if not model_field.is_relation:
+            plan.only.add(_join(path, model_field.name))
+            return
+
+        if model_field.many_to_many or model_field.one_to_many:
+            plan.prefetch_related.add(_join(path, attr))
+            return
+
+        if model_field.concrete:
+            plan.only.add(_join(path, model_field.name))
+        if is_last and isinstance(serializer_field, serializers.RelatedField):
+            # Primary key style fields only need the foreign key column.
+            return
+
+        path = _join(path, attr)
+        model = model_field.related_model
+        plan.select_related.add(path)
+        plan.models[path] = model
+
+    if isinstance(serializer_field, serializers.ListSerializer):
+        return
+    if isinstance(serializer_field, serializers.BaseSerializer):
+        _walk_serializer(serializer_field, model, path, plan)
+    else:
+        plan.full.add(path)
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class, model):
+    plan = QueryPlan()
+    _walk_serializer(serializer_class(), model, '', plan)
+    return plan
+
+
+class QueryOptimizationMixin:
+    """
+    Viewset mixin applying the serializer's QueryPlan in ``filter_queryset``,
+    which both list and ``get_object`` go through. ``only()`` is limited to
+    safe methods so saves never run on partially loaded instances.
+    """
+
+    def optimize_queryset(self, queryset, serializer_class=None):
+        plan = get_query_plan(serializer_class or self.get_serializer_class(), queryset.model)
+        if plan.select_related:
+            queryset = queryset.select_related(*plan.select_related)
+        if plan.prefetch_related:
+            queryset = queryset.prefetch_related(*plan.prefetch_related)
+        only_fields = plan.only_fields()
+        if only_fields and self.request.method in permissions.SAFE_METHODS:
+            queryset = queryset.only(*only_fields)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        return self.optimize_queryset(super().filter_queryset(queryset))
@@ -0,0 +1,198 @@
+"""
+Shared response cache for the public read endpoints.
+
+Cached entries hold the serialized ``response.data`` of list and retrieve
+actions, keyed on the view, the URL kwargs and the normalized query string.
+Every key also embeds the current version of each namespace the view
+depends on. Writes bump the namespace version (see ``bump_namespace`` and
+the signal handlers in jobs/signals.py), which makes every older key
+unreachable at once without having to find and delete them.
+
+With read replicas, a miss right after a bump may read rows the replica has
+not replayed yet. Such a response is served but not stored, for
+``REPLICA_MAX_LAG`` seconds after the bump, so stale data never lands under
+the new version.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .db_router import current_route, replica_aliases
+
+
+KEY_PREFIX = 'response-cache'
+registered_views = set()
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:version:{namespace}'
+
+
+def _fresh_version():
+    # Time based so a version lost to eviction never restarts at a value
+    # that older cached entries were stored under.
+    return time.time_ns() // 1000
+
+
+def get_namespace_versions(namespaces):
+    cache = get_cache()
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _fresh_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+def _bumped_key(namespace):
+    return f'{KEY_PREFIX}:bumped:{namespace}'
+
+
+def bump_namespace(*namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), timeout=None)
+    if replica_aliases():
+        cache.set_many(
+            {_bumped_key(namespace): 1 for namespace in namespaces},
+            timeout=getattr(settings, 'REPLICA_MAX_LAG', 5),
+        )
+
+
+def may_be_stale(namespaces):
+    """Whether the current request read from a replica that may predate a recent bump."""
+    route = current_route.get()
+    if route is None or not route.used_replica:
+        return False
+    return bool(get_cache().get_many([_bumped_key(namespace) for namespace in namespaces]))
+
+
+def _incr_stat(name, outcome):
+    cache = get_cache()
+    key = f'{KEY_PREFIX}:stats:{name}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    """Hit and miss counts per cached view."""
+    cache = get_cache()
+    keys = {
+        (name, outcome): f'{KEY_PREFIX}:stats:{name}:{outcome}'
+        for name in registered_views
+        for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    stats = {}
+    for name in sorted(registered_views):
+        hits = values.get(keys[(name, 'hits')], 0)
+        misses = values.get(keys[(name, 'misses')], 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    """
+    Viewset mixin that caches the list and retrieve actions.
+
+    Only data that is the same for every caller is cached. Fields that depend
+    on the requesting user are listed in ``cache_personal_fields`` with their
+    anonymous value; they are reset before storing and recomputed for the
+    caller by ``get_personal_data`` on every response.
+    """
+    cache_name = None
+    cache_namespaces = ()
+    cache_actions = ('list', 'retrieve')
+    cache_personal_fields = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_name:
+            registered_views.add(cls.cache_name)
+
+    def get_cache_timeout(self):
+        return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60)
+
+    def get_cache_key(self, request):
+        query = sorted(
+            (key, values) for key, values in request.query_params.lists()
+            if any(value != '' for value in values)
+        )
+        raw = repr((
+            request.build_absolute_uri(request.path),
+            sorted(self.kwargs.items()),
+            query,
+            get_namespace_versions(self.cache_namespaces),
+        ))
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return f'{KEY_PREFIX}:{self.cache_name}:{self.action}:{digest}'
+
+    def get_personal_data(self, request, data):
+        """Values of ``cache_personal_fields`` for the requesting user."""
+        return {}
+
+    def finalize_cached_data(self, request, data):
+        if self.action != 'retrieve' or not self.cache_personal_fields:
+            return data
+        data = dict(data)
+        if request.user.is_authenticated:
+            data.update(self.get_personal_data(request, data))
+        return data
+
+    def is_cacheable(self, request):
+        return self.action in self.cache_actions and request.method in ('GET', 'HEAD')
+
+    def get_cached_response(self, request):
+        """``(key, response)`` for the request; the response is None on a miss."""
+        key = self.get_cache_key(request)
+        data = get_cache().get(key)
+        if data is None:
+            _incr_stat(self.cache_name, 'misses')
+            return key, None
+        _incr_stat(self.cache_name, 'hits')
+        response = Response(self.finalize_cached_data(request, data))
+        response['X-Cache'] = 'HIT'
+        return key, response
+
+    def store_cached_response(self, key, response):
+        if response.status_code == 200 and not may_be_stale(self.cache_namespaces):
+            shared = response.data
+            if self.action == 'retrieve' and self.cache_personal_fields:
+                shared = {**response.data, **self.cache_personal_fields}
+            get_cache().set(key, shared, self.get_cache_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def dispatch_cached(self, handler, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+        key, response = self.get_cached_response(request)
+        if response is None:
+            response = self.store_cached_response(key, handler(request, *args, **kwargs))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.dispatch_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.dispatch_cached(super().retrieve, request, *args, **kwargs)
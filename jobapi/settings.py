@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from datetime import timedelta
 import os
 import dj_database_url
 
@@ -67,8 +68,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'jobapi.metrics.RequestMetricsMiddleware',
+    'jobapi.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'jobapi.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,27 +99,84 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'jobapi.wsgi.application'
+ASGI_APPLICATION = 'jobapi.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 # Development database configuration (SQLite)
+# The "replica" alias is a second connection to the same file, so replica
+# routing can be tried locally with DATABASE_REPLICAS=replica. Tests get
+# their own empty database for it.
 if DEBUG:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
-        }
+        },
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        },
     }
+    DATABASE_REPLICAS = [alias for alias in os.environ.get('DATABASE_REPLICAS', '').split(',') if alias]
 # Production database configuration (PostgreSQL)
+# Under ASGI every request runs its sync code in a fresh thread, so
+# persistent connections would never be reused and only pile up. Keep
+# DB_CONN_MAX_AGE at 0 unless the app is served through WSGI.
 else:
     DATABASES = {
         'default': dj_database_url.config(
             default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600
+            conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 0))
         )
     }
+    DATABASE_REPLICAS = []
+    for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+        replica = dj_database_url.parse(url.strip(), conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 0)))
+        # Fail over quickly when a replica is unreachable.
+        replica.setdefault('OPTIONS', {}).setdefault('connect_timeout', 2)
+        DATABASES[f'replica_{index}'] = replica
+        DATABASE_REPLICAS.append(f'replica_{index}')
+
+# Read replicas (see jobapi/db_router.py). Reads in GET/HEAD/OPTIONS
+# requests go to a healthy replica from DATABASE_REPLICAS, everything else
+# to the primary. A client that wrote is pinned to the primary for
+# REPLICA_PIN_SECONDS. Replicas are probed every REPLICA_HEALTH_INTERVAL
+# seconds and skipped while unreachable or more than REPLICA_MAX_LAG
+# seconds behind. Models in REPLICA_PRIMARY_MODELS are always read from
+# the primary, so a new token or account is usable right after login.
+DATABASE_ROUTERS = ['jobapi.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+REPLICA_HEALTH_INTERVAL = 10
+REPLICA_MAX_LAG = 5
+REPLICA_PRIMARY_MODELS = ['authtoken.token', 'sessions.session', 'accounts.user']
+
+# Cache
+# A shared Redis cache is used when REDIS_URL is set so cached responses and
+# their version keys are shared across gunicorn workers.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a cached job/company response may live (see jobapi/response_cache.py).
+# Job and company writes invalidate immediately; counters such as
+# application_count can lag by up to this long.
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 60))
+# The employer dashboard is invalidated on every job and application change,
+# only its bookmark counts can lag by up to this long.
+DASHBOARD_CACHE_TIMEOUT = 300
 
 
 # Password validation
@@ -137,6 +197,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password checks and hashes run on a bounded per-process thread pool (see
+# accounts/hashing.py): PASSWORD_HASH_WORKERS threads, PASSWORD_HASH_QUEUE
+# more attempts may wait up to PASSWORD_HASH_TIMEOUT seconds, the rest get
+# a 503 right away.
+AUTHENTICATION_BACKENDS = ['accounts.backends.PooledHashingBackend']
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 8))
+PASSWORD_HASH_TIMEOUT = 5
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -169,7 +238,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.ExpiringTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -179,9 +248,102 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Token buckets for login and registration (see accounts/throttling.py):
+    # a burst of N attempts, then one every period / N.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_username': '10/min',
+        'register_ip': '10/hour',
+    },
+    # Reverse proxies in front of the app. The throttles key on the address
+    # the outermost of them saw, and with 0 on REMOTE_ADDR, ignoring the
+    # X-Forwarded-For header a client can set to anything.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
+# Request metrics (see jobapi/metrics.py). With several gunicorn workers set
+# METRICS_MULTIPROC_DIR to a writable directory shared by all of them.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')
+
+# API tokens expire this long after they were issued. Authenticated token
+# lookups are cached in-process for TOKEN_CACHE_TTL seconds.
+TOKEN_EXPIRE_AFTER = timedelta(days=int(os.environ.get('TOKEN_EXPIRE_DAYS', 7)))
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 60
+
+# Upper bound for ?count=approx on keyset-paginated lists when the database
+# has no planner estimate to offer (everything except PostgreSQL).
+PAGINATION_APPROX_COUNT_CAP = 10000
+
+# Full-text search backend for the job feed (see jobs/search.py).
+# 'auto' picks PostgreSQL tsvector or SQLite FTS5 from the database engine,
+# 'basic' keeps the plain icontains SearchFilter.
+JOB_SEARCH_BACKEND = os.environ.get('JOB_SEARCH_BACKEND', 'auto')
+
+# Skill-based recommendations (see jobs/text_index.py). Each process keeps
+# an in-memory TF-IDF matrix of active jobs and polls for changed jobs at
+# most every TEXT_INDEX_SYNC_INTERVAL seconds. The WSGI and ASGI entry points
+# build it in a background thread when TEXT_INDEX_BUILD_ON_START is set;
+# until then recommendations fall back to the latest jobs.
+TEXT_INDEX_BUILD_ON_START = True
+TEXT_INDEX_FEATURES = 2 ** 18
+TEXT_INDEX_MAX_TERMS = 64
+TEXT_INDEX_MERGE_ROWS = 5000
+TEXT_INDEX_SYNC_INTERVAL = 5.0
+TEXT_INDEX_SYNC_OVERLAP = 60
+
+# Similar jobs (see jobs/similarity.py): neighbors stored per job and shown
+# by the endpoint. refresh_similar_jobs --stale (run from cron) refreshes
+# every job saved since the last run. SIMILAR_JOBS_REFRESH_ON_SAVE has each
+# server process build the similarity index at startup and then refresh the
+# saved job itself after commit. It never syncs that index in the request.
+SIMILAR_JOBS_STORED = 20
+SIMILAR_JOBS_SHOWN = 10
+SIMILAR_JOBS_REFRESH_ON_SAVE = True
+
+# Bulk job import (see jobs/importers.py): rows validated and inserted per
+# transaction, and how many row errors the report lists before truncating.
+JOB_IMPORT_CHUNK_SIZE = 500
+JOB_IMPORT_MAX_ERRORS = 1000
+
+# Rows fetched per round trip by the streaming application export.
+EXPORT_CHUNK_SIZE = 2000
+
+# Applications scored per batch when ranking a job's applicants
+# (see jobs/ranking.py).
+RANKING_BATCH_SIZE = 500
+
+# Typeahead (see jobs/autocomplete.py): seconds between full rebuilds of the
+# in-memory indexes and the Cache-Control max-age of its responses. The WSGI
+# and ASGI entry points start the first build when AUTOCOMPLETE_BUILD_ON_START
+# is set; until it is done suggestions are empty.
+AUTOCOMPLETE_REBUILD_INTERVAL = 300
+AUTOCOMPLETE_MAX_AGE = 60
+AUTOCOMPLETE_BUILD_ON_START = True
+
+# Offline geocoding of job and company locations (see jobapi/geo.py) and
+# the radius used by ?near= when radius_km is not given.
+GEO_GAZETTEER_PATH = os.environ.get('GEO_GAZETTEER_PATH', str(BASE_DIR / 'jobapi' / 'data' / 'gazetteer.csv'))
+GEO_DEFAULT_RADIUS_KM = 50
+
+# Server-sent job events (see jobapi/broadcast.py and jobs/stream.py). Set
+# EVENT_BROADCAST_URL to a redis:// URL when running several ASGI workers;
+# "local" only reaches clients connected to the publishing process.
+EVENT_BROADCAST_URL = os.environ.get('EVENT_BROADCAST_URL', os.environ.get('REDIS_URL', 'local'))
+SSE_MAX_CONNECTIONS = 10000
+SSE_CLIENT_QUEUE_SIZE = 100
+SSE_KEEPALIVE = 15
+SSE_RETRY_MS = 5000
+
+# Saved-search alerts (see jobs/alerts.py): candidate searches read and
+# alerts inserted or delivered per batch.
+JOB_ALERTS_BATCH_SIZE = 1000
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'alerts@localhost')
+
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
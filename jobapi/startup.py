@@ -0,0 +1,21 @@
+"""
+Work the WSGI and ASGI entry points start in every server process.
+
+The in-memory indexes are built in background threads, off the request
+path. Until an index is ready the requests that use it fall back as their
+modules describe.
+"""
+from django.conf import settings
+
+
+def start_background_builds():
+    from jobs.autocomplete import autocomplete
+    from jobs.similarity import build_similarity_index_in_background
+    from jobs.text_index import build_in_background
+
+    if getattr(settings, 'TEXT_INDEX_BUILD_ON_START', True):
+        build_in_background()
+        if getattr(settings, 'SIMILAR_JOBS_REFRESH_ON_SAVE', True):
+            build_similarity_index_in_background()
+    if getattr(settings, 'AUTOCOMPLETE_BUILD_ON_START', True):
+        autocomplete.build_in_background()
@@ -0,0 +1,321 @@
+import json
+import os
+import re
+import tempfile
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.client import AsyncClientHandler
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from companies.models import Company
+from jobs.models import Bookmark, Job
+from .async_views import AsyncRouteMixin, async_variant
+from .db_router import replicas
+from .metrics import HISTOGRAMS, collect, registry, render_prometheus
+from .response_cache import bump_namespace, get_stats
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """The replica database is left empty, so a read shows where it went."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        replicas.reset()
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.job = Job.objects.create(
+            title='Job', company=company, description='d', requirements='r',
+            responsibilities='r', location='Berlin', posted_by=employer,
+        )
+        seeker = User.objects.create_user('seeker', password='pw')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=seeker).key}')
+
+    def job_ids(self, client):
+        # A fresh query string per call, so the response cache never answers.
+        self.reads = getattr(self, 'reads', 0) + 1
+        return [job['id'] for job in client.get(f'/api/jobs/?read={self.reads}').data['results']]
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertEqual(self.job_ids(self.client), [])
+
+    def test_client_that_wrote_reads_from_the_primary(self):
+        response = self.client.post(f'/api/bookmarks/toggle/{self.job.pk}/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.job_ids(self.client), [self.job.pk])
+        self.assertEqual(self.job_ids(APIClient(SERVER_NAME='localhost')), [])
+
+    @override_settings(DATABASE_REPLICAS=['missing'])
+    def test_unreachable_replica_is_skipped(self):
+        with self.assertLogs('jobapi.db_router', 'WARNING'):
+            self.assertEqual(self.job_ids(self.client), [self.job.pk])
+
+    def test_replica_reads_right_after_a_bump_are_not_cached(self):
+        anonymous = APIClient(SERVER_NAME='localhost')
+        bump_namespace('jobs')
+        self.assertEqual(anonymous.get('/api/jobs/')['X-Cache'], 'MISS')
+        self.assertEqual(anonymous.get('/api/jobs/')['X-Cache'], 'MISS')
+        # Once REPLICA_MAX_LAG has passed since the bump, replica reads are cached again.
+        cache.clear()
+        self.assertEqual(anonymous.get('/api/jobs/')['X-Cache'], 'MISS')
+        self.assertEqual(anonymous.get('/api/jobs/')['X-Cache'], 'HIT')
+
+    def test_primary_reads_right_after_a_bump_are_cached(self):
+        self.client.post(f'/api/bookmarks/toggle/{self.job.pk}/')
+        bump_namespace('jobs')
+        self.assertEqual(self.client.get(f'/api/jobs/{self.job.pk}/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(f'/api/jobs/{self.job.pk}/')['X-Cache'], 'HIT')
+
+
+class AsyncRoutingClientHandler(AsyncRouteMixin, AsyncClientHandler):
+    """The test client handler with the routing of JobAPIASGIHandler."""
+
+
+class AsyncReadParityTests(TestCase):
+    """The async read views must answer exactly like the sync ones."""
+
+    def setUp(self):
+        cache.clear()
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.companies = [
+            Company.objects.create(name=name, description='d', industry='Tech', location=location)
+            for name, location in (('Acme', 'Berlin'), ('Globex', 'Paris'))
+        ]
+        self.jobs = [
+            Job.objects.create(
+                title=f'Job {i}', company=self.companies[i % 2], description='d', requirements='r',
+                responsibilities='r', location='Berlin', posted_by=employer, skills_required='python',
+            )
+            for i in range(12)
+        ]
+        seeker = User.objects.create_user('seeker', password='pw')
+        Bookmark.objects.create(job=self.jobs[3], user=seeker)
+        self.token = Token.objects.create(user=seeker).key
+
+    def clients(self, authenticated):
+        # Both clients on the default testserver host, which AsyncClient cannot change.
+        sync_client = APIClient()
+        async_client = AsyncClient()
+        async_client.handler = AsyncRoutingClientHandler()
+        if authenticated:
+            sync_client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+            async_client.headers = {'Authorization': f'Token {self.token}'}
+        return sync_client, async_client
+
+    async def async_get(self, client, url):
+        return await client.get(url, headers=getattr(client, 'headers', None))
+
+    async def assertSameResponses(self, urls, authenticated=False, cached=False):
+        sync_client, async_client = self.clients(authenticated)
+        for url in urls:
+            with self.subTest(url=url, authenticated=authenticated, cached=cached):
+                self.assertIsNotNone(async_variant(resolve(url.split('?')[0]).func))
+                if not cached:
+                    await cache.aclear()
+                expected = await sync_to_async(sync_client.get)(url)
+                if not cached:
+                    await cache.aclear()
+                response = await self.async_get(async_client, url)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+                if cached:
+                    self.assertEqual(response['X-Cache'], 'HIT')
+
+    def urls(self):
+        return [
+            '/api/jobs/',
+            '/api/jobs/?page=2',
+            '/api/jobs/?page=9',
+            f'/api/jobs/?company={self.companies[0].pk}&ordering=-salary_min',
+            f'/api/jobs/{self.jobs[3].pk}/',
+            f'/api/jobs/{self.jobs[4].pk}/',
+            '/api/jobs/999999/',
+            '/api/companies/',
+            f'/api/companies/{self.companies[1].pk}/',
+            '/api/companies/999999/',
+        ]
+
+    async def test_same_bodies_uncached(self):
+        await self.assertSameResponses(self.urls())
+        await self.assertSameResponses(self.urls(), authenticated=True)
+
+    async def test_same_bodies_from_the_cache_with_personal_fields(self):
+        urls = [url for url in self.urls() if '999999' not in url and 'page=9' not in url]
+        await self.assertSameResponses(urls, authenticated=True, cached=True)
+        detail = await self.async_get(self.clients(True)[1], f'/api/jobs/{self.jobs[3].pk}/')
+        self.assertTrue(detail.json()['is_bookmarked'])
+        anonymous = await self.async_get(self.clients(False)[1], f'/api/jobs/{self.jobs[3].pk}/')
+        self.assertFalse(anonymous.json()['is_bookmarked'])
+
+    async def test_same_cursor_pages(self):
+        sync_client, _ = self.clients(False)
+        first = await sync_to_async(sync_client.get)('/api/jobs/?pagination=cursor')
+        following = urlsplit(first.json()['next'])
+        await self.assertSameResponses(['/api/jobs/?pagination=cursor', f'{following.path}?{following.query}'])
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.job = Job.objects.create(
+            title='Job', company=self.company, description='d', requirements='r',
+            responsibilities='r', location='Berlin', posted_by=employer,
+        )
+        self.seeker = User.objects.create_user('seeker', password='pw')
+        self.other = User.objects.create_user('other', password='pw')
+
+    def get(self, url, user=None):
+        client = APIClient(SERVER_NAME='localhost')
+        if user:
+            client.force_authenticate(user)
+        return client.get(url)
+
+    def test_hits_until_a_write_bumps_the_namespace(self):
+        self.assertEqual(self.get('/api/jobs/?job_type=&page=1')['X-Cache'], 'MISS')
+        # Empty parameters and parameter order do not change the key.
+        self.assertEqual(self.get('/api/jobs/?page=1')['X-Cache'], 'HIT')
+        self.job.title = 'Renamed'
+        self.job.save()
+        response = self.get('/api/jobs/?page=1')
+        self.assertEqual((response['X-Cache'], response.data['results'][0]['title']), ('MISS', 'Renamed'))
+
+    def test_company_writes_invalidate_job_responses(self):
+        url = f'/api/jobs/{self.job.pk}/'
+        self.get(url)
+        self.company.name = 'Globex'
+        self.company.save()
+        response = self.get(url)
+        self.assertEqual((response['X-Cache'], response.data['company']['name']), ('MISS', 'Globex'))
+        self.assertEqual(self.get('/api/companies/')['X-Cache'], 'MISS')
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            self.assertEqual(self.get('/api/jobs/999999/').status_code, 404)
+        self.assertEqual(get_stats()['jobs'], {'hits': 0, 'misses': 2, 'hit_ratio': 0.0})
+
+    def test_personal_fields_are_layered_on_the_shared_entry(self):
+        Bookmark.objects.create(job=self.job, user=self.seeker)
+        url = f'/api/jobs/{self.job.pk}/'
+        mine = self.get(url, self.seeker)
+        self.assertEqual((mine['X-Cache'], mine.data['is_bookmarked']), ('MISS', True))
+        for user in (self.other, None):
+            with self.subTest(user=user):
+                response = self.get(url, user)
+                self.assertEqual((response['X-Cache'], response.data['is_bookmarked']), ('HIT', False))
+        mine = self.get(url, self.seeker)
+        self.assertEqual((mine['X-Cache'], mine.data['is_bookmarked']), ('HIT', True))
+
+
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[0-9.]+;desc="(\d+) queries"')
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.client = APIClient(SERVER_NAME='localhost')
+
+    def timed_queries(self, response):
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[0-9.]+, ')
+        return int(SERVER_TIMING_QUERIES.search(response['Server-Timing']).group(1))
+
+    def test_server_timing_counts_the_queries_of_a_sync_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/companies/')
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(self.timed_queries(response), len(queries))
+
+    async def test_server_timing_counts_the_queries_of_an_async_request(self):
+        sync_count = self.timed_queries(await sync_to_async(self.client.get)('/api/companies/'))
+        await cache.aclear()
+        client = AsyncClient()
+        client.handler = AsyncRoutingClientHandler()
+        response = await client.get('/api/companies/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.timed_queries(response), sync_count)
+
+    def test_histograms_per_route(self):
+        def requests_counted():
+            series = registry.snapshot()['histograms']['http_request_db_queries']
+            key = json.dumps([['method', 'GET'], ['route', 'companies:company-list']])
+            return series.get(key, [0])[-1]
+
+        before = requests_counted()
+        self.client.get('/api/companies/')
+        self.assertEqual(requests_counted(), before + 1)
+        text = render_prometheus(collect())
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('http_request_db_queries_bucket{method="GET",route="companies:company-list",le="+Inf"}', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="companies:company-list",status="200"}', text)
+        self.assertIn('http_response_size_bytes_sum{method="GET",route="companies:company-list"}', text)
+
+    @override_settings(METRICS_AUTH_TOKEN='s3cret')
+    def test_bearer_token_when_configured(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        staff = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(METRICS_AUTH_TOKEN=None)
+    def test_staff_session_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.client.force_login(User.objects.create_user('seeker', password='pw'))
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.client.force_login(User.objects.create_user('admin', password='pw', is_staff=True))
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+    @override_settings(METRICS_AUTH_TOKEN=None, DEBUG=True)
+    def test_open_in_debug_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+
+class MultiprocessMetricsTests(TestCase):
+    def write(self, directory, name, content):
+        with open(os.path.join(directory, name), 'w') as fh:
+            fh.write(content if isinstance(content, str) else json.dumps(content))
+
+    def test_snapshot_files_are_summed_and_broken_ones_skipped(self):
+        key = json.dumps([['method', 'GET'], ['route', 'test:merge']])
+        buckets = len(HISTOGRAMS['http_request_db_queries'][1])
+        first = [1] * buckets + [3.0, 1]
+        second = [0] * (buckets - 1) + [2, 40.0, 2]
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            self.write(directory, 'metrics_101.json', {
+                'histograms': {'http_request_db_queries': {key: first}},
+                'counters': {'test_merge_total': {key: 2}},
+            })
+            self.write(directory, 'metrics_102.json', {
+                'histograms': {'http_request_db_queries': {key: second}},
+                'counters': {'test_merge_total': {key: 3}},
+            })
+            # Partly written, unreadable and unrelated files are skipped.
+            self.write(directory, 'metrics_103.json', '{"histograms": {"http_request_db_queries": {')
+            os.mkdir(os.path.join(directory, 'metrics_104.json'))
+            self.write(directory, 'metrics_105.json.tmp', {'counters': {'test_merge_total': {key: 100}}})
+            self.write(directory, 'other.json', {'counters': {'test_merge_total': {key: 100}}})
+
+            merged = collect()
+            self.assertTrue(os.path.exists(os.path.join(directory, f'metrics_{os.getpid()}.json')))
+
+        self.assertEqual(merged['counters']['test_merge_total'], {key: 5})
+        self.assertEqual(
+            merged['histograms']['http_request_db_queries'][key],
+            [1] * (buckets - 1) + [3, 43.0, 3],
+        )
+        self.assertIn('test_merge_total{method="GET",route="test:merge"} 5', render_prometheus(merged))
@@ -21,8 +21,10 @@ from django.conf.urls.static import static
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from .metrics import metrics_view
+from .response_cache import get_stats as get_response_cache_stats
 
 # Simple view function for the root URL
 def api_root(request):
@@ -102,11 +104,19 @@ def token_test(request):
             "auth_header_received": auth_header
         })
 
+# Response cache hit/miss counters
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    return Response(get_response_cache_stats())
+
 urlpatterns = [
     path('', api_root, name='api_root'),  # Root URL pattern
     path('test-post/', test_post, name='test_post'),  # Test POST endpoint
     path('api-test/', simple_test, name='simple_test'),  # Direct test endpoint
     path('token-test/', token_test, name='token_test'),  # Token validation test
+    path('api/cache-stats/', cache_stats, name='cache_stats'),  # Response cache statistics
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus metrics
     path('admin/', admin.site.urls),
     path('api/accounts/', include('accounts.urls')),
     path('api/companies/', include('companies.urls')),
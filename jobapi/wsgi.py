@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobapi.settings')
 
 application = get_wsgi_application()
+
+from jobapi.startup import start_background_builds  # noqa: E402
+
+start_background_builds()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job, JobApplication, Bookmark
+from .models import Job, JobApplication, Bookmark, JobAlert, SavedSearch, Skill, SkillAlias
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
@@ -22,3 +22,36 @@ class BookmarkAdmin(admin.ModelAdmin):
     list_display = ('job', 'user', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('job__title', 'user__username')
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'user', 'job_type', 'experience_level', 'location', 'keywords', 'is_active')
+    list_filter = ('is_active', 'job_type', 'experience_level')
+    search_fields = ('name', 'keywords', 'user__username')
+    raw_id_fields = ('user', 'company')
+
+
+@admin.register(JobAlert)
+class JobAlertAdmin(admin.ModelAdmin):
+    list_display = ('saved_search', 'job', 'created_at', 'delivered_at')
+    list_filter = ('delivered_at',)
+    raw_id_fields = ('saved_search', 'job')
+
+
+class SkillAliasInline(admin.TabularInline):
+    model = SkillAlias
+    extra = 1
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'verified')
+    list_filter = ('verified',)
+    search_fields = ('name', 'aliases__alias')
+    inlines = [SkillAliasInline]
+    actions = ['mark_verified']
+
+    @admin.action(description='Mark selected skills as verified')
+    def mark_verified(self, request, queryset):
+        queryset.update(verified=True)
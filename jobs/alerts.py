@@ -0,0 +1,191 @@
+"""
+Job alerts for saved searches.
+
+A saved search is a conjunction of predicates (job type, experience level,
+location words, company, salary range, keywords). Instead of testing a new
+job against every saved search, each search is indexed under a single
+``access_key``: its most selective predicate, e.g. ``kw:kubernetes`` or
+``company:12``. A job produces the keys of everything it offers (one per
+word of its search document, its company, location words, type and level,
+plus ``*``), so an indexed ``access_key IN (...)`` lookup returns only the
+searches that can possibly match. Type, level, company and salary are
+checked in the same query, the location and keyword words in Python, and
+the matches are queued as ``JobAlert`` rows in batches.
+
+Matching stays out of the request that creates a job: new jobs carry
+``alerts_pending`` and ``deliver_job_alerts`` matches them in batches with
+``queue_pending_alerts`` before it sends the queued alerts. The unique
+(saved search, job) pair makes a rerun after a crash harmless.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import mail
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job, JobAlert, SavedSearch
+from .search import tokenize_search_terms
+
+MATCH_ANY = '*'
+
+
+def _batch_size():
+    return getattr(settings, 'JOB_ALERTS_BATCH_SIZE', 1000)
+
+
+def _words(text):
+    return set(tokenize_search_terms([text or '']))
+
+
+def _rarest(words):
+    # Longer words tend to be rarer; ties are broken for a stable key.
+    return max(words, key=lambda word: (len(word), word))
+
+
+def access_key(search):
+    """The key ``search`` is indexed under, most selective predicate first."""
+    keywords = _words(search.keywords)
+    if keywords:
+        return f'kw:{_rarest(keywords)}'[:120]
+    if search.company_id:
+        return f'company:{search.company_id}'
+    location = _words(search.location)
+    if location:
+        return f'loc:{_rarest(location)}'[:120]
+    if search.experience_level:
+        return f'level:{search.experience_level}'
+    if search.job_type:
+        return f'type:{search.job_type}'
+    return MATCH_ANY
+
+
+def job_keys(job, document_words, location_words):
+    keys = {MATCH_ANY, f'company:{job.company_id}', f'level:{job.experience_level}', f'type:{job.job_type}'}
+    keys.update(f'kw:{word}'[:120] for word in document_words)
+    keys.update(f'loc:{word}'[:120] for word in location_words)
+    return sorted(keys)
+
+
+def _exact_predicates(job):
+    """The predicates the database can check next to the access key."""
+    offered_max = job.salary_max if job.salary_max is not None else job.salary_min
+    offered_min = job.salary_min if job.salary_min is not None else job.salary_max
+    salary_min = Q(salary_min__isnull=True)
+    salary_max = Q(salary_max__isnull=True)
+    if offered_max is not None:
+        salary_min |= Q(salary_min__lte=offered_max)
+    if offered_min is not None:
+        salary_max |= Q(salary_max__gte=offered_min)
+    return (
+        Q(job_type__in=['', job.job_type])
+        & Q(experience_level__in=['', job.experience_level])
+        & (Q(company__isnull=True) | Q(company=job.company_id))
+        & salary_min
+        & salary_max
+    )
+
+
+def matching_searches(job, using='default'):
+    """Ids of the active saved searches ``job`` matches."""
+    document_words = _words(job.search_document or job.build_search_document())
+    location_words = _words(job.location)
+    keys = job_keys(job, document_words, location_words)
+    max_params = connections[using].features.max_query_params or 10000
+    chunk = max(min(max_params - 20, 10000), 1)
+    predicates = _exact_predicates(job)
+    for start in range(0, len(keys), chunk):
+        candidates = (
+            SavedSearch.objects.using(using)
+            .filter(predicates, is_active=True, access_key__in=keys[start:start + chunk])
+            .values_list('id', 'location', 'keywords')
+        )
+        for search_id, location, keywords in candidates.iterator(chunk_size=_batch_size()):
+            if _words(location) <= location_words and _words(keywords) <= document_words:
+                yield search_id
+
+
+def queue_alerts(jobs, using='default'):
+    """Queue a ``JobAlert`` for every saved search each active job matches."""
+    batch_size = _batch_size()
+    queued = 0
+    for job in jobs:
+        if not job.is_active:
+            continue
+        batch = []
+        for search_id in matching_searches(job, using):
+            batch.append(JobAlert(saved_search_id=search_id, job_id=job.pk))
+            if len(batch) == batch_size:
+                JobAlert.objects.using(using).bulk_create(batch, ignore_conflicts=True)
+                queued += len(batch)
+                batch = []
+        JobAlert.objects.using(using).bulk_create(batch, ignore_conflicts=True)
+        queued += len(batch)
+    return queued
+
+
+def queue_pending_alerts(batch_size=None, using='default'):
+    """
+    Match the jobs still flagged ``alerts_pending`` and clear the flag.
+    Returns ``(jobs, alerts)`` processed and queued.
+    """
+    batch_size = batch_size or _batch_size()
+    pending = Job.objects.using(using).filter(alerts_pending=True).order_by('pk')
+    jobs = queued = 0
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return jobs, queued
+        queued += queue_alerts(batch, using)
+        # update() leaves updated_at alone, so the jobs do not look edited.
+        Job.objects.using(using).filter(pk__in=[job.pk for job in batch]).update(alerts_pending=False)
+        jobs += len(batch)
+        last_pk = batch[-1].pk
+
+
+def _alert_email(user, alerts):
+    lines = [
+        f"- {alert.job.title} at {alert.job.company.name} ({alert.job.location}), "
+        f"matching \"{alert.saved_search}\""
+        for alert in alerts
+    ]
+    return mail.EmailMessage(
+        subject=f"{len(alerts)} new job{'s' if len(alerts) != 1 else ''} for your saved searches",
+        body='\n'.join(lines),
+        to=[user.email],
+    )
+
+
+def deliver_alerts(batch_size=None, using='default'):
+    """
+    Send the queued alerts, one email per user and batch, and mark them
+    delivered. A batch that fails to send stays queued for the next run.
+    Returns ``(alerts, emails)`` delivered.
+    """
+    batch_size = batch_size or _batch_size()
+    pending = (
+        JobAlert.objects.using(using)
+        .filter(delivered_at__isnull=True)
+        .select_related('saved_search__user', 'job__company')
+        .order_by('pk')
+    )
+    connection = mail.get_connection()
+    delivered = emails = 0
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return delivered, emails
+        per_user = defaultdict(list)
+        for alert in batch:
+            per_user[alert.saved_search.user].append(alert)
+        messages = [_alert_email(user, alerts) for user, alerts in per_user.items() if user.email]
+        if messages:
+            emails += connection.send_messages(messages) or 0
+        JobAlert.objects.using(using).filter(pk__in=[alert.pk for alert in batch]).update(
+            delivered_at=timezone.now()
+        )
+        delivered += len(batch)
+        last_pk = batch[-1].pk
@@ -0,0 +1,319 @@
+"""
+Typeahead suggestions for job titles, company names and locations.
+
+Each kind of value lives in a ``PrefixIndex``: a sorted array of normalized
+suffixes with one suffix per word start, so "pyth" finds "Senior Python
+Developer" as well as "Python Developer". A lookup bisects to the prefix
+range and picks the heaviest values in it with ``argpartition``, the weight
+being the number of active jobs with that value. Values added since the
+last build go to a small sorted delta list next to the main arrays, and
+removed ones are masked with a negative weight. Results for prefixes of up
+to ``MEMO_PREFIX_LENGTH`` characters, whose ranges are the widest, are
+memoized until one of their values changes.
+
+Every process builds the indexes from the database in a background thread,
+started with the server (or by the first lookup), and lookups find nothing
+until it is done. The Job and Company signals keep them up to date, and
+every ``AUTOCOMPLETE_REBUILD_INTERVAL`` seconds (or once the delta grows
+past ``DELTA_LIMIT`` suffixes) the same thread rebuilds them, which folds
+the delta in and picks up the changes made by other processes and by
+queryset updates.
+"""
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from companies.models import Company
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+SPACE_RE = re.compile(r'\s+')
+WORD_START_RE = re.compile(r'(?<!\w)\w')
+MEMO_PREFIX_LENGTH = 3
+MAX_LIMIT = 20
+DELTA_LIMIT = 20000
+KINDS = ('title', 'company', 'location')
+# Sorts after any character, so prefix + PREFIX_END bounds the prefix range.
+PREFIX_END = chr(0x10FFFF)
+
+
+def normalize(text):
+    return SPACE_RE.sub(' ', text or '').strip().lower()
+
+
+def _suffixes(text):
+    """``(suffix, is whole text)`` for every word start of ``text``."""
+    return [(text[match.start():], match.start() == 0) for match in WORD_START_RE.finditer(text)]
+
+
+class PrefixIndex:
+    """Weighted prefix lookups over keys with display strings."""
+
+    def __init__(self, drop_empty=False):
+        # Whether keys whose weight drops to zero are removed.
+        self.drop_empty = drop_empty
+        self._lock = threading.Lock()
+        self.load(())
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def delta_size(self):
+        return len(self._delta)
+
+    def load(self, entries):
+        """Replace the contents with ``(key, display, weight)`` triples."""
+        slots, displays, texts, weights = {}, [], [], []
+        for key, display, weight in entries:
+            slot = slots.get(key)
+            if slot is not None:
+                weights[slot] += weight
+                continue
+            text = normalize(display)
+            if text:
+                slots[key] = len(displays)
+                displays.append(display)
+                texts.append(text)
+                weights.append(weight)
+
+        suffixes = sorted(
+            (suffix, whole, slot)
+            for slot, text in enumerate(texts)
+            for suffix, whole in _suffixes(text)
+        )
+        main_texts = [suffix for suffix, _, _ in suffixes]
+        main_slots = np.fromiter((slot for _, _, slot in suffixes), dtype=np.int64, count=len(suffixes))
+        main_whole = np.fromiter((whole for _, whole, _ in suffixes), dtype=bool, count=len(suffixes))
+        weight_array = np.zeros(max(len(weights) * 2, 16), dtype=np.int64)
+        weight_array[:len(weights)] = weights
+        with self._lock:
+            self._slots = slots
+            self._displays = displays
+            self._texts = texts
+            self._weights = weight_array
+            self._main_texts, self._main_slots, self._main_whole = main_texts, main_slots, main_whole
+            self._delta = []
+            self._memo = {}
+
+    def _forget(self, text):
+        for suffix, _ in _suffixes(text):
+            for length in range(1, min(len(suffix), MEMO_PREFIX_LENGTH) + 1):
+                self._memo.pop(suffix[:length], None)
+
+    def _add(self, key, display, text, weight):
+        slot = len(self._displays)
+        if slot == len(self._weights):
+            self._weights = np.concatenate([self._weights, np.zeros_like(self._weights)])
+        self._slots[key] = slot
+        self._displays.append(display)
+        self._texts.append(text)
+        self._weights[slot] = weight
+        for suffix, whole in _suffixes(text):
+            insort(self._delta, (suffix, whole, slot))
+        self._forget(text)
+
+    def _remove(self, key):
+        slot = self._slots.pop(key)
+        # Masked until the next build drops its suffixes.
+        self._weights[slot] = -1
+        self._forget(self._texts[slot])
+
+    def set(self, key, display, weight=None):
+        """Add or rename ``key``, keeping its weight unless one is given."""
+        text = normalize(display)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                if weight is None:
+                    weight = int(self._weights[slot])
+                if self._texts[slot] == text:
+                    self._displays[slot] = display
+                    self._weights[slot] = weight
+                    self._forget(text)
+                    return
+                self._remove(key)
+            if text:
+                self._add(key, display, text, weight or 0)
+
+    def add_weight(self, key, delta, display=None):
+        """Shift the weight of ``key``, adding it with ``display`` if unknown."""
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                text = normalize(display)
+                if delta > 0 and text:
+                    self._add(key, display, text, delta)
+                return
+            weight = max(int(self._weights[slot]) + delta, 0)
+            if self.drop_empty and not weight:
+                self._remove(key)
+            else:
+                self._weights[slot] = weight
+                self._forget(self._texts[slot])
+
+    def remove(self, key):
+        with self._lock:
+            if key in self._slots:
+                self._remove(key)
+
+    def lookup(self, prefix, limit=10):
+        """Display strings of the heaviest keys with a word starting with ``prefix``."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            memoize = len(prefix) <= MEMO_PREFIX_LENGTH
+            slots = self._memo.get(prefix) if memoize else None
+            if slots is None:
+                slots = self._top(prefix, MAX_LIMIT if memoize else limit)
+                if memoize:
+                    self._memo[prefix] = slots
+            return [self._displays[slot] for slot in slots[:limit]]
+
+    def _top(self, prefix, limit):
+        weights = self._weights
+        # Scores rank heavier values first, then values starting with the
+        # prefix; equal scores are ordered A-Z.
+        candidates = []
+
+        low = bisect_left(self._main_texts, prefix)
+        high = bisect_left(self._main_texts, prefix + PREFIX_END, low)
+        if high > low:
+            slots = self._main_slots[low:high]
+            scores = weights[slots] * 2 + self._main_whole[low:high]
+            # Over-fetch: a value can match through several of its words.
+            wanted = limit * 4
+            if len(scores) > wanted:
+                best = np.argpartition(-scores, wanted)[:wanted]
+                slots, scores = slots[best], scores[best]
+            candidates.extend(zip(scores.tolist(), slots.tolist()))
+
+        position = bisect_left(self._delta, (prefix,))
+        while position < len(self._delta) and self._delta[position][0].startswith(prefix):
+            _, whole, slot = self._delta[position]
+            candidates.append((int(weights[slot]) * 2 + whole, slot))
+            position += 1
+
+        ranked = sorted(
+            (-score, self._texts[slot], slot) for score, slot in candidates if score >= 0
+        )
+        top = []
+        for _, _, slot in ranked:
+            if slot not in top:
+                top.append(slot)
+                if len(top) == limit:
+                    break
+        return top
+
+
+class Autocomplete:
+    """The title, company and location indexes of one process."""
+
+    def __init__(self):
+        self.indexes = {
+            'title': PrefixIndex(drop_empty=True),
+            'company': PrefixIndex(),
+            'location': PrefixIndex(drop_empty=True),
+        }
+        self.built_at = None
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+
+    def build(self):
+        active = Job.objects.filter(is_active=True)
+        titles = active.values('title').annotate(count=Count('id')).values_list('title', 'count')
+        locations = active.values('location').annotate(count=Count('id')).values_list('location', 'count')
+        companies = Company.objects.values_list('id', 'name', 'active_job_count')
+        self.indexes['title'].load((normalize(title), title, count) for title, count in titles.iterator())
+        self.indexes['location'].load((normalize(location), location, count) for location, count in locations.iterator())
+        self.indexes['company'].load(companies.iterator())
+        self.built_at = time.monotonic()
+
+    def _stale(self):
+        interval = getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', 300)
+        return (
+            time.monotonic() - self.built_at >= interval
+            or any(index.delta_size > DELTA_LIMIT for index in self.indexes.values())
+        )
+
+    @property
+    def ready(self):
+        return self.built_at is not None
+
+    def build_in_background(self):
+        """Start a (re)build in a thread, unless one is running."""
+        with self._build_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name='autocomplete-rebuild', daemon=True).start()
+
+    def refresh(self):
+        """Build in the background if not built yet, rebuild there once stale."""
+        if self._rebuilding:
+            return
+        if not self.ready or self._stale():
+            self.build_in_background()
+
+    def _rebuild(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception('Autocomplete rebuild failed')
+            if self.ready:
+                # Retry after another interval rather than on every request.
+                self.built_at = time.monotonic()
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def lookup(self, prefix, kinds=KINDS, limit=10):
+        return {kind: self.indexes[kind].lookup(prefix, limit) for kind in kinds}
+
+    def job_changed(self, old, new):
+        """Apply a job moving from ``old`` to ``new`` ``(title, location, company_id, is_active)``."""
+        if self.built_at is None or old == new:
+            return
+        for state, delta in ((old, -1), (new, 1)):
+            if state is None or not state[3]:
+                continue
+            title, location, company_id, _ = state
+            self.indexes['title'].add_weight(normalize(title), delta, title)
+            self.indexes['location'].add_weight(normalize(location), delta, location)
+            self.indexes['company'].add_weight(company_id, delta)
+
+    def company_changed(self, company):
+        if self.built_at is not None:
+            self.indexes['company'].set(company.pk, company.name)
+
+    def company_removed(self, company_id):
+        if self.built_at is not None:
+            self.indexes['company'].remove(company_id)
+
+
+# The process-wide indexes. Signals update them in place and do nothing
+# until they are built.
+autocomplete = Autocomplete()
+
+
+def get_autocomplete():
+    """The process-wide indexes, which may not be ready yet."""
+    autocomplete.refresh()
+    return autocomplete
+
+
+def job_state(job):
+    """What a job contributes to the indexes, None if not fully loaded."""
+    fields = job.__dict__
+    if all(name in fields for name in ('title', 'location', 'company_id', 'is_active')):
+        return (job.title, job.location, job.company_id, job.is_active)
+    return None
@@ -0,0 +1,77 @@
+"""
+Denormalized counters on Job and Company.
+
+The signal handlers in jobs/signals.py keep the counters current with
+single-row ``UPDATE ... SET n = n + 1`` statements. Writes that bypass
+signals (``queryset.update()``, raw SQL, failed deploys) can let them
+drift, ``reconcile_counters`` recomputes them from the source tables.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def adjust_counter(model, pk, field, delta, using='default'):
+    """Atomically add ``delta`` to ``field`` without going below zero."""
+    if not pk or not delta:
+        return
+    queryset = model._default_manager.using(using).filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def count_subquery(model, fk, **filters):
+    """Correlated ``COUNT(*)`` of ``model`` rows pointing at the outer row."""
+    counts = (
+        model._default_manager.filter(**{fk: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(fk)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def job_counter_expressions():
+    from .models import Bookmark, JobApplication
+    return {
+        'application_count': count_subquery(JobApplication, 'job'),
+        'bookmark_count': count_subquery(Bookmark, 'job'),
+    }
+
+
+def company_counter_expressions():
+    from .models import Job
+    return {'active_job_count': count_subquery(Job, 'company', is_active=True)}
+
+
+def reconcile(queryset, expressions, batch_size=1000, dry_run=False):
+    """
+    Compare stored counters with freshly computed ones, walking ``queryset``
+    in primary key order. Returns the number of rows that had drifted.
+    """
+    fields = list(expressions)
+    actual = {f'actual_{field}': expression for field, expression in expressions.items()}
+    queryset = queryset.order_by('pk').only('pk', *fields).annotate(**actual)
+
+    drifted = 0
+    last_pk = None
+    while True:
+        batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            return drifted
+        stale = []
+        for obj in batch:
+            changed = False
+            for field in fields:
+                value = getattr(obj, f'actual_{field}')
+                if getattr(obj, field) != value:
+                    setattr(obj, field, value)
+                    changed = True
+            if changed:
+                stale.append(obj)
+        drifted += len(stale)
+        if stale and not dry_run:
+            queryset.model._default_manager.using(queryset.db).bulk_update(stale, fields)
+        last_pk = batch[-1].pk
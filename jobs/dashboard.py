@@ -0,0 +1,71 @@
+"""
+Per-employer application dashboard.
+
+Application counts per status, bookmark count and latest application time
+for every job of an employer come from one ``GROUP BY`` query. The result is
+cached under a per-employer namespace that jobs/signals.py bumps whenever
+one of the employer's jobs or applications changes.
+"""
+from django.conf import settings
+from django.db.models import Count, Max, Q
+
+from jobapi.response_cache import KEY_PREFIX, bump_namespace, get_cache, get_namespace_versions, may_be_stale
+from .models import Job, JobApplication
+
+STATUSES = [value for value, _ in JobApplication.STATUS_CHOICES]
+
+
+def dashboard_namespace(employer_id):
+    return f'dashboard:{employer_id}'
+
+
+def invalidate_dashboard(employer_id):
+    if employer_id:
+        bump_namespace(dashboard_namespace(employer_id))
+
+
+def build_dashboard(employer):
+    status_counts = {
+        f'count_{value}': Count('applications', filter=Q(applications__status=value))
+        for value in STATUSES
+    }
+    rows = (
+        Job.objects.filter(posted_by=employer)
+        .values('id', 'title', 'is_active', 'posted_at', 'bookmark_count')
+        .annotate(
+            total_applications=Count('applications'),
+            latest_application_at=Max('applications__applied_at'),
+            **status_counts,
+        )
+        .order_by('-posted_at', '-id')
+    )
+
+    jobs = []
+    totals = dict.fromkeys(STATUSES, 0)
+    for row in rows:
+        applications = {value: row.pop(f'count_{value}') for value in STATUSES}
+        for value, count in applications.items():
+            totals[value] += count
+        jobs.append({**row, 'applications': applications})
+    return {
+        'totals': {
+            'jobs': len(jobs),
+            'applications': sum(totals.values()),
+            'by_status': totals,
+            'bookmarks': sum(job['bookmark_count'] for job in jobs),
+        },
+        'jobs': jobs,
+    }
+
+
+def get_dashboard(employer):
+    cache = get_cache()
+    namespace = dashboard_namespace(employer.pk)
+    version, = get_namespace_versions([namespace])
+    key = f'{KEY_PREFIX}:dashboard:{employer.pk}:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = build_dashboard(employer)
+        if not may_be_stale([namespace]):
+            cache.set(key, data, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return data
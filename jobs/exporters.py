@@ -0,0 +1,98 @@
+"""
+Streaming CSV/NDJSON export of job applications.
+
+The rows come from one joined ``values_list`` query read through
+``.iterator(chunk_size=...)``, a server-side cursor on PostgreSQL, and are
+encoded one at a time into a ``StreamingHttpResponse``. Neither the
+queryset nor the response body is ever held in memory as a whole.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# (column name, queryset lookup)
+APPLICATION_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('job_id', 'job_id'),
+    ('job_title', 'job__title'),
+    ('company_name', 'job__company__name'),
+    ('applicant_id', 'applicant_id'),
+    ('applicant_username', 'applicant__username'),
+    ('applicant_first_name', 'applicant__first_name'),
+    ('applicant_last_name', 'applicant__last_name'),
+    ('applicant_email', 'applicant__email'),
+    ('status', 'status'),
+    ('applied_at', 'applied_at'),
+    ('updated_at', 'updated_at'),
+    ('resume', 'resume'),
+    ('cover_letter', 'cover_letter'),
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Spreadsheets run cells starting with these as formulas.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def _export_values(row):
+    values = []
+    for (name, _), value in zip(APPLICATION_EXPORT_COLUMNS, row):
+        if name == 'resume':
+            value = default_storage.url(value) if value else ''
+        elif hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        values.append(value)
+    return values
+
+
+def iter_application_rows(queryset, chunk_size=None):
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    lookups = [lookup for _, lookup in APPLICATION_EXPORT_COLUMNS]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield _export_values(row)
+
+
+def csv_cell(value):
+    """``value`` for a CSV cell, quoted with ``'`` if it could run as a formula."""
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in APPLICATION_EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow([csv_cell(value) for value in row])
+
+
+def iter_ndjson(rows):
+    names = [name for name, _ in APPLICATION_EXPORT_COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, row))) + '\n'
+
+
+def stream_applications(queryset, file_format, filename='applications'):
+    rows = iter_application_rows(queryset)
+    content = iter_csv(rows) if file_format == 'csv' else iter_ndjson(rows)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
@@ -0,0 +1,74 @@
+"""
+Facet counts for the job feed.
+
+Counts are computed over the feed queryset after the same filter and search
+backends the list uses. The closed choice facets (``job_type``,
+``experience_level``) and the salary buckets are conditional counts in one
+aggregate query; the open ``location`` and ``company`` facets take one
+``GROUP BY`` query each, limited to their most frequent values.
+"""
+from django.db.models import Count, Q
+
+from .models import Job
+
+# Salary buckets on salary_min, [lower, upper) with None meaning unbounded.
+SALARY_BUCKETS = (
+    (0, 30000),
+    (30000, 50000),
+    (50000, 75000),
+    (75000, 100000),
+    (100000, 150000),
+    (150000, None),
+)
+CHOICE_FACETS = {
+    'job_type': Job.JOB_TYPE_CHOICES,
+    'experience_level': Job.EXPERIENCE_LEVEL_CHOICES,
+}
+
+
+def _salary_label(lower, upper):
+    return f'{lower}+' if upper is None else f'{lower}-{upper}'
+
+
+def _salary_condition(lower, upper):
+    condition = Q(salary_min__gte=lower)
+    if upper is not None:
+        condition &= Q(salary_min__lt=upper)
+    return condition
+
+
+def compute_facets(queryset, limit=20):
+    queryset = queryset.order_by()
+
+    aggregates = {'total': Count('pk')}
+    for facet, choices in CHOICE_FACETS.items():
+        for index, (value, _) in enumerate(choices):
+            aggregates[f'{facet}_{index}'] = Count('pk', filter=Q(**{facet: value}))
+    for index, (lower, upper) in enumerate(SALARY_BUCKETS):
+        aggregates[f'salary_{index}'] = Count('pk', filter=_salary_condition(lower, upper))
+    aggregates['salary_unspecified'] = Count('pk', filter=Q(salary_min__isnull=True))
+    counts = queryset.aggregate(**aggregates)
+
+    facets = {}
+    for facet, choices in CHOICE_FACETS.items():
+        facets[facet] = [
+            {'value': value, 'label': label, 'count': counts[f'{facet}_{index}']}
+            for index, (value, label) in enumerate(choices)
+        ]
+    facets['location'] = [
+        {'value': row['location'], 'count': row['count']}
+        for row in queryset.values('location').annotate(count=Count('pk')).order_by('-count', 'location')[:limit]
+    ]
+    facets['company'] = [
+        {'value': row['company'], 'label': row['company__name'], 'count': row['count']}
+        for row in queryset.values('company', 'company__name').annotate(count=Count('pk'))
+        .order_by('-count', 'company__name')[:limit]
+    ]
+    facets['salary'] = [
+        {'value': _salary_label(lower, upper), 'min': lower, 'max': upper, 'count': counts[f'salary_{index}']}
+        for index, (lower, upper) in enumerate(SALARY_BUCKETS)
+    ]
+    facets['salary'].append({
+        'value': 'unspecified', 'min': None, 'max': None, 'count': counts['salary_unspecified'],
+    })
+    return {'count': counts['total'], 'facets': facets}
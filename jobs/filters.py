@@ -0,0 +1,59 @@
+import django_filters
+from django.db.models import Count
+
+from jobapi.geo import RadiusFilterSet
+from .models import Job, JobApplication
+from .skills import normalize_skill, resolve_skills
+
+
+class JobFilter(RadiusFilterSet):
+    """
+    ``?skills=python,django`` keeps jobs with all (``match=all``, the
+    default) or any (``match=any``) of the skills, aliases included.
+    ``match=any`` ignores names no job has ever listed.
+    ``?near=lat,lon&radius_km=`` is inherited from RadiusFilterSet.
+    """
+    skills = django_filters.CharFilter(method='filter_skills')
+    match = django_filters.ChoiceFilter(
+        choices=(('all', 'All'), ('any', 'Any')), method='filter_match', empty_label=None
+    )
+
+    class Meta:
+        model = Job
+        fields = ['job_type', 'experience_level', 'location', 'company']
+
+    def filter_match(self, queryset, name, value):
+        # Only read by filter_skills.
+        return queryset
+
+    def filter_skills(self, queryset, name, value):
+        names = {name for name in map(normalize_skill, value.split(',')) if name}
+        resolved = resolve_skills(names, create=False, using=queryset.db)
+        skill_ids = set(resolved.values())
+        if not skill_ids:
+            return queryset.none()
+
+        through = Job.normalized_skills.through.objects.filter(skill_id__in=skill_ids)
+        if self.form.cleaned_data.get('match') == 'any':
+            matching = through.values('job_id')
+        else:
+            if len(resolved) < len(names):
+                # No job has a skill nobody has listed.
+                return queryset.none()
+            matching = (
+                through.values('job_id')
+                .annotate(matched=Count('skill_id'))
+                .filter(matched=len(skill_ids))
+                .values('job_id')
+            )
+        return queryset.filter(pk__in=matching)
+
+
+class JobApplicationFilter(django_filters.FilterSet):
+    status = django_filters.MultipleChoiceFilter(choices=JobApplication.STATUS_CHOICES)
+    applied_after = django_filters.IsoDateTimeFilter(field_name='applied_at', lookup_expr='gte')
+    applied_before = django_filters.IsoDateTimeFilter(field_name='applied_at', lookup_expr='lt')
+
+    class Meta:
+        model = JobApplication
+        fields = ['job', 'status']
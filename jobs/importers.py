@@ -0,0 +1,245 @@
+"""
+Streaming bulk import of jobs from CSV or NDJSON.
+
+Rows are read one at a time from a text stream, validated with the Job
+field rules in chunks, and inserted with ``bulk_create`` one transaction per
+chunk. Only the current chunk and a capped list of row errors are kept in
+memory, so memory use does not grow with the size of the file.
+
+``bulk_create`` skips the model signals, so every inserted chunk is
+announced with ``jobs_bulk_created`` instead (see jobs/signals.py).
+"""
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+
+from companies.models import Company
+from .models import Job
+from .signals import jobs_bulk_created
+
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+
+class JobImportRowSerializer(serializers.ModelSerializer):
+    """Validates one imported row. The company is resolved separately."""
+    company = serializers.IntegerField(required=False, min_value=1)
+    company_name = serializers.CharField(required=False, max_length=100)
+
+    class Meta:
+        model = Job
+        fields = (
+            'title', 'company', 'company_name', 'description', 'requirements',
+            'responsibilities', 'location', 'salary_min', 'salary_max', 'job_type',
+            'experience_level', 'skills_required', 'deadline', 'is_active',
+        )
+
+    def validate(self, attrs):
+        if not attrs.get('company') and not attrs.get('company_name'):
+            raise serializers.ValidationError({'company': ['Provide a company id or company_name.']})
+        return attrs
+
+
+@dataclass
+class ImportReport:
+    max_errors: int
+    total: int = 0
+    created: int = 0
+    failed: int = 0
+    stopped_at: int = None
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'created': self.created,
+            'failed': self.failed,
+            'stopped_at': self.stopped_at,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+class RowParseError(Exception):
+    pass
+
+
+class FileParseError(RowParseError):
+    """The file cannot be read past ``line``, so the import stops there."""
+
+    def __init__(self, message, line):
+        super().__init__(message)
+        self.line = line
+
+
+def decode_lines(binary_stream, encoding):
+    """Decode a binary stream line by line, so a bad byte has a line number."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    line_number = 0
+    try:
+        for line_number, line in enumerate(binary_stream, start=1):
+            yield decoder.decode(line)
+        line_number += 1
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError as exc:
+        raise FileParseError(f'The file is not valid {encoding}: {exc.reason}.', line_number)
+
+
+def iter_csv_rows(lines):
+    reader = csv.DictReader(lines)
+    try:
+        for row in reader:
+            # Empty cells mean "not given" so model defaults apply.
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+    except csv.Error as exc:
+        # DictReader.line_num is only updated after a row parses.
+        line_number = reader.reader.line_num
+        yield line_number, FileParseError(f'Invalid CSV: {exc}.', line_number)
+    except FileParseError as exc:
+        yield exc.line, exc
+
+
+def iter_ndjson_rows(lines):
+    lines = enumerate(lines, start=1)
+    while True:
+        try:
+            line_number, line = next(lines)
+        except StopIteration:
+            return
+        except FileParseError as exc:
+            yield exc.line, exc
+            return
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, RowParseError(f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowParseError('Each line must be a JSON object.')
+            continue
+        yield line_number, row
+
+
+def guess_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+
+def iter_rows(binary_stream, file_format, encoding='utf-8'):
+    """Rows of ``(line_number, dict | RowParseError)`` from a binary stream."""
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f'Unsupported format {file_format!r}, use one of {", ".join(IMPORT_FORMATS)}')
+    lines = decode_lines(binary_stream, encoding)
+    if file_format == 'csv':
+        return iter_csv_rows(lines)
+    return iter_ndjson_rows(lines)
+
+
+class JobImporter:
+    """Validates and inserts rows for one employer, chunk by chunk."""
+
+    def __init__(self, posted_by, chunk_size=None, max_errors=None, using='default'):
+        self.posted_by = posted_by
+        self.chunk_size = chunk_size or getattr(settings, 'JOB_IMPORT_CHUNK_SIZE', 500)
+        self.using = using
+        if max_errors is None:
+            max_errors = getattr(settings, 'JOB_IMPORT_MAX_ERRORS', 1000)
+        self.report = ImportReport(max_errors=max_errors)
+        self._companies_by_id = {}
+        self._companies_by_name = {}
+
+    def run(self, rows):
+        chunk = []
+        for line_number, row in rows:
+            self.report.total += 1
+            if isinstance(row, FileParseError):
+                self.report.stopped_at = line_number
+            chunk.append((line_number, row))
+            if len(chunk) >= self.chunk_size:
+                self.process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.process_chunk(chunk)
+        return self.report
+
+    def process_chunk(self, chunk):
+        valid = []
+        for line_number, row in chunk:
+            if isinstance(row, RowParseError):
+                self.report.add_error(line_number, {'non_field_errors': [str(row)]})
+                continue
+            serializer = JobImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((line_number, serializer.validated_data))
+            else:
+                self.report.add_error(line_number, serializer.errors)
+
+        self.resolve_companies(data for _, data in valid)
+
+        jobs = []
+        for line_number, data in valid:
+            company = self.lookup_company(data)
+            if company is None:
+                self.report.add_error(line_number, {'company': ['Company not found.']})
+                continue
+            data = {key: value for key, value in data.items() if key not in ('company', 'company_name')}
+            job = Job(company=company, posted_by=self.posted_by, **data)
+            job.search_document = job.build_search_document()
+            job.set_coordinates()
+            jobs.append((line_number, job))
+        if not jobs:
+            return
+
+        try:
+            with transaction.atomic(using=self.using):
+                created = Job.objects.using(self.using).bulk_create([job for _, job in jobs])
+                jobs_bulk_created.send(sender=Job, jobs=created, using=self.using)
+        except DatabaseError as exc:
+            for line_number, _ in jobs:
+                self.report.add_error(line_number, {'non_field_errors': [f'Database error: {exc}']})
+            return
+        self.report.created += len(created)
+
+    def resolve_companies(self, rows):
+        """Load the companies a chunk refers to with at most two queries."""
+        ids, names = set(), set()
+        for data in rows:
+            if data.get('company'):
+                ids.add(data['company'])
+            elif data.get('company_name'):
+                names.add(data['company_name'])
+        ids -= self._companies_by_id.keys()
+        names -= self._companies_by_name.keys()
+
+        companies = Company.objects.using(self.using).only('id', 'name', 'latitude', 'longitude', 'geo_cell')
+        if ids:
+            found = {company.pk: company for company in companies.filter(pk__in=ids)}
+            for company_id in ids:
+                self._companies_by_id[company_id] = found.get(company_id)
+        if names:
+            found = {}
+            for company in companies.filter(name__in=names).order_by('pk'):
+                found.setdefault(company.name, company)
+            for name in names:
+                self._companies_by_name[name] = found.get(name)
+
+    def lookup_company(self, data):
+        if data.get('company'):
+            return self._companies_by_id.get(data['company'])
+        return self._companies_by_name.get(data['company_name'])
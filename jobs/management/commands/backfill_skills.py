@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+from jobs.skills import sync_skills
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Parses Job.skills_required and User.skills into normalized skills, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--only', choices=('jobs', 'users'), help='Backfill only jobs or only users')
+
+    def handle(self, *args, **options):
+        targets = [
+            ('jobs', Job.objects.only('id', 'skills_required'), 'skills_required'),
+            ('users', User.objects.only('id', 'skills').exclude(skills__isnull=True), 'skills'),
+        ]
+        for name, queryset, text_field in targets:
+            if options['only'] and options['only'] != name:
+                continue
+            total = self.backfill(queryset.order_by('pk'), text_field, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Backfilled skills of {total} {name}'))
+
+    def backfill(self, queryset, text_field, batch_size):
+        # Keyset over the primary key so each chunk is one indexed range scan.
+        total, last_pk = 0, 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return total
+            sync_skills(batch, text_field)
+            total += len(batch)
+            last_pk = batch[-1].pk
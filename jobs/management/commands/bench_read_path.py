@@ -0,0 +1,212 @@
+import asyncio
+import io
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from companies.models import Company
+from jobs.models import Job
+
+DEFAULT_PATHS = (
+    '/api/jobs/',
+    '/api/jobs/?pagination=cursor',
+    '/api/jobs/?job_type=full_time&ordering=-salary_min',
+    '/api/jobs/{job}/',
+    '/api/companies/',
+    '/api/companies/{company}/',
+)
+
+
+def wsgi_get(application, url):
+    path, _, query = url.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        for _ in body:
+            pass
+    finally:
+        # Sends request_finished, which closes the connection like a server would.
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_get(application, url):
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    finished = asyncio.Event()
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await application(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the concurrent read throughput of one WSGI worker (sync '
+        'views, one request at a time like a gunicorn sync worker) with one '
+        'ASGI worker (async read views, many requests on one event loop) on '
+        'the data already in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per path and application')
+        parser.add_argument('--workers', type=int, default=1, help='WSGI worker threads, one per sync worker')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight on the ASGI event loop')
+        parser.add_argument(
+            '--query-latency', type=float, default=0.0,
+            help='Milliseconds added to every query, to stand in for a database across the network',
+        )
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request, repeatable. '
+                            '{job} and {company} are replaced with random ids')
+        parser.add_argument('--cached', action='store_true', help='Let the response cache answer repeated requests')
+        parser.add_argument('--only', choices=('wsgi', 'asgi'), help='Run one application only')
+
+    def handle(self, *args, **options):
+        from jobapi.asgi import application as asgi_application
+        from jobapi.wsgi import application as wsgi_application
+
+        self.job_ids = list(Job.objects.filter(is_active=True).order_by('-posted_at').values_list('pk', flat=True)[:1000])
+        self.company_ids = list(Company.objects.order_by('pk').values_list('pk', flat=True)[:1000])
+        if not self.job_ids or not self.company_ids:
+            raise CommandError('Need active jobs and companies in the database, import or seed some first')
+        connections.close_all()
+
+        if options['query_latency']:
+            self.add_query_latency(options['query_latency'] / 1000)
+        self.cached = options['cached']
+        self.counter = 0
+
+        for path in options['paths'] or DEFAULT_PATHS:
+            results = []
+            if options['only'] != 'asgi':
+                urls = self.urls(path, options['requests'] + 1)
+                results.append(('wsgi', self.run_wsgi(wsgi_application, urls, options['workers'])))
+            if options['only'] != 'wsgi':
+                urls = self.urls(path, options['requests'] + 1)
+                results.append(('asgi', self.run_asgi(asgi_application, urls, options['concurrency'])))
+            self.stdout.write(path)
+            for name, (elapsed, latencies, errors) in results:
+                self.report(name, elapsed, latencies, errors)
+
+    def add_query_latency(self, seconds):
+        def delayed(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(connection, **kwargs):
+            if delayed not in connection.execute_wrappers:
+                connection.execute_wrappers.append(delayed)
+
+        connection_created.connect(install, weak=False)
+
+    def urls(self, path, count):
+        urls = []
+        for _ in range(count):
+            url = path.format(job=random.choice(self.job_ids), company=random.choice(self.company_ids))
+            if not self.cached:
+                # A parameter no filter reads, so every request misses the cache.
+                self.counter += 1
+                url += ('&' if urlsplit(url).query else '?') + f'bench={self.counter}'
+            urls.append(url)
+        return urls
+
+    def run_wsgi(self, application, urls, workers):
+        # The first URL warms up, the rest are timed.
+        wsgi_get(application, urls.pop(0))
+
+        def timed(url):
+            start = time.perf_counter()
+            status = wsgi_get(application, url)
+            return time.perf_counter() - start, status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(timed, urls))
+        return self.summarize(time.perf_counter() - start, outcomes)
+
+    def run_asgi(self, application, urls, concurrency):
+        async def run():
+            await asgi_get(application, urls.pop(0))
+            limit = asyncio.Semaphore(concurrency)
+
+            async def timed(url):
+                async with limit:
+                    start = time.perf_counter()
+                    status = await asgi_get(application, url)
+                    return time.perf_counter() - start, status
+
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(*(timed(url) for url in urls))
+            return self.summarize(time.perf_counter() - start, outcomes)
+
+        return asyncio.run(run())
+
+    def summarize(self, elapsed, outcomes):
+        latencies = sorted(latency for latency, _ in outcomes)
+        errors = sum(1 for _, status in outcomes if status != 200)
+        return elapsed, latencies, errors
+
+    def report(self, name, elapsed, latencies, errors):
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+        line = (
+            f'  {name}  {len(latencies) / elapsed:8.1f} req/s'
+            f'  p50 {statistics.median(latencies) * 1000:7.1f} ms'
+            f'  p95 {p95 * 1000:7.1f} ms'
+        )
+        if errors:
+            self.stdout.write(self.style.ERROR(f'{line}  {errors} errors'))
+        else:
+            self.stdout.write(line)
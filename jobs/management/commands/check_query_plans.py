@@ -0,0 +1,165 @@
+import random
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from companies.models import Company
+from companies.views import CompanyViewSet
+from jobs.models import Bookmark, Job, JobApplication
+from jobs.pagination import KeysetPagination
+from jobs.views import BookmarkViewSet, JobApplicationViewSet, JobViewSet, SavedSearchViewSet
+
+User = get_user_model()
+
+SQLITE_TABLE_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN on the querysets the viewsets build and fails when any '
+        'of them needs a sequential scan. Seeds a throwaway dataset that is '
+        'rolled back afterwards unless --no-seed is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=5000, help='Jobs to seed')
+        parser.add_argument('--no-seed', action='store_true', help='Use the data already in the database')
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            if options['no_seed']:
+                employer = User.objects.filter(user_type='employer').first()
+                seeker = User.objects.filter(user_type='job_seeker').first()
+                if employer is None or seeker is None:
+                    raise CommandError('Need at least one employer and one job seeker, or drop --no-seed')
+            else:
+                employer, seeker = self.seed(options['jobs'])
+            self.prepare_planner()
+
+            for name, queryset in self.scenarios(employer, seeker):
+                plan = queryset.explain()
+                scans = self.sequential_scans(plan)
+                if scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'SEQ SCAN  {name}: {", ".join(scans)}'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'ok        {name}'))
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{len(failures)} queryset(s) fall back to a sequential scan')
+
+    def prepare_planner(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            if connection.vendor == 'postgresql':
+                # Only report scans the planner cannot avoid with the indexes
+                # available, not ones it merely prefers on a small table.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def sequential_scans(self, plan):
+        if connection.vendor == 'sqlite':
+            return SQLITE_TABLE_SCAN.findall(plan)
+        if connection.vendor == 'postgresql':
+            return POSTGRES_SEQ_SCAN.findall(plan)
+        return []
+
+    def build_queryset(self, viewset_class, action, user=None, params=None):
+        view = viewset_class()
+        view.action = action
+        view.format_kwarg = None
+        view.kwargs = {}
+        view.request = Request(APIRequestFactory().get('/', params or {}))
+        view.request.user = user
+        view.request.method = 'GET'
+        return view, view.filter_queryset(view.get_queryset())
+
+    def keyset_page(self, queryset, page_size=10):
+        """The queryset of the second page in cursor mode."""
+        paginator = KeysetPagination()
+        paginator.terms = paginator.get_ordering_terms(queryset)
+        ordered = queryset.order_by(*(term.expression() for term in paginator.terms))
+        first_page = list(ordered[:page_size])
+        if not first_page:
+            return ordered[:page_size + 1]
+        position = [getattr(first_page[-1], term.attname) for term in paginator.terms]
+        return paginator.filter_after(ordered, position, reverse=False)[:page_size + 1]
+
+    def scenarios(self, employer, seeker):
+        from django.contrib.auth.models import AnonymousUser
+        anonymous = AnonymousUser()
+        job = Job.objects.filter(is_active=True).select_related('company').first()
+
+        _, feed = self.build_queryset(JobViewSet, 'list', anonymous)
+        yield 'job feed', feed[:10]
+        yield 'job feed, cursor page 2', self.keyset_page(feed)
+        filters = {
+            'job_type': job.job_type,
+            'experience_level': job.experience_level,
+            'location': job.location,
+            'company': job.company_id,
+        }
+        for field, value in filters.items():
+            _, queryset = self.build_queryset(JobViewSet, 'list', anonymous, {field: value})
+            yield f'job feed ?{field}=', queryset[:10]
+        for ordering in ('salary_min', '-salary_max', '-application_count', '-bookmark_count', '-popularity'):
+            _, queryset = self.build_queryset(JobViewSet, 'list', anonymous, {'ordering': ordering})
+            yield f'job feed ?ordering={ordering}', queryset[:10]
+
+        view, _ = self.build_queryset(JobViewSet, 'my_jobs', employer)
+        yield 'my_jobs', view.get_my_jobs_queryset()[:10]
+
+        _, queryset = self.build_queryset(JobApplicationViewSet, 'list', employer)
+        yield 'applications (employer)', queryset[:10]
+        _, queryset = self.build_queryset(JobApplicationViewSet, 'list', seeker)
+        yield 'applications (job seeker)', queryset[:10]
+        _, queryset = self.build_queryset(BookmarkViewSet, 'list', seeker)
+        yield 'bookmarks', queryset[:10]
+        _, queryset = self.build_queryset(SavedSearchViewSet, 'list', seeker)
+        yield 'saved searches', queryset[:10]
+        _, queryset = self.build_queryset(CompanyViewSet, 'list', anonymous, {'ordering': 'name'})
+        yield 'companies ?ordering=name', queryset[:10]
+
+    def seed(self, job_total):
+        rng = random.Random(0)
+        companies = Company.objects.bulk_create(
+            Company(name=f'Seed Company {i}', description='d', industry='Tech', location=f'City {i % 20}')
+            for i in range(max(job_total // 50, 10))
+        )
+        employers = User.objects.bulk_create(
+            User(username=f'seed-employer-{i}', user_type='employer', password='!')
+            for i in range(max(job_total // 100, 5))
+        )
+        seekers = User.objects.bulk_create(
+            User(username=f'seed-seeker-{i}', user_type='job_seeker', password='!')
+            for i in range(max(job_total // 10, 10))
+        )
+        jobs = Job.objects.bulk_create(
+            Job(
+                title=f'Seed Job {i}', company=rng.choice(companies), description='d',
+                requirements='r', responsibilities='r', location=f'City {rng.randrange(50)}',
+                salary_min=rng.choice([None, 40000, 60000, 80000]), salary_max=rng.choice([None, 90000, 120000]),
+                posted_by=rng.choice(employers),
+                job_type=rng.choice(Job.JOB_TYPE_CHOICES)[0],
+                experience_level=rng.choice(Job.EXPERIENCE_LEVEL_CHOICES)[0],
+                skills_required='python', is_active=rng.random() < 0.8,
+            )
+            for i in range(job_total)
+        )
+        JobApplication.objects.bulk_create(
+            (JobApplication(job=job, applicant=rng.choice(seekers)) for job in jobs for _ in range(3)),
+            ignore_conflicts=True,
+        )
+        Bookmark.objects.bulk_create(
+            (Bookmark(job=rng.choice(jobs), user=seeker) for seeker in seekers for _ in range(3)),
+            ignore_conflicts=True,
+        )
+        return rng.choice(employers), rng.choice(seekers)
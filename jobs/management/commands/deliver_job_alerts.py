@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.alerts import deliver_alerts, queue_pending_alerts
+
+
+class Command(BaseCommand):
+    help = 'Matches new jobs against the saved searches, then sends the queued alerts, one email per user and batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        jobs, queued = queue_pending_alerts(options['batch_size'])
+        self.stdout.write(f'Matched {jobs} new jobs, queued {queued} alerts in {time.monotonic() - start:.1f}s')
+        alerts, emails = deliver_alerts(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Delivered {alerts} alerts in {emails} emails in {time.monotonic() - start:.1f}s'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from companies.models import Company
+from jobs.models import Job
+
+COORDINATE_FIELDS = ['latitude', 'longitude', 'geo_cell']
+
+
+class Command(BaseCommand):
+    help = 'Geocodes company and job locations from the local gazetteer, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Companies first: jobs fall back to their company's coordinates.
+        targets = [
+            ('companies', Company.objects.only('id', 'location', *COORDINATE_FIELDS)),
+            ('jobs', Job.objects.select_related('company').only(
+                'id', 'location', *COORDINATE_FIELDS,
+                *(f'company__{name}' for name in ['id', *COORDINATE_FIELDS]),
+            )),
+        ]
+        for name, queryset in targets:
+            total, located = self.geocode(queryset.order_by('pk'), options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Geocoded {located} of {total} {name}'))
+
+    def geocode(self, queryset, batch_size):
+        # Keyset over the primary key so each chunk is one indexed range scan.
+        total = located = last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return total, located
+            for instance in batch:
+                instance.set_coordinates()
+                located += instance.latitude is not None
+            queryset.model.objects.bulk_update(batch, COORDINATE_FIELDS)
+            total += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,50 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.importers import IMPORT_FORMATS, JobImporter, guess_format, iter_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Imports jobs from a CSV or NDJSON file (use - for stdin) on behalf of an employer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--posted-by', required=True, help='Username of the employer posting the jobs')
+        parser.add_argument('--format', dest='file_format', choices=IMPORT_FORMATS)
+        parser.add_argument('--chunk-size', type=int, help='Rows per transaction')
+        parser.add_argument('--max-errors', type=int, help='Row errors to list before truncating the report')
+
+    def handle(self, *args, **options):
+        try:
+            employer = User.objects.get(username=options['posted_by'], user_type='employer')
+        except User.DoesNotExist:
+            raise CommandError(f"No employer named {options['posted_by']!r}")
+
+        path = options['path']
+        file_format = options['file_format'] or guess_format(path)
+        if file_format is None:
+            raise CommandError('Cannot tell the format from the file name, pass --format')
+
+        importer = JobImporter(employer, chunk_size=options['chunk_size'], max_errors=options['max_errors'])
+        if path == '-':
+            report = importer.run(iter_rows(sys.stdin.buffer, file_format))
+        else:
+            try:
+                with open(path, 'rb') as fh:
+                    report = importer.run(iter_rows(fh, file_format))
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        for error in report.errors:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... {report.failed - len(report.errors)} more row errors not shown')
+        style = self.style.SUCCESS if not report.failed else self.style.WARNING
+        self.stdout.write(style(
+            f'Imported {report.created} of {report.total} rows, {report.failed} failed'
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from jobs.models import Job
+from jobs.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Recreates the full-text search index and refreshes every job search document'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        batch_size = options['batch_size']
+        connection = connections[using]
+        backend = get_search_backend(using)
+        if backend is None:
+            raise CommandError('No search backend is configured for this database, nothing to rebuild')
+
+        with connection.schema_editor() as schema_editor:
+            backend.uninstall(schema_editor)
+            backend.install(schema_editor)
+
+        total = 0
+        jobs = Job.objects.using(using).select_related('company').order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(jobs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for job in batch:
+                job.search_document = job.build_search_document()
+            with transaction.atomic(using=using):
+                Job.objects.using(using).bulk_update(batch, ['search_document'])
+                backend.index(connection, ((job.pk, job.search_document) for job in batch))
+            last_pk = batch[-1].pk
+            total += len(batch)
+            self.stdout.write(f'Indexed {total} jobs')
+
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {total} jobs'))
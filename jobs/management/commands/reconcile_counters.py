@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from companies.models import Company
+from jobs.counters import company_counter_expressions, job_counter_expressions, reconcile
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized application, bookmark and active job counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted rows')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        jobs = reconcile(Job.objects.all(), job_counter_expressions(), batch_size, dry_run)
+        companies = reconcile(Company.objects.all(), company_counter_expressions(), batch_size, dry_run)
+
+        verb = 'Found' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} drifted counters on {jobs} jobs and {companies} companies'
+        ))
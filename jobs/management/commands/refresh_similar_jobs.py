@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from jobs.similarity import get_similarity_index, jobs_for_refresh, refresh_similar_jobs
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the precomputed similar jobs of every job, or only of changed ones with --stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale', action='store_true', help='Only jobs changed since their last refresh')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--job', type=int, action='append', dest='job_ids', help='Refresh this job id (repeatable)')
+
+    def handle(self, *args, **options):
+        jobs = jobs_for_refresh().order_by('pk')
+        if options['job_ids']:
+            jobs = jobs.filter(pk__in=options['job_ids'])
+        elif options['stale']:
+            jobs = jobs.filter(Q(similar_computed_at__isnull=True) | Q(similar_computed_at__lt=F('updated_at')))
+        else:
+            jobs = jobs.filter(is_active=True)
+
+        start = time.monotonic()
+        index = get_similarity_index()
+        self.stdout.write(f'Similarity index ready in {time.monotonic() - start:.1f}s')
+
+        batch_size = options['batch_size']
+        refreshed = rows = 0
+        batch = []
+        for job in jobs.iterator(chunk_size=batch_size):
+            batch.append(job)
+            if len(batch) == batch_size:
+                rows += len(refresh_similar_jobs(batch, index))
+                refreshed += len(batch)
+                batch = []
+        rows += len(refresh_similar_jobs(batch, index))
+        refreshed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {refreshed} jobs ({rows} neighbor rows) in {time.monotonic() - start:.1f}s'
+        ))
@@ -0,0 +1,92 @@
+# Generated by Django 5.2 on 2026-10-17 05:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of what jobs/search.py did when this migration was written,
+# so later changes there cannot change what it does. Custom backends
+# (a dotted JOB_SEARCH_BACKEND) are set up by rebuild_search_index.
+BATCH_SIZE = 500
+SQLITE_FTS_TABLE = 'jobs_job_fts'
+POSTGRES_GIN_INDEX = 'jobs_job_search_gin'
+
+
+def compose_search_document(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def search_vendor(connection):
+    """The built-in backend for this database, or None."""
+    name = getattr(settings, 'JOB_SEARCH_BACKEND', 'auto')
+    vendors = {'auto': connection.vendor, 'postgres': 'postgresql', 'sqlite': 'sqlite'}
+    vendor = vendors.get(name)
+    if vendor == connection.vendor and vendor in ('postgresql', 'sqlite'):
+        return vendor
+    return None
+
+
+def postgres_gin_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(SearchVector('search_document', config='english'), name=POSTGRES_GIN_INDEX)
+
+
+def build_search_index(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    connection = schema_editor.connection
+    vendor = search_vendor(connection)
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} "
+            f"USING fts5(search_document, tokenize='porter unicode61')"
+        )
+    elif vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Job._meta.db_table)
+        if POSTGRES_GIN_INDEX not in constraints:
+            schema_editor.add_index(Job, postgres_gin_index())
+
+    def flush(batch):
+        Job.objects.using(connection.alias).bulk_update(batch, ['search_document'])
+        if vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT OR REPLACE INTO {SQLITE_FTS_TABLE} (rowid, search_document) VALUES (%s, %s)',
+                    [(job.pk, job.search_document) for job in batch],
+                )
+
+    batch = []
+    for job in Job.objects.using(connection.alias).select_related('company').iterator(chunk_size=BATCH_SIZE):
+        job.search_document = compose_search_document(
+            job.title, job.company.name, job.skills_required, job.description
+        )
+        batch.append(job)
+        if len(batch) == BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = search_vendor(schema_editor.connection)
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(POSTGRES_GIN_INDEX)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-17 05:52
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, fk, **filters):
+    # A frozen copy of jobs.counters.count_subquery.
+    counts = (
+        model._default_manager.filter(**{fk: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(fk)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def populate_counters(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    Bookmark = apps.get_model('jobs', 'Bookmark')
+    Company = apps.get_model('companies', 'Company')
+    using = schema_editor.connection.alias
+    Job.objects.using(using).update(
+        application_count=count_subquery(JobApplication, 'job'),
+        bookmark_count=count_subquery(Bookmark, 'job'),
+    )
+    Company.objects.using(using).update(
+        active_job_count=count_subquery(Job, 'company', is_active=True),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_active_job_count'),
+        ('jobs', '0002_job_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='application_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='bookmark_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
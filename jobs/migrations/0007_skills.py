@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-17 06:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# canonical skill: aliases
+SEED_ALIASES = {
+    'javascript': ['js', 'ecmascript', 'es6'],
+    'typescript': ['ts'],
+    'python': ['python3', 'python 3'],
+    'postgresql': ['postgres', 'psql'],
+    'go': ['golang'],
+    'kubernetes': ['k8s'],
+    'react': ['reactjs', 'react.js'],
+    'node.js': ['node', 'nodejs'],
+    'vue': ['vuejs', 'vue.js'],
+    'django': ['django framework'],
+    'django rest framework': ['drf'],
+    'amazon web services': ['aws'],
+    'google cloud platform': ['gcp'],
+    'machine learning': ['ml'],
+    'c#': ['csharp', 'c sharp'],
+    'c++': ['cpp'],
+    'continuous integration': ['ci', 'ci/cd'],
+}
+
+
+def seed_aliases(apps, schema_editor):
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    using = schema_editor.connection.alias
+    for name, aliases in SEED_ALIASES.items():
+        skill, _ = Skill.objects.using(using).get_or_create(name=name)
+        SkillAlias.objects.using(using).bulk_create(
+            [SkillAlias(alias=alias, skill=skill) for alias in aliases], ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_similar_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='normalized_skills',
+            field=models.ManyToManyField(blank=True, related_name='jobs', to='jobs.skill'),
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=50, unique=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='jobs.skill')),
+            ],
+            options={
+                'verbose_name_plural': 'skill aliases',
+            },
+        ),
+        migrations.RunPython(seed_aliases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 07:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_company_coordinates'),
+        ('jobs', '0010_job_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Existing jobs had their alerts queued when they were created.
+        migrations.AddField(
+            model_name='job',
+            name='alerts_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='alerts_pending',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('alerts_pending', True)), fields=['id'], name='job_alerts_pending_idx'),
+        ),
+    ]
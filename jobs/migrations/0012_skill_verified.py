@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 07:38
+
+from django.db import migrations, models
+
+
+def verify_seeded_skills(apps, schema_editor):
+    # The skills seeded with aliases in 0007 are the curated ones; every
+    # other existing skill was created from parsed free text.
+    Skill = apps.get_model('jobs', 'Skill')
+    using = schema_editor.connection.alias
+    Skill.objects.using(using).filter(aliases__isnull=False).update(verified=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_alerts_pending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='verified',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(verify_seeded_skills, migrations.RunPython.noop),
+    ]
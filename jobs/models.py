@@ -1,5 +1,31 @@
 from django.db import models
+from django.db.models import F, Q
 from django.conf import settings
+from jobapi.geo import locate
+from .search import compose_search_document
+
+
+class Skill(models.Model):
+    """A normalized skill name, see jobs/skills.py."""
+    name = models.CharField(max_length=50, unique=True)
+    # Parsed names nobody has reviewed yet are unverified. Only the admin
+    # reads the flag, to review them.
+    verified = models.BooleanField(default=False)
+
+    def __str__(self):
+        return self.name
+
+
+class SkillAlias(models.Model):
+    """Another spelling of a skill, e.g. "js" for "javascript"."""
+    alias = models.CharField(max_length=50, unique=True)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        verbose_name_plural = 'skill aliases'
+
+    def __str__(self):
+        return f"{self.alias} -> {self.skill.name}"
 
 
 class Job(models.Model):
@@ -30,13 +56,73 @@ class Job(models.Model):
     job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES, default='full_time')
     experience_level = models.CharField(max_length=20, choices=EXPERIENCE_LEVEL_CHOICES, default='entry')
     skills_required = models.TextField()
+    # Parsed from skills_required by the signals in jobs/signals.py
+    normalized_skills = models.ManyToManyField(Skill, blank=True, related_name='jobs')
     is_active = models.BooleanField(default=True)
     posted_at = models.DateTimeField(auto_now_add=True)
     deadline = models.DateTimeField(blank=True, null=True)
+    # Geocoded from location (or the company's) on save, see jobapi/geo.py
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
+    geo_cell = models.IntegerField(blank=True, null=True, editable=False)
+    # Watermark for the incremental refresh of jobs/text_index.py
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # When the SimilarJob rows of this job were last computed, see jobs/similarity.py
+    similar_computed_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # Denormalized text that backs full-text search, see jobs/search.py
+    search_document = models.TextField(blank=True, default='', editable=False)
+    # Maintained by the signals in jobs/signals.py, repaired by reconcile_counters
+    application_count = models.PositiveIntegerField(default=0, editable=False)
+    bookmark_count = models.PositiveIntegerField(default=0, editable=False)
+    # Set on every new job until deliver_job_alerts has matched it against
+    # the saved searches, see jobs/alerts.py
+    alerts_pending = models.BooleanField(default=True, editable=False)
+    
+    class Meta:
+        # Shaped after the feed queries: active jobs only, newest first with
+        # id as the keyset tiebreaker, optionally narrowed by one filter.
+        indexes = [
+            models.Index(fields=['-posted_at', '-id'], condition=Q(is_active=True), name='job_active_feed_idx'),
+            models.Index(fields=['job_type', '-posted_at', '-id'], condition=Q(is_active=True), name='job_active_type_idx'),
+            models.Index(fields=['experience_level', '-posted_at', '-id'], condition=Q(is_active=True), name='job_active_level_idx'),
+            models.Index(fields=['location', '-posted_at', '-id'], condition=Q(is_active=True), name='job_active_location_idx'),
+            models.Index(fields=['company', '-posted_at', '-id'], condition=Q(is_active=True), name='job_active_company_idx'),
+            models.Index(fields=['salary_min', 'id'], condition=Q(is_active=True), name='job_active_salary_min_idx'),
+            models.Index(fields=['salary_max', 'id'], condition=Q(is_active=True), name='job_active_salary_max_idx'),
+            models.Index(fields=['-application_count', '-id'], condition=Q(is_active=True), name='job_active_apps_idx'),
+            models.Index(fields=['-bookmark_count', '-id'], condition=Q(is_active=True), name='job_active_bookmarks_idx'),
+            models.Index(
+                (F('application_count') + F('bookmark_count')).desc(), F('id').desc(),
+                condition=Q(is_active=True), name='job_active_popularity_idx',
+            ),
+            models.Index(fields=['posted_by', '-posted_at', '-id'], name='job_poster_posted_idx'),
+            models.Index(fields=['geo_cell'], condition=Q(is_active=True), name='job_active_geo_cell_idx'),
+            models.Index(fields=['id'], condition=Q(alerts_pending=True), name='job_alerts_pending_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.company.name}"
 
+    def build_search_document(self):
+        return compose_search_document(
+            self.title, self.company.name, self.skills_required, self.description
+        )
+
+    def set_coordinates(self):
+        self.latitude, self.longitude, self.geo_cell = locate(self.location)
+        if self.latitude is None and self.company.latitude is not None:
+            self.latitude, self.longitude, self.geo_cell = (
+                self.company.latitude, self.company.longitude, self.company.geo_cell
+            )
+
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        self.set_coordinates()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_document', 'latitude', 'longitude', 'geo_cell'}
+        super().save(*args, **kwargs)
+
 
 class JobApplication(models.Model):
     STATUS_CHOICES = (
@@ -54,14 +140,35 @@ class JobApplication(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     applied_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Cached skill match against the job, see jobs/ranking.py. NULL until scored.
+    match_score = models.FloatField(blank=True, null=True, editable=False)
     
     class Meta:
         unique_together = ('job', 'applicant')
+        indexes = [
+            models.Index(fields=['job', '-match_score', '-id'], name='application_job_score_idx'),
+            models.Index(fields=['job', '-applied_at', '-id'], name='application_job_applied_idx'),
+            models.Index(fields=['applicant', '-applied_at', '-id'], name='application_applicant_idx'),
+        ]
     
     def __str__(self):
         return f"{self.applicant.username} applied for {self.job.title}"
 
 
+class SimilarJob(models.Model):
+    """Precomputed nearest neighbor of a job, ``rank`` 0 being the closest."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('job', 'rank')
+
+    def __str__(self):
+        return f"{self.similar_id} is #{self.rank + 1} similar to {self.job_id}"
+
+
 class Bookmark(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='bookmarks')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bookmarks')
@@ -69,6 +176,57 @@ class Bookmark(models.Model):
     
     class Meta:
         unique_together = ('job', 'user')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='bookmark_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} bookmarked {self.job.title}"
+
+
+class SavedSearch(models.Model):
+    """
+    A job seeker's alert criteria; blank criteria match anything. New jobs
+    are matched against it by jobs/alerts.py.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    job_type = models.CharField(max_length=20, choices=Job.JOB_TYPE_CHOICES, blank=True)
+    experience_level = models.CharField(max_length=20, choices=Job.EXPERIENCE_LEVEL_CHOICES, blank=True)
+    location = models.CharField(max_length=100, blank=True)
+    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, blank=True, null=True, related_name='+')
+    salary_min = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    salary_max = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    keywords = models.CharField(max_length=200, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # The most selective predicate, set by the signals in jobs/signals.py.
+    # Jobs only look up the searches whose access key they produce.
+    access_key = models.CharField(max_length=120, editable=False, default='*')
+
+    class Meta:
+        verbose_name_plural = 'saved searches'
+        indexes = [
+            models.Index(fields=['access_key', 'id'], condition=Q(is_active=True), name='saved_search_access_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='saved_search_user_idx'),
+        ]
+
+    def __str__(self):
+        return self.name or f"Saved search {self.pk}"
+
+
+class JobAlert(models.Model):
+    """A job matching a saved search, queued until ``delivered_at`` is set."""
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='alerts')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('saved_search', 'job')
+        indexes = [
+            models.Index(fields=['id'], condition=Q(delivered_at__isnull=True), name='job_alert_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} matches saved search {self.saved_search_id}"
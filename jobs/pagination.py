@@ -0,0 +1,309 @@
+"""
+Pagination for the job feed and the per-user application/bookmark lists.
+
+Page numbers stay the default so existing clients keep working. Passing
+``?pagination=cursor`` (or following a ``cursor`` link) switches to keyset
+pagination: each page is fetched with a ``WHERE (posted_at, id) < (...)``
+style condition on the current ordering instead of ``OFFSET``, so deep
+pages cost the same as the first one and no ``COUNT(*)`` is run.
+
+Both classes also have an async ``apaginate_queryset`` for the async read
+views of jobapi/async_views.py.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from jobapi.async_views import AsyncPageNumberPagination, fetch
+
+
+Cursor = namedtuple('Cursor', ['position', 'reverse'])
+
+
+class OrderTerm(namedtuple('OrderTerm', ['name', 'attname', 'descending', 'nullable', 'field'])):
+    """One column of the keyset. Nullable columns always sort NULLs last."""
+
+    def expression(self, reverse=False):
+        descending = self.descending != reverse
+        if not self.nullable:
+            return F(self.name).desc() if descending else F(self.name).asc()
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        return F(self.name).desc(**nulls) if descending else F(self.name).asc(**nulls)
+
+    def after(self, value, reverse=False):
+        """Condition for rows strictly after ``value``, or None if there are none."""
+        descending = self.descending != reverse
+        nulls_last = self.nullable and not reverse
+        if value is None:
+            return None if nulls_last else Q(**{f'{self.name}__isnull': False})
+        condition = Q(**{f'{self.name}__{"lt" if descending else "gt"}': value})
+        if nulls_last:
+            condition |= Q(**{f'{self.name}__isnull': True})
+        return condition
+
+    def equal(self, value):
+        if value is None:
+            return Q(**{f'{self.name}__isnull': True})
+        return Q(**{self.name: value})
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on every column of the queryset ordering plus
+    the primary key as a tiebreaker, so rows with equal ``posted_at`` are
+    never skipped or repeated.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    default_ordering = ('-pk',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        if request.query_params.get(self.count_query_param) == 'approx':
+            self.count = approximate_count(queryset)
+        return self.paginate_results(list(page_queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        if request.query_params.get(self.count_query_param) == 'approx':
+            self.count = await aapproximate_count(queryset)
+        return self.paginate_results(await fetch(page_queryset[:self.page_size + 1], self.page_size + 1))
+
+    def get_page_queryset(self, queryset, request):
+        """The queryset of the requested page plus one row, still unevaluated."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.terms = self.get_ordering_terms(queryset)
+        self.cursor = self.decode_cursor(request)
+        self.count = None
+
+        reverse = self.cursor.reverse if self.cursor else False
+        page_queryset = queryset.order_by(*(term.expression(reverse) for term in self.terms))
+        if self.cursor:
+            page_queryset = self.filter_after(page_queryset, self.cursor.position, reverse)
+        return page_queryset
+
+    def paginate_results(self, results):
+        """Trim the fetched rows to the page and set up the cursors."""
+        reverse = self.cursor.reverse if self.cursor else False
+        has_following = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        first = self.get_position(results[0]) if results else None
+        last = self.get_position(results[-1]) if results else None
+        if reverse:
+            # There is always something after a page we reached going back.
+            self.next_cursor = Cursor(last, False) if results else None
+            self.has_next = True
+            self.previous_cursor = Cursor(first, True) if has_following else None
+        else:
+            self.next_cursor = Cursor(last, False) if has_following else None
+            self.has_next = has_following
+            self.previous_cursor = Cursor(first, True) if self.cursor and results else None
+        return results
+
+    def get_ordering_terms(self, queryset):
+        ordering = [term for term in queryset.query.order_by if isinstance(term, str)]
+        if not ordering:
+            ordering = list(self.default_ordering)
+        opts = queryset.model._meta
+
+        terms = []
+        for term in ordering:
+            descending = term.startswith('-')
+            name = term.lstrip('-+')
+            if name == 'pk':
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations such as search_rank.
+                terms.append(OrderTerm(name, name, descending, False, None))
+            else:
+                terms.append(OrderTerm(name, field.attname, descending, field.null, field))
+
+        if not any(term.name == opts.pk.name for term in terms):
+            terms.append(OrderTerm(opts.pk.name, opts.pk.attname, terms[0].descending, False, opts.pk))
+        return terms
+
+    def filter_after(self, queryset, position, reverse):
+        conditions = []
+        prefix = Q()
+        for term, value in zip(self.terms, position):
+            after = term.after(value, reverse)
+            if after is not None:
+                conditions.append(prefix & after)
+            prefix &= term.equal(value)
+        if not conditions:
+            return queryset.none()
+        return queryset.filter(reduce(or_, conditions))
+
+    def get_position(self, instance):
+        return [_encode_value(getattr(instance, term.attname)) for term in self.terms]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position, reverse = data['p'], bool(data['r'])
+            if len(position) != len(self.terms):
+                raise ValueError
+            position = [
+                term.field.to_python(value) if term.field is not None and value is not None else value
+                for term, value in zip(self.terms, position)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(position, reverse)
+
+    def encode_cursor(self, cursor):
+        data = json.dumps({'p': cursor.position, 'r': int(cursor.reverse)}, separators=(',', ':'))
+        encoded = urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_cursor is not None:
+            return self.encode_cursor(self.next_cursor)
+        if self.has_next:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return None
+
+    def get_previous_link(self):
+        if self.previous_cursor is None:
+            return None
+        return self.encode_cursor(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_approximate'] = True
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_approximate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+
+def approximate_count(queryset):
+    """
+    Cheap row estimate. PostgreSQL reports the planner's estimate, other
+    databases count up to ``PAGINATION_APPROX_COUNT_CAP`` rows.
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    cap = getattr(settings, 'PAGINATION_APPROX_COUNT_CAP', 10000)
+    return queryset[:cap].count()
+
+
+async def aapproximate_count(queryset):
+    """``approximate_count`` on the async ORM."""
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(await queryset.aexplain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    cap = getattr(settings, 'PAGINATION_APPROX_COUNT_CAP', 10000)
+    return await queryset[:cap].acount()
+
+
+class FeedPagination(BasePagination):
+    """
+    Page number pagination unless the client asks for ``?pagination=cursor``
+    or sends a ``cursor``, in which case KeysetPagination is used.
+    """
+    mode_query_param = 'pagination'
+    page_number_class = AsyncPageNumberPagination
+    keyset_class = KeysetPagination
+
+    def __init__(self):
+        self.page_number = self.page_number_class()
+        self.keyset = self.keyset_class()
+        self.active = self.page_number
+
+    @property
+    def display_page_controls(self):
+        return self.active is self.page_number and self.page_number.display_page_controls
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.active = self.keyset if self.use_keyset(request) else self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.active = self.keyset if self.use_keyset(request) else self.page_number
+        return await self.active.apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.active.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" for keyset pagination.',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': self.keyset.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+        ]
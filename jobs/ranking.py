@@ -0,0 +1,91 @@
+"""
+Applicant ranking by skill match.
+
+Every application gets a cached ``match_score`` in [0, 1]: the share of the
+job's normalized skills the applicant has, blended with the text similarity
+of the applicant's skills and cover letter to ``skills_required``. Scores
+are computed for a job's unscored applications in batches, one sparse
+matrix product per batch, and reset to NULL by the Job/User signals when
+the job's or the applicant's skills change.
+"""
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from scipy import sparse
+
+from .models import JobApplication
+from .text_index import term_frequencies
+
+User = get_user_model()
+
+N_FEATURES = 2 ** 18
+SKILL_WEIGHT = 0.7
+TEXT_WEIGHT = 1 - SKILL_WEIGHT
+
+
+def _rows(term_dicts):
+    """L2-normalized CSR matrix with one row per ``{column: weight}``."""
+    indptr, indices, data = [0], [], []
+    for terms in term_dicts:
+        weights = np.fromiter(terms.values(), dtype=np.float64, count=len(terms))
+        norm = np.linalg.norm(weights)
+        indices.append(np.fromiter(terms.keys(), dtype=np.int32, count=len(terms)))
+        data.append(weights / norm if norm else weights)
+        indptr.append(indptr[-1] + len(terms))
+    return sparse.csr_matrix(
+        (np.concatenate(data), np.concatenate(indices), np.array(indptr)),
+        shape=(len(indptr) - 1, N_FEATURES),
+    )
+
+
+def score_batch(job_vector, job_skill_ids, applications):
+    """Scores of ``applications`` (with ``applicant`` loaded) against one job."""
+    texts = _rows(
+        term_frequencies([(app.applicant.skills, 2.0), (app.cover_letter, 1.0)], N_FEATURES)
+        for app in applications
+    )
+    text_scores = (texts @ job_vector.T).toarray().ravel()
+    if not job_skill_ids:
+        return text_scores
+
+    matched = dict(
+        User.normalized_skills.through.objects
+        .filter(user_id__in=[app.applicant_id for app in applications], skill_id__in=job_skill_ids)
+        .values('user_id')
+        .annotate(matched=Count('skill_id'))
+        .values_list('user_id', 'matched')
+    )
+    skill_scores = np.array([matched.get(app.applicant_id, 0) for app in applications]) / len(job_skill_ids)
+    return SKILL_WEIGHT * skill_scores + TEXT_WEIGHT * text_scores
+
+
+def score_applications(job):
+    """Compute the missing match scores of a job's applications."""
+    pending = (
+        JobApplication.objects.filter(job=job, match_score__isnull=True)
+        .select_related('applicant')
+        .only('id', 'applicant_id', 'cover_letter', 'applicant__skills')
+        .order_by('pk')
+    )
+    batch_size = getattr(settings, 'RANKING_BATCH_SIZE', 500)
+    job_vector = _rows([term_frequencies([(job.skills_required, 1.0)], N_FEATURES)])
+    job_skill_ids = list(job.normalized_skills.values_list('id', flat=True))
+
+    scored = 0
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return scored
+        scores = score_batch(job_vector, job_skill_ids, batch)
+        for application, score in zip(batch, scores):
+            application.match_score = round(float(score), 6)
+        JobApplication.objects.bulk_update(batch, ['match_score'])
+        scored += len(batch)
+        last_pk = batch[-1].pk
+
+
+def invalidate_match_scores(**filters):
+    """Reset the scores of the applications matching ``filters``."""
+    JobApplication.objects.filter(match_score__isnull=False, **filters).update(match_score=None)
@@ -0,0 +1,232 @@
+"""
+Full-text search for the job feed.
+
+Every Job keeps a denormalized ``search_document`` (title, company name,
+skills and description) that is refreshed on save. A search backend turns
+that document into an index suited to the database in use:
+
+* ``postgres`` - GIN index over ``to_tsvector('english', search_document)``
+* ``sqlite`` - an FTS5 virtual table kept in sync by the Job signals
+* ``basic`` - no index, falls back to DRF's ``icontains`` SearchFilter
+
+The backend is picked with the ``JOB_SEARCH_BACKEND`` setting. ``auto``
+chooses by database vendor; a dotted path to a custom backend class also
+works.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+
+SEARCH_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def compose_search_document(*parts):
+    """Join the searchable parts of a job into one document."""
+    return '\n'.join(part for part in parts if part)
+
+
+def tokenize_search_terms(terms):
+    """Reduce raw search terms to plain word tokens safe for any backend."""
+    tokens = []
+    for term in terms:
+        tokens.extend(SEARCH_TOKEN_RE.findall(term.lower()))
+    return tokens
+
+
+class BaseSearchBackend:
+    """
+    Interface for job search backends.
+
+    ``search`` must return the queryset filtered to matching jobs and
+    annotated with a ``search_rank`` where higher means more relevant.
+    """
+    vendor = None
+
+    def is_available(self, connection):
+        return connection.vendor == self.vendor
+
+    def install(self, schema_editor):
+        """Create the index structures. Must be idempotent."""
+
+    def uninstall(self, schema_editor):
+        """Drop the index structures created by ``install``."""
+
+    def index(self, connection, documents):
+        """Add or replace ``(job_id, search_document)`` pairs in the index."""
+
+    def remove(self, connection, job_ids):
+        """Remove jobs from the index."""
+
+    def search(self, queryset, tokens):
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    vendor = 'postgresql'
+    config = 'english'
+    index_name = 'jobs_job_search_gin'
+
+    def _vector(self):
+        from django.contrib.postgres.search import SearchVector
+        return SearchVector('search_document', config=self.config)
+
+    def _gin_index(self):
+        from django.contrib.postgres.indexes import GinIndex
+        return GinIndex(self._vector(), name=self.index_name)
+
+    def install(self, schema_editor):
+        from .models import Job
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Job._meta.db_table)
+        if self.index_name not in constraints:
+            schema_editor.add_index(Job, self._gin_index())
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(self.index_name)}')
+
+    def search(self, queryset, tokens):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        # Prefix-match every token so partial words keep matching the way
+        # the icontains search did, and AND them together.
+        query = SearchQuery(
+            ' & '.join(f'{token}:*' for token in tokens),
+            search_type='raw',
+            config=self.config,
+        )
+        vector = self._vector()
+        return queryset.annotate(
+            search_vector=vector,
+            search_rank=SearchRank(vector, query),
+        ).filter(search_vector=query)
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    vendor = 'sqlite'
+    table = 'jobs_job_fts'
+    # Database names known to have the FTS table, so the introspection
+    # query runs once per database instead of once per search.
+    _installed = set()
+
+    def is_available(self, connection):
+        if connection.vendor != self.vendor:
+            return False
+        name = connection.settings_dict['NAME']
+        if name not in self._installed:
+            if self.table not in connection.introspection.table_names():
+                return False
+            self._installed.add(name)
+        return True
+
+    def install(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            f"USING fts5(search_document, tokenize='porter unicode61')"
+        )
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, connection, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, search_document) VALUES (%s, %s)',
+                documents,
+            )
+
+    def remove(self, connection, job_ids):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(job_id,) for job_id in job_ids],
+            )
+
+    def search(self, queryset, tokens):
+        match = ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+        job_table = queryset.model._meta.db_table
+        matching_ids = RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            [match],
+        )
+        # bm25() is lower-is-better, negate it so every backend ranks descending.
+        rank = RawSQL(
+            f'SELECT -bm25({self.table}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = "{job_table}"."id"',
+            [match],
+        )
+        return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank)
+
+
+SEARCH_BACKENDS = {
+    'postgres': PostgresSearchBackend,
+    'sqlite': SQLiteFTSSearchBackend,
+}
+
+
+def get_search_backend(using='default'):
+    """
+    Return the configured search backend for a database alias, or None when
+    the plain icontains search should be used instead.
+    """
+    name = getattr(settings, 'JOB_SEARCH_BACKEND', 'auto')
+    if not name or name == 'basic':
+        return None
+    connection = connections[using]
+    if name == 'auto':
+        candidates = [backend() for backend in SEARCH_BACKENDS.values()]
+    elif name in SEARCH_BACKENDS:
+        candidates = [SEARCH_BACKENDS[name]()]
+    else:
+        candidates = [import_string(name)()]
+    for backend in candidates:
+        if backend.vendor is None or backend.vendor == connection.vendor:
+            return backend
+    return None
+
+
+def index_jobs(jobs, using='default'):
+    """Push the current search document of each job into the index."""
+    backend = get_search_backend(using)
+    connection = connections[using]
+    if backend is not None and backend.is_available(connection):
+        backend.index(connection, ((job.pk, job.search_document) for job in jobs))
+
+
+def remove_jobs(job_ids, using='default'):
+    backend = get_search_backend(using)
+    connection = connections[using]
+    if backend is not None and backend.is_available(connection):
+        backend.remove(connection, job_ids)
+
+
+class JobSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that uses the indexed search backend when one is available
+    and orders matches by relevance. Falls back to the stock icontains
+    behaviour otherwise.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        backend = get_search_backend(queryset.db)
+        tokens = tokenize_search_terms(terms)
+        if backend is None or not tokens or not backend.is_available(connections[queryset.db]):
+            return super().filter_queryset(request, queryset, view)
+
+        ordering = queryset.query.order_by
+        queryset = backend.search(queryset, tokens)
+        return queryset.order_by('-search_rank', *ordering)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Job, JobApplication, Bookmark
+from .filters import JobApplicationFilter
+from .models import Job, JobApplication, Bookmark, JobAlert, SavedSearch
 from companies.serializers import CompanySerializer
 from django.contrib.auth import get_user_model
 
@@ -7,28 +8,21 @@ User = get_user_model()
 
 
 class JobSerializer(serializers.ModelSerializer):
-    company_name = serializers.SerializerMethodField()
+    company_name = serializers.CharField(source='company.name', read_only=True)
     
     class Meta:
         model = Job
-        fields = '__all__'
-        
-    def get_company_name(self, obj):
-        return obj.company.name
+        exclude = ('search_document', 'normalized_skills', 'geo_cell', 'alerts_pending')
 
 
 class JobDetailSerializer(serializers.ModelSerializer):
     company = CompanySerializer(read_only=True)
-    application_count = serializers.SerializerMethodField()
     is_bookmarked = serializers.SerializerMethodField()
     has_applied = serializers.SerializerMethodField()
     
     class Meta:
         model = Job
-        fields = '__all__'
-    
-    def get_application_count(self, obj):
-        return obj.applications.count()
+        exclude = ('search_document', 'normalized_skills', 'geo_cell', 'alerts_pending')
     
     def get_is_bookmarked(self, obj):
         request = self.context.get('request')
@@ -44,30 +38,66 @@ class JobDetailSerializer(serializers.ModelSerializer):
 
 
 class JobApplicationSerializer(serializers.ModelSerializer):
-    job_title = serializers.SerializerMethodField()
-    applicant_name = serializers.SerializerMethodField()
+    job_title = serializers.CharField(source='job.title', read_only=True)
+    applicant_name = serializers.CharField(source='applicant.get_full_name', read_only=True)
     
     class Meta:
         model = JobApplication
         fields = '__all__'
-        
-    def get_job_title(self, obj):
-        return obj.job.title
-    
-    def get_applicant_name(self, obj):
-        return f"{obj.applicant.first_name} {obj.applicant.last_name}"
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=JobApplication.STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=50000
+    )
+    filter = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either 'ids' or 'filter'.")
+        return attrs
+
+    def validate_filter(self, value):
+        known = JobApplicationFilter.base_filters
+        unknown = sorted(set(value) - set(known))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown filter keys: {', '.join(unknown)}. Use {', '.join(known)}."
+            )
+        # An empty filter would select every application of the employer.
+        if not any(v not in (None, '', []) for v in value.values()):
+            raise serializers.ValidationError("Filter on at least one of: " + ', '.join(known) + '.')
+        return value
 
 
 class BookmarkSerializer(serializers.ModelSerializer):
-    job_title = serializers.SerializerMethodField()
-    company_name = serializers.SerializerMethodField()
+    job_title = serializers.CharField(source='job.title', read_only=True)
+    company_name = serializers.CharField(source='job.company.name', read_only=True)
     
     class Meta:
         model = Bookmark
-        fields = '__all__'
-        
-    def get_job_title(self, obj):
-        return obj.job.title
-    
-    def get_company_name(self, obj):
-        return obj.job.company.name 
\ No newline at end of file
+        fields = '__all__' 
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        exclude = ('access_key',)
+        read_only_fields = ('user',)
+
+    def validate(self, attrs):
+        salary_min = attrs.get('salary_min', getattr(self.instance, 'salary_min', None))
+        salary_max = attrs.get('salary_max', getattr(self.instance, 'salary_max', None))
+        if salary_min is not None and salary_max is not None and salary_min > salary_max:
+            raise serializers.ValidationError({'salary_max': 'Must not be below salary_min.'})
+        return attrs
+
+
+class JobAlertSerializer(serializers.ModelSerializer):
+    job = JobSerializer(read_only=True)
+    saved_search_name = serializers.CharField(source='saved_search.name', read_only=True)
+
+    class Meta:
+        model = JobAlert
+        fields = ('id', 'saved_search', 'saved_search_name', 'job', 'created_at', 'delivered_at')
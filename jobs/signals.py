@@ -0,0 +1,299 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from companies.models import Company
+from jobapi.response_cache import bump_namespace
+from .alerts import access_key
+from .autocomplete import autocomplete, job_state
+from .counters import adjust_counter
+from .dashboard import invalidate_dashboard
+from .models import Bookmark, Job, JobApplication, SavedSearch
+from .ranking import invalidate_match_scores
+from .search import index_jobs, remove_jobs
+from .similarity import refresh_saved_job
+from .skills import sync_skills
+from .stream import job_event, publish_job_events
+
+REINDEX_BATCH_SIZE = 500
+
+# Sent with ``jobs`` (saved instances with primary keys) and ``using`` after
+# a bulk_create of jobs, which bypasses post_save.
+jobs_bulk_created = Signal()
+# Sent with ``employer``, ``ids``, ``status`` and ``using`` after a bulk
+# status UPDATE of that employer's applications (see jobs/transitions.py).
+applications_status_changed = Signal()
+
+
+@receiver(post_save, sender=Job)
+def index_job(sender, instance, using, **kwargs):
+    index_jobs([instance], using=using)
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, using, **kwargs):
+    remove_jobs([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_responses(sender, **kwargs):
+    bump_namespace('jobs')
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard(instance.posted_by_id)
+
+
+def _deleted_with_job(origin):
+    """
+    Whether a delete started at a job or a company, so the job of every
+    cascaded application and bookmark is deleted with it and needs no
+    per-row counter or dashboard update.
+    """
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (Job, Company)
+
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_delete, sender=JobApplication)
+def invalidate_application_dashboard(sender, instance, using, origin=None, **kwargs):
+    if _deleted_with_job(origin):
+        return
+    if JobApplication.job.is_cached(instance):
+        employer_id = instance.job.posted_by_id
+    else:
+        employer_id = Job.objects.using(using).filter(pk=instance.job_id).values_list('posted_by', flat=True).first()
+    invalidate_dashboard(employer_id)
+
+
+@receiver(applications_status_changed, sender=JobApplication)
+def invalidate_bulk_status_dashboard(sender, employer, **kwargs):
+    invalidate_dashboard(employer.pk)
+
+
+@receiver(jobs_bulk_created, sender=Job)
+def handle_jobs_bulk_created(sender, jobs, using, **kwargs):
+    """Search index, company counters and cache for bulk inserted jobs."""
+    index_jobs(jobs, using=using)
+    sync_skills(jobs, 'skills_required', using=using)
+    active_per_company = Counter(job.company_id for job in jobs if job.is_active)
+    for company_id, count in active_per_company.items():
+        adjust_counter(Company, company_id, 'active_job_count', count, using)
+    for job in jobs:
+        job._counter_state = (job.company_id, job.is_active)
+    bump_namespace('jobs')
+    for employer_id in {job.posted_by_id for job in jobs}:
+        invalidate_dashboard(employer_id)
+    events = [job_event(job, 'created') for job in jobs if job.is_active]
+    transaction.on_commit(lambda: publish_job_events(events), using=using)
+    states = [job_state(job) for job in jobs]
+    transaction.on_commit(
+        lambda: [autocomplete.job_changed(None, state) for state in states], using=using
+    )
+
+
+@receiver(post_save, sender=Job)
+def refresh_job_neighbors(sender, instance, using, **kwargs):
+    if not getattr(settings, 'SIMILAR_JOBS_REFRESH_ON_SAVE', True):
+        return
+    # Best effort: a failed refresh leaves the job for the next cron run.
+    transaction.on_commit(lambda: refresh_saved_job(instance.pk, using), using=using, robust=True)
+
+
+@receiver(post_init, sender=Job)
+def remember_stream_state(sender, instance, **kwargs):
+    instance._stream_active = instance.__dict__.get('is_active')
+
+
+@receiver(post_save, sender=Job)
+def publish_job_saved(sender, instance, created, using, **kwargs):
+    was_active = False if created else instance._stream_active
+    if was_active is None or was_active == instance.is_active:
+        event_type = None
+    elif instance.is_active:
+        event_type = 'created' if created else 'activated'
+    else:
+        event_type = 'deactivated'
+    instance._stream_active = instance.is_active
+    if event_type:
+        event = job_event(instance, event_type)
+        transaction.on_commit(lambda: publish_job_events([event]), using=using)
+
+
+@receiver(post_delete, sender=Job)
+def publish_job_deleted(sender, instance, using, **kwargs):
+    if instance.__dict__.get('is_active'):
+        event = job_event(instance, 'deactivated')
+        transaction.on_commit(lambda: publish_job_events([event]), using=using)
+
+
+@receiver(post_init, sender=Job)
+def remember_autocomplete_state(sender, instance, **kwargs):
+    instance._autocomplete_state = job_state(instance)
+
+
+@receiver(post_save, sender=Job)
+def update_job_autocomplete(sender, instance, created, using, **kwargs):
+    old_state = None if created else instance._autocomplete_state
+    new_state = job_state(instance)
+    if created or old_state is not None:
+        transaction.on_commit(lambda: autocomplete.job_changed(old_state, new_state), using=using)
+    instance._autocomplete_state = new_state
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_autocomplete(sender, instance, using, **kwargs):
+    old_state = instance._autocomplete_state
+    transaction.on_commit(lambda: autocomplete.job_changed(old_state, None), using=using)
+
+
+@receiver(post_save, sender=Company)
+def update_company_autocomplete(sender, instance, using, **kwargs):
+    transaction.on_commit(lambda: autocomplete.company_changed(instance), using=using)
+
+
+@receiver(post_delete, sender=Company)
+def remove_company_autocomplete(sender, instance, using, **kwargs):
+    company_id = instance.pk
+    transaction.on_commit(lambda: autocomplete.company_removed(company_id), using=using)
+
+
+@receiver(pre_save, sender=SavedSearch)
+def set_saved_search_access_key(sender, instance, **kwargs):
+    instance.access_key = access_key(instance)
+
+
+@receiver(pre_save, sender=Company)
+def remember_company_changes(sender, instance, using, update_fields=None, **kwargs):
+    instance._search_name_changed = instance._location_changed = False
+    if instance.pk is None:
+        return
+    watched = {'name', 'location'} if update_fields is None else {'name', 'location'} & set(update_fields)
+    if not watched:
+        return
+    old = Company.objects.using(using).filter(pk=instance.pk).values('name', 'location').first()
+    if old is None:
+        return
+    instance._search_name_changed = 'name' in watched and old['name'] != instance.name
+    instance._location_changed = 'location' in watched and old['location'] != instance.location
+
+
+@receiver(post_save, sender=Company)
+def update_company_jobs(sender, instance, using, created, **kwargs):
+    """
+    The company name is part of every job's search document, and jobs whose
+    own location does not geocode fall back to the company's coordinates.
+    """
+    name_changed = getattr(instance, '_search_name_changed', False)
+    location_changed = getattr(instance, '_location_changed', False)
+    if created or not (name_changed or location_changed):
+        return
+    fields = ['search_document'] if name_changed else []
+    if location_changed:
+        fields += ['latitude', 'longitude', 'geo_cell']
+    jobs = instance.jobs.using(using).only(
+        'id', 'title', 'skills_required', 'description', 'location', 'company', *fields
+    )
+    batch = []
+    for job in jobs.iterator(chunk_size=REINDEX_BATCH_SIZE):
+        job.company = instance
+        if name_changed:
+            job.search_document = job.build_search_document()
+        if location_changed:
+            job.set_coordinates()
+        batch.append(job)
+        if len(batch) == REINDEX_BATCH_SIZE:
+            _save_company_jobs(batch, fields, name_changed, using)
+            batch = []
+    _save_company_jobs(batch, fields, name_changed, using)
+
+
+def _save_company_jobs(jobs, fields, reindex, using):
+    if jobs:
+        Job.objects.using(using).bulk_update(jobs, fields)
+        if reindex:
+            index_jobs(jobs, using=using)
+
+
+@receiver(post_init, sender=Job)
+def remember_job_skills(sender, instance, **kwargs):
+    instance._skills_text = instance.__dict__.get('skills_required')
+
+
+@receiver(post_save, sender=Job)
+def update_job_skills(sender, instance, created, using, **kwargs):
+    # A deferred field was not loaded, so it cannot have changed either.
+    text = instance.__dict__.get('skills_required', instance._skills_text)
+    if text != instance._skills_text or (created and text):
+        sync_skills([instance], 'skills_required', using=using)
+        if not created:
+            invalidate_match_scores(job=instance)
+    instance._skills_text = text
+
+
+@receiver(post_init, sender=Job)
+def remember_job_state(sender, instance, **kwargs):
+    """
+    Snapshot the fields that drive Company.active_job_count so post_save can
+    tell what changed. Deferred fields are skipped to avoid extra queries.
+    """
+    if 'company_id' in instance.__dict__ and 'is_active' in instance.__dict__:
+        instance._counter_state = (instance.company_id, instance.is_active)
+    else:
+        instance._counter_state = None
+
+
+@receiver(post_save, sender=Job)
+def update_active_job_count(sender, instance, created, using, **kwargs):
+    old_state = (None, False) if created else instance._counter_state
+    new_state = (instance.company_id, instance.is_active)
+    if old_state is None or old_state == new_state:
+        instance._counter_state = new_state
+        return
+    old_company, was_active = old_state
+    if was_active:
+        adjust_counter(Company, old_company, 'active_job_count', -1, using)
+    if instance.is_active:
+        adjust_counter(Company, instance.company_id, 'active_job_count', 1, using)
+    instance._counter_state = new_state
+
+
+@receiver(post_delete, sender=Job)
+def decrement_active_job_count(sender, instance, using, **kwargs):
+    if instance.is_active:
+        adjust_counter(Company, instance.company_id, 'active_job_count', -1, using)
+
+
+@receiver(post_save, sender=JobApplication)
+def increment_application_count(sender, instance, created, using, **kwargs):
+    if created:
+        adjust_counter(Job, instance.job_id, 'application_count', 1, using)
+
+
+@receiver(post_delete, sender=JobApplication)
+def decrement_application_count(sender, instance, using, origin=None, **kwargs):
+    if _deleted_with_job(origin):
+        return
+    adjust_counter(Job, instance.job_id, 'application_count', -1, using)
+
+
+@receiver(post_save, sender=Bookmark)
+def increment_bookmark_count(sender, instance, created, using, **kwargs):
+    if created:
+        adjust_counter(Job, instance.job_id, 'bookmark_count', 1, using)
+
+
+@receiver(post_delete, sender=Bookmark)
+def decrement_bookmark_count(sender, instance, using, origin=None, **kwargs):
+    if _deleted_with_job(origin):
+        return
+    adjust_counter(Job, instance.job_id, 'bookmark_count', -1, using)
@@ -0,0 +1,101 @@
+"""
+Precomputed "similar jobs".
+
+The nearest neighbors of every active job, by text similarity of its
+skills, title, requirements, description and company industry, are stored
+as ``SimilarJob`` rows so the endpoint reads them with one indexed query.
+A few more neighbors than are shown get stored, so deactivated neighbors
+can be skipped until the next refresh.
+
+``refresh_similar_jobs`` recomputes a batch of jobs with one sparse matrix
+product against the process-wide similarity index. The ``refresh_similar_jobs``
+management command runs it over every job, or only over the jobs changed
+since their last refresh with ``--stale``. Saving a job bumps its
+``updated_at``, which is all it takes to mark it stale. With
+``SIMILAR_JOBS_REFRESH_ON_SAVE`` on (the default) every server process
+builds the similarity index in the background at startup, and once it is
+built refreshes the saved job itself after commit; its neighbors wait for
+the next run.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job, SimilarJob
+from .text_index import build_in_background, get_text_index, loaded_text_index
+
+SIMILAR_FIELD_WEIGHTS = (
+    ('skills_required', 3.0),
+    ('title', 2.0),
+    ('requirements', 1.0),
+    ('description', 1.0),
+    ('company.industry', 1.0),
+)
+SIMILAR_JOB_FIELDS = (
+    'id', 'is_active', 'skills_required', 'title', 'requirements', 'description', 'company__industry',
+)
+
+
+def get_similarity_index():
+    return get_text_index('similar', SIMILAR_FIELD_WEIGHTS)
+
+
+def build_similarity_index_in_background():
+    build_in_background('similar', SIMILAR_FIELD_WEIGHTS)
+
+
+def jobs_for_refresh():
+    return Job.objects.select_related('company').only(*SIMILAR_JOB_FIELDS)
+
+
+def refresh_similar_jobs(jobs, index=None, using='default'):
+    """
+    Recompute and store the neighbors of ``jobs`` (from ``jobs_for_refresh``)
+    and return the new ``SimilarJob`` rows.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    index = index or get_similarity_index()
+    stored = getattr(settings, 'SIMILAR_JOBS_STORED', 20)
+
+    active = [job for job in jobs if job.is_active]
+    neighbors = index.top_k_many(
+        [index.job_vector(job) for job in active], stored, [{job.pk} for job in active]
+    )
+    # The index only learns about deleted jobs when it is rebuilt.
+    existing = set(
+        Job.objects.using(using)
+        .filter(pk__in={similar_id for matches in neighbors for similar_id, _ in matches})
+        .values_list('pk', flat=True)
+    )
+    rows = [
+        SimilarJob(job_id=job.pk, similar_id=similar_id, rank=rank, score=score)
+        for job, matches in zip(active, neighbors)
+        for rank, (similar_id, score) in enumerate(
+            match for match in matches if match[0] in existing
+        )
+    ]
+    _store(jobs, rows, using)
+    return rows
+
+
+def _store(jobs, rows, using):
+    job_ids = [job.pk for job in jobs]
+    with transaction.atomic(using=using):
+        SimilarJob.objects.using(using).filter(job_id__in=job_ids).delete()
+        SimilarJob.objects.using(using).bulk_create(rows)
+        # update() leaves updated_at alone, so this does not mark them changed.
+        Job.objects.using(using).filter(pk__in=job_ids).update(similar_computed_at=timezone.now())
+
+
+def refresh_saved_job(job_id, using='default'):
+    """
+    Refresh the neighbors of one saved job against the similarity index as
+    this process has it. Building or syncing the index costs far more than
+    a save should, so without a built index the job is left stale.
+    """
+    index = loaded_text_index('similar')
+    if index is None:
+        return
+    refresh_similar_jobs(jobs_for_refresh().using(using).filter(pk=job_id), index, using)
@@ -0,0 +1,85 @@
+"""
+Normalized skills parsed from ``Job.skills_required`` and ``User.skills``.
+
+The free text is split into short skill names, normalized and mapped to a
+``Skill`` through its canonical name or a ``SkillAlias`` ("js" ->
+"javascript"). Unknown names become new skills, unverified until an
+admin reviews them (the seeded ones are verified); ``?skills=`` matches
+them by their exact name all the same. Fragments are split on punctuation
+and " / " only, so "research and development" and "R&D" stay whole. ``sync_skills`` rewrites the ``normalized_skills`` of a batch of
+jobs or users with a fixed number of queries, the Job/User signals and
+``backfill_skills`` use it.
+"""
+import re
+
+from django.db import transaction
+
+from .models import Skill, SkillAlias
+
+SPLIT_RE = re.compile(r'[,;|\n\r\t•]+|\s+/\s+')
+SPACE_RE = re.compile(r'\s+')
+# Longer fragments are sentences rather than skill names.
+MAX_SKILL_LENGTH = 50
+MAX_SKILL_WORDS = 4
+
+
+def normalize_skill(name):
+    name = SPACE_RE.sub(' ', name).strip().strip('.-:*').strip().lower()
+    if not name or len(name) > MAX_SKILL_LENGTH or len(name.split(' ')) > MAX_SKILL_WORDS:
+        return None
+    return name
+
+
+def parse_skills(text):
+    """Unique normalized skill names in the order they appear."""
+    names = (normalize_skill(part) for part in SPLIT_RE.split(text or ''))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def resolve_skills(names, create=True, using='default'):
+    """
+    ``{normalized name: skill id}`` for ``names``, through aliases first.
+    Unknown names are created as unverified skills unless ``create`` is
+    false.
+    """
+    names = {name for name in (normalize_skill(name) for name in names) if name}
+    if not names:
+        return {}
+    resolved = dict(SkillAlias.objects.using(using).filter(alias__in=names).values_list('alias', 'skill_id'))
+    missing = names - resolved.keys()
+    if missing:
+        resolved.update(Skill.objects.using(using).filter(name__in=missing).values_list('name', 'id'))
+        missing = names - resolved.keys()
+    if missing and create:
+        Skill.objects.using(using).bulk_create(
+            [Skill(name=name) for name in sorted(missing)], ignore_conflicts=True
+        )
+        resolved.update(Skill.objects.using(using).filter(name__in=missing).values_list('name', 'id'))
+    return resolved
+
+
+def sync_skills(instances, text_field, using='default'):
+    """
+    Replace ``normalized_skills`` of ``instances`` (all jobs or all users)
+    with the skills parsed from ``text_field``.
+    """
+    instances = [instance for instance in instances if instance.pk]
+    if not instances:
+        return
+    model = type(instances[0])
+    through = model.normalized_skills.through
+    source = model.normalized_skills.field.m2m_field_name() + '_id'
+
+    parsed = {instance.pk: parse_skills(getattr(instance, text_field)) for instance in instances}
+    skill_ids = resolve_skills({name for names in parsed.values() for name in names}, using=using)
+    rows = {
+        (pk, skill_ids[name])
+        for pk, names in parsed.items()
+        for name in names
+        if name in skill_ids
+    }
+    with transaction.atomic(using=using):
+        through.objects.using(using).filter(**{f'{source}__in': parsed.keys()}).delete()
+        through.objects.using(using).bulk_create(
+            [through(**{source: pk, 'skill_id': skill_id}) for pk, skill_id in rows]
+        )
@@ -0,0 +1,82 @@
+"""
+Live job events for the server-sent events endpoint.
+
+The Job signals publish ``created``, ``activated`` and ``deactivated``
+events on the ``jobs`` channel of jobapi/broadcast.py once the transaction
+commits; a deleted active job counts as deactivated. Each connected client gets the
+events matching its optional ``job_type``, ``location`` and ``company``
+filters as ``text/event-stream`` frames, with a comment line every
+``SSE_KEEPALIVE`` seconds to keep proxies from closing idle connections.
+"""
+import asyncio
+import json
+
+from django.conf import settings
+
+from jobapi.broadcast import get_broadcast
+
+JOB_CHANNEL = 'jobs'
+STREAM_FILTERS = ('job_type', 'location', 'company')
+
+
+def job_event(job, event_type):
+    return {
+        'type': event_type,
+        'job': {
+            'id': job.pk,
+            'title': job.title,
+            'company': job.company_id,
+            'location': job.location,
+            'job_type': job.job_type,
+            'experience_level': job.experience_level,
+            'salary_min': str(job.salary_min) if job.salary_min is not None else None,
+            'salary_max': str(job.salary_max) if job.salary_max is not None else None,
+            'posted_at': job.posted_at.isoformat() if job.posted_at else None,
+        },
+    }
+
+
+def publish_job_events(events):
+    broadcast = get_broadcast()
+    for event in events:
+        broadcast.publish(JOB_CHANNEL, event)
+
+
+def event_filter(params):
+    """A predicate over events for the stream's query parameters."""
+    wanted = {name: params[name].strip() for name in STREAM_FILTERS if params.get(name, '').strip()}
+    if 'location' in wanted:
+        wanted['location'] = wanted['location'].lower()
+
+    def match(event):
+        job = event['job']
+        return (
+            ('job_type' not in wanted or job['job_type'] == wanted['job_type'])
+            and ('location' not in wanted or (job['location'] or '').lower() == wanted['location'])
+            and ('company' not in wanted or str(job['company']) == wanted['company'])
+        )
+    return match
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event['job'], separators=(',', ':'))}\n\n"
+
+
+async def event_stream(subscription):
+    keepalive = getattr(settings, 'SSE_KEEPALIVE', 15)
+    broadcast = get_broadcast()
+    try:
+        yield f"retry: {getattr(settings, 'SSE_RETRY_MS', 5000)}\n: connected\n\n"
+        while True:
+            try:
+                event = await subscription.get(keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event is None:
+                # Too slow to keep up: tell the client to refetch and reconnect.
+                yield 'event: overflow\ndata: {}\n\n'
+                return
+            yield format_event(event)
+    finally:
+        broadcast.unsubscribe(subscription)
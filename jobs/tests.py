@@ -1,3 +1,1087 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import threading
+from base64 import urlsafe_b64encode
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from companies.models import Company
+from jobapi import broadcast
+from jobapi.broadcast import LocalBroadcast
+from jobapi.startup import start_background_builds
+from . import autocomplete as autocomplete_module, text_index
+from .alerts import deliver_alerts, queue_alerts, queue_pending_alerts
+from .autocomplete import PrefixIndex, autocomplete
+from .models import Bookmark, Job, JobAlert, JobApplication, SavedSearch, SimilarJob, Skill
+from .similarity import get_similarity_index
+from .skills import parse_skills
+from .stream import job_event, publish_job_events
+from .views import job_stream
+
+
+class ListQueryCountTests(TestCase):
+    """List endpoints must run a fixed number of queries whatever the page size."""
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.seeker = User.objects.create_user(
+            'seeker', password='pw', first_name='Sam', last_name='Seeker'
+        )
+
+    def create_rows(self, count):
+        for i in range(count):
+            company = Company.objects.create(
+                name=f'Company {i}', description='d', industry='Tech', location='Berlin'
+            )
+            job = Job.objects.create(
+                title=f'Job {i}', company=company, description='d', requirements='r',
+                responsibilities='r', location='Berlin', posted_by=self.employer,
+                skills_required='python',
+            )
+            JobApplication.objects.create(job=job, applicant=self.seeker)
+            Bookmark.objects.create(job=job, user=self.seeker)
+
+    def assertConstantQueries(self, url, user, expected):
+        if user:
+            self.client.force_authenticate(user)
+        for rows in (2, 8):
+            self.create_rows(rows - Job.objects.count())
+            cache.clear()
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(len(response.data['results']), rows)
+
+    def test_job_list(self):
+        # COUNT + page
+        self.assertConstantQueries('/api/jobs/', None, 2)
+
+    def test_job_list_cursor_pagination(self):
+        self.assertConstantQueries('/api/jobs/?pagination=cursor', None, 1)
+
+    def test_my_jobs(self):
+        self.assertConstantQueries('/api/jobs/my_jobs/', self.employer, 2)
+
+    def test_employer_application_list(self):
+        self.assertConstantQueries('/api/applications/', self.employer, 2)
+
+    def test_seeker_application_list(self):
+        self.assertConstantQueries('/api/applications/', self.seeker, 2)
+
+    def test_bookmark_list(self):
+        self.assertConstantQueries('/api/bookmarks/', self.seeker, 2)
+
+    def test_related_fields_are_serialized(self):
+        self.create_rows(1)
+        self.client.force_authenticate(self.seeker)
+        bookmark = self.client.get('/api/bookmarks/').data['results'][0]
+        self.assertEqual((bookmark['job_title'], bookmark['company_name']), ('Job 0', 'Company 0'))
+        application = self.client.get('/api/applications/').data['results'][0]
+        self.assertEqual(application['applicant_name'], 'Sam Seeker')
+
+
+class SimilarJobsOnSaveTests(TestCase):
+    def setUp(self):
+        text_index._indexes.pop('similar', None)
+        self.addCleanup(text_index._indexes.pop, 'similar', None)
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.job_kwargs = dict(
+            company=company, description='d', requirements='r', responsibilities='r',
+            location='Berlin', posted_by=employer, skills_required='python, django',
+        )
+        self.other = Job.objects.create(title='Python Developer', **self.job_kwargs)
+
+    def test_save_does_not_build_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(title='Python Engineer', **self.job_kwargs)
+        self.assertIsNone(text_index.loaded_text_index('similar'))
+        self.assertFalse(SimilarJob.objects.filter(job=job).exists())
+        self.assertIsNone(Job.objects.get(pk=job.pk).similar_computed_at)
+
+    def test_save_refreshes_the_job_in_a_warm_process(self):
+        get_similarity_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(title='Python Engineer', **self.job_kwargs)
+        self.assertEqual(list(SimilarJob.objects.filter(job=job).values_list('similar_id', flat=True)), [self.other.pk])
+
+    def test_deleted_jobs_still_in_the_index_are_skipped(self):
+        get_similarity_index()
+        self.other.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(title='Python Engineer', **self.job_kwargs)
+        self.assertFalse(SimilarJob.objects.filter(job=job).exists())
+        self.assertIsNotNone(Job.objects.get(pk=job.pk).similar_computed_at)
+
+
+class SimilarJobsStartupTests(TransactionTestCase):
+    """The index is built by the same background thread a server process starts."""
+
+    def setUp(self):
+        for name in ('recommendations', 'similar'):
+            text_index._indexes.pop(name, None)
+            self.addCleanup(text_index._indexes.pop, name, None)
+        self.addCleanup(setattr, autocomplete, 'built_at', None)
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.job_kwargs = dict(
+            company=company, description='d', requirements='r', responsibilities='r',
+            location='Berlin', posted_by=employer,
+        )
+        self.python = Job.objects.create(title='Python Developer', skills_required='python, django', **self.job_kwargs)
+        self.java = Job.objects.create(title='Java Developer', skills_required='java, spring', **self.job_kwargs)
+
+    def neighbors(self, job):
+        return list(SimilarJob.objects.filter(job=job).order_by('rank').values_list('similar_id', flat=True))
+
+    def test_saved_job_is_refreshed_once_the_startup_build_finishes(self):
+        start_background_builds()
+        for thread in threading.enumerate():
+            if thread.name.startswith('text-index-') or thread.name == 'autocomplete-rebuild':
+                thread.join(timeout=30)
+        self.assertIsNotNone(text_index.loaded_text_index('similar'))
+
+        job = Job.objects.create(title='Java Engineer', skills_required='java, spring', **self.job_kwargs)
+        self.assertEqual(self.neighbors(job)[0], self.java.pk)
+        job.title = 'Python Engineer'
+        job.skills_required = 'python, django'
+        job.save()
+        self.assertEqual(self.neighbors(job)[0], self.python.pk)
+
+
+class JobAlertTests(TestCase):
+    def setUp(self):
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.seeker = User.objects.create_user('seeker', password='pw', email='seeker@example.com')
+        self.company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.other_company = Company.objects.create(name='Other', description='d', industry='Tech', location='Paris')
+
+    def search(self, **criteria):
+        return SavedSearch.objects.create(user=self.seeker, **criteria)
+
+    def create_job(self, **fields):
+        fields = {
+            'title': 'Backend Engineer', 'company': self.company, 'description': 'Build APIs',
+            'requirements': 'r', 'responsibilities': 'r', 'location': 'Berlin, Germany',
+            'posted_by': self.employer, 'skills_required': 'python, kubernetes',
+            'job_type': 'full_time', 'experience_level': 'senior',
+            'salary_min': 60000, 'salary_max': 80000, **fields,
+        }
+        return Job.objects.create(**fields)
+
+    def alerted_searches(self, job):
+        return set(JobAlert.objects.filter(job=job).values_list('saved_search_id', flat=True))
+
+    def test_new_jobs_are_matched_by_the_alerts_run_not_the_request(self):
+        anything = self.search()
+        keyword = self.search(keywords='Kubernetes')
+        place_and_level = self.search(location='berlin', experience_level='senior')
+        company = self.search(company=self.company)
+        salary_in_range = self.search(salary_min=70000)
+        misses = [
+            self.search(keywords='kubernetes golang'),
+            self.search(location='Paris'),
+            self.search(company=self.other_company),
+            self.search(job_type='contract'),
+            self.search(salary_min=90000),
+            self.search(salary_max=50000),
+            self.search(keywords='python', is_active=False),
+        ]
+        job = self.create_job()
+        self.assertFalse(JobAlert.objects.exists())
+        self.assertTrue(Job.objects.get(pk=job.pk).alerts_pending)
+
+        self.assertEqual(queue_pending_alerts(), (1, 5))
+        self.assertEqual(
+            self.alerted_searches(job),
+            {anything.pk, keyword.pk, place_and_level.pk, company.pk, salary_in_range.pk},
+        )
+        self.assertFalse(self.alerted_searches(job) & {search.pk for search in misses})
+        self.assertFalse(Job.objects.get(pk=job.pk).alerts_pending)
+
+    def test_matching_again_does_not_duplicate_alerts(self):
+        self.search(keywords='python')
+        job = self.create_job()
+        queue_pending_alerts()
+        self.assertEqual(queue_pending_alerts(), (0, 0))
+        queue_alerts([job])
+        self.assertEqual(JobAlert.objects.filter(job=job).count(), 1)
+
+    def test_inactive_jobs_queue_nothing(self):
+        self.search()
+        job = self.create_job(is_active=False)
+        self.assertEqual(queue_pending_alerts(), (1, 0))
+        self.assertFalse(Job.objects.get(pk=job.pk).alerts_pending)
+
+    def test_deliver_sends_one_email_per_user(self):
+        self.search(keywords='python')
+        self.search(location='Berlin')
+        self.create_job()
+        self.create_job(title='Platform Engineer')
+        queue_pending_alerts()
+        self.assertEqual(deliver_alerts(), (4, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(JobAlert.objects.filter(delivered_at__isnull=True).exists())
+
+
+class RankedApplicantsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.job = Job.objects.create(
+            title='Backend Engineer', company=company, description='d', requirements='r',
+            responsibilities='r', location='Berlin', posted_by=self.employer,
+            skills_required='python, django, postgresql',
+        )
+        self.client.force_authenticate(self.employer)
+
+    def apply(self, username, skills):
+        applicant = User.objects.create_user(username, password='pw', skills=skills)
+        return JobApplication.objects.create(job=self.job, applicant=applicant)
+
+    def test_best_match_first(self):
+        weak = self.apply('weak', 'excel')
+        strong = self.apply('strong', 'python, django, postgresql')
+        partial = self.apply('partial', 'python')
+        response = self.client.get(f'/api/applications/ranked/?job={self.job.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [strong.pk, partial.pk, weak.pk])
+        self.assertFalse(JobApplication.objects.filter(match_score__isnull=True).exists())
+
+    def test_malformed_job_is_a_bad_request(self):
+        for query in ('', '?job=', '?job=abc', '?job=1.5'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/applications/ranked/{query}').status_code, 400)
+
+    def test_other_employers_job_is_not_found(self):
+        other = User.objects.create_user('other', password='pw', user_type='employer')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/applications/ranked/?job={self.job.pk}').status_code, 404)
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.jobs = [
+            Job.objects.create(
+                title=f'Job {i}', company=company, description='d', requirements='r',
+                responsibilities='r', location='Berlin', posted_by=self.employer,
+            )
+            for i in range(2)
+        ]
+        self.seekers = [User.objects.create_user(f'seeker{i}', password='pw') for i in range(3)]
+        self.client.force_authenticate(self.employer)
+
+    def dashboard(self):
+        response = self.client.get('/api/jobs/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts_per_status_job_and_totals(self):
+        first, second = self.jobs
+        JobApplication.objects.create(job=first, applicant=self.seekers[0])
+        JobApplication.objects.create(job=first, applicant=self.seekers[1], status='shortlisted')
+        JobApplication.objects.create(job=second, applicant=self.seekers[2], status='hired')
+        Bookmark.objects.create(job=first, user=self.seekers[0])
+        other = User.objects.create_user('other', password='pw', user_type='employer')
+        Job.objects.create(
+            title='Elsewhere', company=first.company, description='d', requirements='r',
+            responsibilities='r', location='Berlin', posted_by=other,
+        )
+
+        data = self.dashboard()
+        self.assertEqual(data['totals']['jobs'], 2)
+        self.assertEqual(data['totals']['applications'], 3)
+        self.assertEqual(data['totals']['bookmarks'], 1)
+        self.assertEqual(
+            data['totals']['by_status'],
+            {'pending': 1, 'under_review': 0, 'shortlisted': 1, 'rejected': 0, 'hired': 1},
+        )
+        by_job = {job['id']: job for job in data['jobs']}
+        self.assertEqual(by_job[first.pk]['total_applications'], 2)
+        self.assertEqual(by_job[first.pk]['applications']['shortlisted'], 1)
+        self.assertEqual(by_job[second.pk]['applications']['hired'], 1)
+        self.assertEqual(by_job[first.pk]['bookmark_count'], 1)
+
+    def test_application_changes_invalidate_the_cached_dashboard(self):
+        self.assertEqual(self.dashboard()['totals']['applications'], 0)
+        application = JobApplication.objects.create(job=self.jobs[0], applicant=self.seekers[0])
+        self.assertEqual(self.dashboard()['totals']['by_status']['pending'], 1)
+
+        application.status = 'rejected'
+        application.save()
+        self.assertEqual(self.dashboard()['totals']['by_status']['rejected'], 1)
+
+        self.client.post(
+            '/api/applications/bulk_status/', {'status': 'hired', 'filter': {'job': self.jobs[0].pk}}, format='json'
+        )
+        self.assertEqual(self.dashboard()['totals']['by_status']['hired'], 1)
+
+        application.delete()
+        self.assertEqual(self.dashboard()['totals']['applications'], 0)
+
+    def test_bookmark_counts_lag_until_the_cache_expires(self):
+        self.assertEqual(self.dashboard()['totals']['bookmarks'], 0)
+        Bookmark.objects.create(job=self.jobs[0], user=self.seekers[0])
+        self.assertEqual(self.dashboard()['totals']['bookmarks'], 0)
+        cache.clear()
+        self.assertEqual(self.dashboard()['totals']['bookmarks'], 1)
+
+    def test_job_seekers_are_forbidden(self):
+        self.client.force_authenticate(self.seekers[0])
+        self.assertEqual(self.client.get('/api/jobs/dashboard/').status_code, 403)
+
+
+class BulkStatusTests(TestCase):
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        jobs = [
+            Job.objects.create(
+                title=f'Job {i}', company=company, description='d', requirements='r',
+                responsibilities='r', location='Berlin', posted_by=self.employer,
+            )
+            for i in range(2)
+        ]
+        seeker = User.objects.create_user('seeker', password='pw')
+        self.applications = [JobApplication.objects.create(job=job, applicant=seeker) for job in jobs]
+        self.client.force_authenticate(self.employer)
+
+    def post(self, data):
+        return self.client.post('/api/applications/bulk_status/', data, format='json')
+
+    def test_filter_moves_only_matching_applications(self):
+        response = self.post({'status': 'rejected', 'filter': {'job': self.applications[0].job_id}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(
+            list(JobApplication.objects.order_by('pk').values_list('status', flat=True)), ['rejected', 'pending']
+        )
+
+    def test_empty_or_unknown_filters_are_rejected(self):
+        for bad in ({}, {'job': ''}, {'status': []}, {'applicant': 1}, {'job': self.applications[0].job_id, 'jobs': 1}):
+            with self.subTest(filter=bad):
+                response = self.post({'status': 'rejected', 'filter': bad})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('filter', response.data)
+        self.assertFalse(JobApplication.objects.exclude(status='pending').exists())
+
+
+class JobImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.client.force_authenticate(self.employer)
+
+    def upload(self, content, name='jobs.csv'):
+        return self.client.post(
+            '/api/jobs/import/', {'file': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+
+    def csv_rows(self, *titles):
+        header = b'title,company_name,description,requirements,responsibilities,location,skills_required\n'
+        return header + b''.join(b'%s,Acme,d,r,r,Berlin,python\n' % title for title in titles)
+
+    def test_valid_rows_are_imported_and_invalid_ones_reported(self):
+        response = self.upload(self.csv_rows(b'Engineer', b'Designer') + b'Tester,Nobody,d,r,r,Berlin,python\n')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1))
+        self.assertEqual(response.data['errors'], [{'row': 4, 'errors': {'company': ['Company not found.']}}])
+        self.assertIsNone(response.data['stopped_at'])
+
+    def test_invalid_utf8_is_a_bad_request_with_its_line(self):
+        response = self.upload(self.csv_rows(b'Engineer', b'Ing\xe9nieur', b'Designer'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['stopped_at'], 3)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertIn('utf-8', response.data['errors'][0]['errors']['non_field_errors'][0])
+        self.assertEqual(list(Job.objects.values_list('title', flat=True)), ['Engineer'])
+
+    def test_malformed_csv_is_a_bad_request_with_its_line(self):
+        response = self.upload(self.csv_rows(b'Engineer') + b'Designer,Acme,%s,r,r,Berlin,python\n' % (b'd' * 200000))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['stopped_at'], 3)
+        self.assertIn('Invalid CSV', response.data['errors'][0]['errors']['non_field_errors'][0])
+
+    def test_invalid_utf8_in_ndjson(self):
+        lines = b'{"title": "Engineer"}\n{"title": "\xff"}\n'
+        response = self.upload(lines, name='jobs.ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['stopped_at'], 2)
+
+
+class GeoSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+
+    def create_job(self, title, location):
+        return Job.objects.create(
+            title=title, company=self.company, description='d', requirements='r',
+            responsibilities='r', location=location, posted_by=self.employer,
+        )
+
+    def near(self, point, radius_km=None):
+        query = f'?near={point}' + (f'&radius_km={radius_km}' if radius_km is not None else '')
+        return [job['title'] for job in self.client.get(f'/api/jobs/{query}').data['results']]
+
+    def test_unknown_locations_fall_back_to_the_company(self):
+        job = self.create_job('Remote', 'Anywhere on earth')
+        self.assertEqual((job.latitude, job.longitude), (self.company.latitude, self.company.longitude))
+        self.assertEqual(self.create_job('Munich', 'München, Germany').latitude, 48.1351)
+
+    def test_fallback_jobs_follow_the_company_location(self):
+        fallback = self.create_job('Remote', 'Anywhere on earth')
+        own = self.create_job('Hamburg', 'Hamburg')
+        self.company.location = 'Paris, France'
+        self.company.save()
+        fallback.refresh_from_db()
+        own.refresh_from_db()
+        self.assertEqual((fallback.latitude, fallback.longitude), (48.8566, 2.3522))
+        self.assertEqual((own.latitude, own.longitude), (53.5511, 9.9937))
+
+        self.company.location = 'Atlantis'
+        self.company.save(update_fields=['location'])
+        fallback.refresh_from_db()
+        self.assertEqual((fallback.latitude, fallback.longitude, fallback.geo_cell), (None, None, None))
+
+    def test_near_keeps_jobs_in_the_radius_nearest_first(self):
+        self.create_job('Hamburg', 'Hamburg')
+        self.create_job('Berlin', 'Berlin')
+        self.create_job('Munich', 'Munich')
+        self.create_job('Paris', 'Paris')
+        # Potsdam is about 27 km from Berlin, 250 km from Hamburg and 500 km from Munich.
+        self.assertEqual(self.near('52.39,13.06'), ['Berlin'])
+        self.assertEqual(self.near('52.39,13.06', 600), ['Berlin', 'Hamburg', 'Munich'])
+
+    def test_invalid_point_is_a_bad_request(self):
+        self.assertEqual(self.client.get('/api/jobs/?near=north').status_code, 400)
+
+
+class ApplicationExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        job = Job.objects.create(
+            title='Job', company=company, description='d', requirements='r',
+            responsibilities='r', location='Berlin', posted_by=self.employer,
+        )
+        seeker = User.objects.create_user('seeker', password='pw', first_name='@SUM(A1)', last_name='-2+3')
+        JobApplication.objects.create(job=job, applicant=seeker, cover_letter='=HYPERLINK("http://x")')
+        self.client.force_authenticate(self.employer)
+
+    def export(self, file_format):
+        response = self.client.get(f'/api/applications/export/?file_format={file_format}')
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_cells_cannot_run_as_formulas(self):
+        row = next(csv.DictReader(io.StringIO(self.export('csv'))))
+        self.assertEqual(row['cover_letter'], '\'=HYPERLINK("http://x")')
+        self.assertEqual((row['applicant_first_name'], row['applicant_last_name']), ("'@SUM(A1)", "'-2+3"))
+        self.assertEqual(row['status'], 'pending')
+
+    def test_ndjson_values_are_unchanged(self):
+        row = json.loads(self.export('ndjson'))
+        self.assertEqual(row['cover_letter'], '=HYPERLINK("http://x")')
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        text_index._indexes.pop('recommendations', None)
+        self.addCleanup(text_index._building.discard, 'recommendations')
+        self.client = APIClient(SERVER_NAME='localhost')
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.jobs = {
+            title: Job.objects.create(
+                title=title, company=company, description='d', requirements='r', responsibilities='r',
+                location='Berlin', posted_by=employer, skills_required=skills,
+            )
+            for title, skills in (
+                ('Python Developer', 'python, django'), ('Java Developer', 'java, spring'), ('Designer', 'figma'),
+            )
+        }
+        self.seeker = User.objects.create_user('seeker', password='pw', skills='python, django')
+        JobApplication.objects.create(job=self.jobs['Designer'], applicant=self.seeker)
+        self.client.force_authenticate(self.seeker)
+
+    def recommend(self):
+        return self.client.get('/api/jobs/recommendations/').data
+
+    def test_latest_jobs_until_the_index_is_built(self):
+        with mock.patch.object(text_index.threading, 'Thread') as thread:
+            data = self.recommend()
+            self.recommend()
+        thread.return_value.start.assert_called_once_with()
+        self.assertTrue(data['degraded'])
+        self.assertEqual([job['title'] for job in data['results']], ['Java Developer', 'Python Developer'])
+        self.assertEqual({job['score'] for job in data['results']}, {None})
+        self.assertIsNone(text_index.loaded_text_index())
+
+    def test_ranked_once_the_index_is_built(self):
+        text_index.get_text_index()
+        data = self.recommend()
+        self.assertNotIn('degraded', data)
+        self.assertEqual(data['results'][0]['title'], 'Python Developer')
+        self.assertGreater(data['results'][0]['score'], 0)
+        self.assertNotIn('Designer', [job['title'] for job in data['results']])
+
+
+class SkillTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+
+    def create_job(self, title, skills):
+        return Job.objects.create(
+            title=title, company=self.company, description='d', requirements='r', responsibilities='r',
+            location='Berlin', posted_by=self.employer, skills_required=skills,
+        )
+
+    def titles(self, query):
+        return sorted(job['title'] for job in self.client.get(f'/api/jobs/?{query}').data['results'])
+
+    def test_parse_skills(self):
+        self.assertEqual(
+            parse_skills(' Python ; JS, python\n- Docker -\n• Research and Development / R&D'),
+            ['python', 'js', 'docker', 'research and development', 'r&d'],
+        )
+        self.assertEqual(parse_skills('we are looking for somebody who loves to code'), [])
+
+    def test_jobs_get_aliased_skills_and_unknown_ones_unverified(self):
+        job = self.create_job('Backend', 'JS, Postgres, Terraform')
+        skills = dict(job.normalized_skills.values_list('name', 'verified'))
+        self.assertEqual(skills, {'javascript': True, 'postgresql': True, 'terraform': False})
+
+    def test_match_all_and_any(self):
+        self.create_job('Full stack', 'python, js')
+        self.create_job('Backend', 'python3, postgres')
+        self.create_job('Frontend', 'javascript')
+        self.assertEqual(self.titles('skills=python'), ['Backend', 'Full stack'])
+        self.assertEqual(self.titles('skills=python,javascript'), ['Full stack'])
+        self.assertEqual(self.titles('skills=python,ecmascript&match=any'), ['Backend', 'Frontend', 'Full stack'])
+        self.assertEqual(self.titles('skills=python,cobol'), [])
+        self.assertEqual(self.titles('skills=python,cobol&match=any'), ['Backend', 'Full stack'])
+
+    def test_parsed_skills_filter_without_being_verified(self):
+        self.create_job('Analyst', 'python, sql')
+        self.create_job('Infra', 'terraform, sql')
+        self.assertFalse(Skill.objects.get(name='sql').verified)
+        self.assertEqual(self.titles('skills=sql'), ['Analyst', 'Infra'])
+        self.assertEqual(self.titles('skills=sql,terraform'), ['Infra'])
+        self.assertEqual(self.titles('skills=terraform,nosuchskill&match=any'), ['Infra'])
+        self.assertEqual(self.titles('skills=nosuchskill&match=any'), [])
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+
+    def create_job(self, children):
+        job = Job.objects.create(
+            title='Job', company=self.company, description='d', requirements='r',
+            responsibilities='r', location='Berlin', posted_by=self.employer,
+        )
+        for i in range(children):
+            seeker = User.objects.create_user(f'seeker-{job.pk}-{i}', password='pw')
+            JobApplication.objects.create(job=job, applicant=seeker)
+            Bookmark.objects.create(job=job, user=seeker)
+        return job
+
+    def delete_queries(self, job):
+        with CaptureQueriesContext(connection) as queries:
+            job.delete()
+        return len(queries)
+
+    def test_deleting_a_job_does_not_update_counters_per_child(self):
+        self.assertEqual(self.delete_queries(self.create_job(2)), self.delete_queries(self.create_job(8)))
+        self.assertFalse(JobApplication.objects.exists())
+        self.assertEqual(Company.objects.get(pk=self.company.pk).active_job_count, 0)
+
+    def test_deleting_children_still_decrements(self):
+        job = self.create_job(3)
+        JobApplication.objects.filter(job=job).first().delete()
+        Bookmark.objects.filter(job=job).last().user.delete()
+        job.refresh_from_db()
+        self.assertEqual((job.application_count, job.bookmark_count), (1, 2))
+
+    def test_creating_children_increments(self):
+        job = self.create_job(3)
+        job.refresh_from_db()
+        self.assertEqual((job.application_count, job.bookmark_count), (3, 3))
+
+    def test_active_job_count_follows_activation_and_moves(self):
+        other = Company.objects.create(name='Globex', description='d', industry='Tech', location='Paris')
+
+        def counts():
+            return [
+                Company.objects.get(pk=company.pk).active_job_count for company in (self.company, other)
+            ]
+
+        job = self.create_job(0)
+        self.assertEqual(counts(), [1, 0])
+        job.is_active = False
+        job.save()
+        self.assertEqual(counts(), [0, 0])
+        job.is_active = True
+        job.save()
+        self.assertEqual(counts(), [1, 0])
+        job.company = other
+        job.save()
+        self.assertEqual(counts(), [0, 1])
+        job.company, job.is_active = self.company, False
+        job.save()
+        self.assertEqual(counts(), [0, 0])
+
+    def test_reconcile_counters_fixes_drift(self):
+        drifted, correct = self.create_job(2), self.create_job(1)
+        Job.objects.filter(pk=drifted.pk).update(application_count=7, bookmark_count=0)
+        Company.objects.filter(pk=self.company.pk).update(active_job_count=5)
+
+        def stored():
+            drifted.refresh_from_db()
+            correct.refresh_from_db()
+            return (
+                drifted.application_count, drifted.bookmark_count, correct.application_count,
+                Company.objects.get(pk=self.company.pk).active_job_count,
+            )
+
+        out = io.StringIO()
+        call_command('reconcile_counters', dry_run=True, batch_size=1, stdout=out)
+        self.assertIn('Found drifted counters on 1 jobs and 1 companies', out.getvalue())
+        self.assertEqual(stored(), (7, 0, 1, 5))
+
+        out = io.StringIO()
+        call_command('reconcile_counters', batch_size=1, stdout=out)
+        self.assertIn('Fixed drifted counters on 1 jobs and 1 companies', out.getvalue())
+        self.assertEqual(stored(), (2, 2, 1, 2))
+
+    def test_popularity_ordering_adds_applications_and_bookmarks(self):
+        cache.clear()
+        jobs = {}
+        for title, applications, bookmarks in (('Applied', 2, 0), ('Bookmarked', 1, 3), ('Quiet', 0, 0)):
+            jobs[title] = self.create_job(0)
+            Job.objects.filter(pk=jobs[title].pk).update(
+                title=title, application_count=applications, bookmark_count=bookmarks,
+            )
+        client = APIClient(SERVER_NAME='localhost')
+
+        def titles(ordering):
+            return [job['title'] for job in client.get(f'/api/jobs/?ordering={ordering}').data['results']]
+
+        self.assertEqual(titles('-popularity'), ['Bookmarked', 'Applied', 'Quiet'])
+        self.assertEqual(titles('-application_count'), ['Applied', 'Bookmarked', 'Quiet'])
+
+
+@override_settings(SSE_KEEPALIVE=60)
+class JobStreamTests(TestCase):
+    def setUp(self):
+        self.broadcast = LocalBroadcast(max_subscribers=2, queue_size=2)
+        patcher = mock.patch.object(broadcast, '_broadcast', self.broadcast)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+
+    def job(self, **fields):
+        return Job(**{
+            'title': 'Job', 'company': self.company, 'description': 'd', 'requirements': 'r',
+            'responsibilities': 'r', 'location': 'Berlin', 'posted_by': self.employer,
+            'job_type': 'full_time', **fields,
+        })
+
+    async def open_stream(self, query=''):
+        response = await job_stream(AsyncRequestFactory().get(f'/api/jobs/stream/{query}'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b': connected', await self.next_frame(stream))
+        return stream
+
+    async def next_frame(self, stream):
+        return await asyncio.wait_for(anext(stream), 1)
+
+    def parse(self, frame):
+        event, data = frame.decode().strip().split('\n')
+        return event.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+    @sync_to_async
+    def save(self, job):
+        with self.captureOnCommitCallbacks(execute=True):
+            job.save()
+        return job
+
+    async def test_created_deactivated_and_activated_events(self):
+        stream = await self.open_stream()
+        job = await self.save(self.job(title='Live'))
+        await self.save(self.job(title='Draft', is_active=False))
+        events = [self.parse(await self.next_frame(stream))]
+        job.is_active = False
+        await self.save(job)
+        job.is_active = True
+        await self.save(job)
+        events += [self.parse(await self.next_frame(stream)) for _ in range(2)]
+        self.assertEqual([name for name, _ in events], ['created', 'deactivated', 'activated'])
+        self.assertEqual({data['id'] for _, data in events}, {job.pk})
+        self.assertEqual(events[0][1]['title'], 'Live')
+
+    async def test_filters(self):
+        other = await Company.objects.acreate(name='Other', description='d', industry='Tech', location='Paris')
+        stream = await self.open_stream(f'?job_type=contract&location=BERLIN&company={self.company.pk}')
+        misses = [
+            self.job(pk=1, job_type='full_time'),
+            self.job(pk=2, job_type='contract', location='Berlin, Germany'),
+            self.job(pk=3, job_type='contract', company=other),
+        ]
+        publish_job_events([job_event(job, 'created') for job in misses])
+        publish_job_events([job_event(self.job(pk=4, job_type='contract'), 'created')])
+        self.assertEqual(self.parse(await self.next_frame(stream))[1]['id'], 4)
+
+    async def test_slow_client_is_told_to_resync_and_dropped(self):
+        stream = await self.open_stream()
+        publish_job_events([job_event(self.job(pk=pk), 'created') for pk in range(1, 4)])
+        self.assertEqual(await self.next_frame(stream), b'event: overflow\ndata: {}\n\n')
+        with self.assertRaises(StopAsyncIteration):
+            await self.next_frame(stream)
+        self.assertEqual(self.broadcast._count, 0)
+
+    async def test_full_worker_answers_503(self):
+        await self.open_stream()
+        await self.open_stream()
+        response = await job_stream(AsyncRequestFactory().get('/api/jobs/stream/'))
+        self.assertEqual(response.status_code, 503)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.acme = Company.objects.create(name='Acme Robotics', description='d', industry='Tech', location='Berlin')
+
+    def create_job(self, title, skills='', description='Join our team.', **fields):
+        return Job.objects.create(
+            title=title, company=self.acme, description=description, requirements='r',
+            responsibilities='r', location='Berlin', posted_by=self.employer, skills_required=skills, **fields,
+        )
+
+    def search(self, query):
+        cache.clear()
+        return [job['title'] for job in self.client.get(f'/api/jobs/?{query}').data['results']]
+
+    def test_every_word_must_match_title_skills_description_or_company(self):
+        self.create_job('Backend Engineer', skills='python, postgresql')
+        self.create_job('Data Engineer', skills='python, spark')
+        self.create_job('Designer', description='Figma all day.')
+        self.assertEqual(sorted(self.search('search=python')), ['Backend Engineer', 'Data Engineer'])
+        self.assertEqual(self.search('search=python postgresql'), ['Backend Engineer'])
+        self.assertEqual(self.search('search=figma'), ['Designer'])
+        self.assertEqual(len(self.search('search=acme')), 3)
+        self.assertEqual(self.search('search=cobol'), [])
+
+    def test_best_match_first_unless_ordered(self):
+        # Created first, so the default newest-first order would put it last.
+        self.create_job('Python Developer', skills='python, django', salary_min=50000)
+        self.create_job('Office Manager', salary_min=90000, description=f"{'Busy office. ' * 20}Some python scripting.")
+        self.assertEqual(self.search('search=python'), ['Python Developer', 'Office Manager'])
+        self.assertEqual(self.search('search=python&ordering=-salary_min'), ['Office Manager', 'Python Developer'])
+
+    def test_index_follows_saves_and_deletes(self):
+        job = self.create_job('Python Developer')
+        job.title = 'Rust Developer'
+        job.save()
+        self.assertEqual(self.search('search=python'), [])
+        self.assertEqual(self.search('search=rust'), ['Rust Developer'])
+        self.acme.name = 'Initech'
+        self.acme.save()
+        self.assertEqual(self.search('search=initech'), ['Rust Developer'])
+        job.delete()
+        self.assertEqual(self.search('search=rust'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.create_job('C++ Developer', skills='c++')
+        for query in ('"c++', 'c++ OR', 'NEAR(c', '*', 'c++ -java'):
+            with self.subTest(query=query):
+                response = self.client.get('/api/jobs/', {'search': query})
+                self.assertEqual(response.status_code, 200)
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.acme = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        self.globex = Company.objects.create(name='Globex', description='d', industry='Tech', location='Paris')
+        rows = [
+            ('Python Developer', 'python', self.acme, 'Berlin', 'full_time', 60000),
+            ('Python Data Engineer', 'python, spark', self.acme, 'Paris', 'contract', 120000),
+            ('Python Intern', 'python', self.globex, 'Berlin', 'internship', None),
+            ('Java Developer', 'java', self.globex, 'Berlin', 'full_time', 60000),
+            ('Closed Python Role', 'python', self.acme, 'Berlin', 'full_time', 60000),
+        ]
+        for title, skills, company, location, job_type, salary_min in rows:
+            Job.objects.create(
+                title=title, company=company, description='d', requirements='r', responsibilities='r',
+                location=location, posted_by=employer, skills_required=skills, job_type=job_type,
+                salary_min=salary_min, is_active=not title.startswith('Closed'),
+            )
+
+    def facets(self, **params):
+        response = self.client.get('/api/jobs/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, data, facet):
+        return {row['value']: row['count'] for row in data['facets'][facet] if row['count']}
+
+    def test_counts_over_active_jobs(self):
+        data = self.facets()
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(self.counts(data, 'job_type'), {'full_time': 2, 'contract': 1, 'internship': 1})
+        self.assertEqual(self.counts(data, 'location'), {'Berlin': 3, 'Paris': 1})
+        self.assertEqual(self.counts(data, 'company'), {self.acme.pk: 2, self.globex.pk: 2})
+        self.assertEqual(self.counts(data, 'salary'), {'50000-75000': 2, '100000-150000': 1, 'unspecified': 1})
+
+    def test_counts_follow_search_and_filters(self):
+        data = self.facets(search='python')
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(self.counts(data, 'job_type'), {'full_time': 1, 'contract': 1, 'internship': 1})
+        self.assertEqual(self.counts(data, 'company'), {self.acme.pk: 2, self.globex.pk: 1})
+
+        data = self.facets(search='python', location='Berlin')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(self.counts(data, 'location'), {'Berlin': 2})
+        self.assertEqual(self.counts(data, 'salary'), {'50000-75000': 1, 'unspecified': 1})
+
+        self.assertEqual(self.facets(search='cobol')['count'], 0)
+
+    def test_facet_limit_caps_open_facets(self):
+        data = self.facets(facet_limit=1)
+        self.assertEqual(data['facets']['location'], [{'value': 'Berlin', 'count': 3}])
+        self.assertEqual(len(data['facets']['company']), 1)
+        self.assertEqual(len(self.facets(facet_limit='many')['facets']['location']), 2)
+
+    def test_only_unfiltered_facets_are_cached(self):
+        self.assertEqual(self.client.get('/api/jobs/facets/').headers['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/jobs/facets/').headers['X-Cache'], 'HIT')
+        response = self.client.get('/api/jobs/facets/', {'search': 'python'})
+        self.assertNotIn('X-Cache', response.headers)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        self.company = Company.objects.create(name='Pyramid Labs', description='d', industry='Tech', location='Berlin')
+        for title, location in (
+            ('Python Developer', 'Berlin'),
+            ('Python Developer', 'Paris'),
+            ('Senior Python Engineer', 'Berlin'),
+            ('Java Developer', 'Berlin'),
+        ):
+            self.create_job(title, location)
+        # The indexes are process-wide; later tests build their own.
+        self.addCleanup(setattr, autocomplete, 'built_at', None)
+        autocomplete.build()
+
+    def create_job(self, title, location='Berlin', **fields):
+        return Job.objects.create(
+            title=title, company=self.company, description='d', requirements='r', responsibilities='r',
+            location=location, posted_by=self.employer, **fields,
+        )
+
+    def suggest(self, **params):
+        response = self.client.get('/api/autocomplete/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_word_starts_match_heaviest_first(self):
+        self.assertEqual(
+            self.suggest(q='py'),
+            {'title': ['Python Developer', 'Senior Python Engineer'], 'company': ['Pyramid Labs'], 'location': []},
+        )
+        self.assertEqual(self.suggest(q='  DEV ')['title'], ['Python Developer', 'Java Developer'])
+        self.assertEqual(self.suggest(q='ython')['title'], [])
+        self.assertEqual(self.suggest(q='')['title'], [])
+
+    def test_type_and_limit(self):
+        self.assertEqual(self.suggest(q='p', type='title,bogus', limit=1), {'title': ['Python Developer']})
+        self.assertEqual(self.suggest(q='b', type='location', limit='x'), {'location': ['Berlin']})
+        response = self.client.get('/api/autocomplete/', {'q': 'p'})
+        self.assertIn('public', response.headers['Cache-Control'])
+        self.assertIn('max-age=60', response.headers['Cache-Control'])
+
+    def test_empty_and_uncached_until_the_background_build_is_done(self):
+        autocomplete.built_at = None
+        self.addCleanup(setattr, autocomplete, '_rebuilding', False)
+        with mock.patch.object(autocomplete_module.threading, 'Thread') as thread:
+            response = self.client.get('/api/autocomplete/', {'q': 'py', 'type': 'title'})
+            self.client.get('/api/autocomplete/', {'q': 'py'})
+        thread.return_value.start.assert_called_once_with()
+        self.assertEqual(response.json(), {'title': [], 'degraded': True})
+        self.assertIn('no-store', response.headers['Cache-Control'])
+
+        autocomplete._rebuild()
+        self.assertEqual(self.suggest(q='py', type='title'), {'title': ['Python Developer', 'Senior Python Engineer']})
+
+    def test_job_and_company_changes_update_the_indexes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rust = self.create_job('Rust Developer', location='Lisbon')
+        self.assertEqual(self.suggest(q='rust')['title'], ['Rust Developer'])
+        self.assertEqual(self.suggest(q='lis')['location'], ['Lisbon'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rust.is_active = False
+            rust.save()
+        self.assertEqual(self.suggest(q='rust')['title'], [])
+        self.assertEqual(self.suggest(q='lis')['location'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = 'Initech'
+            self.company.save()
+        self.assertEqual(self.suggest(q='pyr')['company'], [])
+        self.assertEqual(self.suggest(q='init')['company'], ['Initech'])
+
+
+class PrefixIndexTests(TestCase):
+    def test_memoized_short_prefixes_follow_weight_changes(self):
+        index = PrefixIndex(drop_empty=True)
+        index.load([('go developer', 'Go Developer', 2), ('golang lead', 'Golang Lead', 1)])
+        self.assertEqual(index.lookup('go'), ['Go Developer', 'Golang Lead'])
+        index.add_weight('golang lead', 5)
+        self.assertEqual(index.lookup('go'), ['Golang Lead', 'Go Developer'])
+        index.add_weight('golang lead', -6)
+        self.assertEqual(index.lookup('go'), ['Go Developer'])
+
+    def test_delta_entries_are_found_until_the_next_load(self):
+        index = PrefixIndex()
+        index.load([(1, 'Acme', 3)])
+        index.set(2, 'Acorn', 1)
+        index.set(1, 'Zenith')
+        self.assertEqual(index.lookup('ac'), ['Acorn'])
+        self.assertEqual(index.lookup('zen'), ['Zenith'])
+        self.assertEqual(index.delta_size, 2)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        employer = User.objects.create_user('employer', password='pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Berlin')
+        for i in range(25):
+            Job.objects.create(
+                title=f'Job {i}', company=company, description='d', requirements='r', responsibilities='r',
+                location='Berlin', posted_by=employer, salary_min=None if i % 4 == 0 else 1000 * (i % 3),
+            )
+        # Every row ties on posted_at, so only the id tiebreaker orders them.
+        Job.objects.update(posted_at=timezone.now())
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, url):
+        pages = [self.get(url)]
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+        return pages
+
+    def ids(self, page):
+        return [job['id'] for job in page['results']]
+
+    def test_ties_are_never_skipped_or_repeated(self):
+        pages = self.walk('/api/jobs/?pagination=cursor')
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(map(self.ids, pages), []), sorted(Job.objects.values_list('id', flat=True), reverse=True))
+        self.assertIsNone(pages[0]['previous'])
+        self.assertNotIn('count', pages[0])
+
+    def test_previous_links_lead_back_to_the_same_pages(self):
+        pages = self.walk('/api/jobs/?pagination=cursor')
+        back = self.get(pages[2]['previous'])
+        self.assertEqual(self.ids(back), self.ids(pages[1]))
+        self.assertEqual(self.ids(self.get(back['previous'])), self.ids(pages[0]))
+
+    def test_nullable_ordering_puts_nulls_last(self):
+        pages = self.walk('/api/jobs/?pagination=cursor&ordering=salary_min')
+        rows = sum((page['results'] for page in pages), [])
+        expected = list(
+            Job.objects.order_by(F('salary_min').asc(nulls_last=True), 'id').values_list('id', flat=True)
+        )
+        self.assertEqual([row['id'] for row in rows], expected)
+
+    def test_approximate_count_on_request(self):
+        self.assertEqual(self.get('/api/jobs/?pagination=cursor&count=approx')['count'], 25)
+
+    def test_invalid_cursors_are_not_found(self):
+        valid = self.get('/api/jobs/?pagination=cursor')['next']
+        cursor = parse_qs(urlsplit(valid).query)['cursor'][0]
+        wrong_length = urlsafe_b64encode(b'{"p":[1],"r":0}').decode()
+        bad_date = urlsafe_b64encode(b'{"p":["yesterday",1],"r":0}').decode()
+        for bad in ('garbage', cursor[:-4], '%%%', wrong_length, bad_date, urlsafe_b64encode(b'[]').decode()):
+            with self.subTest(cursor=bad):
+                response = self.client.get('/api/jobs/', {'pagination': 'cursor', 'cursor': bad})
+                self.assertEqual(response.status_code, 404)
+
+
+class QueryPlanTests(TestCase):
+    def test_viewset_querysets_avoid_sequential_scans(self):
+        out = io.StringIO()
+        call_command('check_query_plans', jobs=400, stdout=out)
+        self.assertIn('ok        job feed\n', out.getvalue())
+        self.assertNotIn('SEQ SCAN', out.getvalue())
+
+    def test_feed_uses_the_partial_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('plan text is SQLite specific')
+        company = Company.objects.create(name='Acme', description='d', industry='Tech', location='Remote')
+        employer = User.objects.create_user(username='boss', password='pw', user_type='employer')
+        Job.objects.bulk_create(
+            Job(
+                title=f'Job {i}', company=company, description='d', requirements='r',
+                responsibilities='r', location='Remote', posted_by=employer, skills_required='python',
+                job_type='full_time', is_active=i % 5 != 0,
+            )
+            for i in range(200)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        active = Job.objects.filter(is_active=True)
+        plans = {
+            'job_active_feed_idx': active.order_by('-posted_at', '-id')[:10],
+            'job_active_type_idx': active.filter(job_type='full_time').order_by('-posted_at', '-id')[:10],
+            'job_active_apps_idx': active.order_by('-application_count', '-id')[:10],
+        }
+        for index, queryset in plans.items():
+            with self.subTest(index=index):
+                self.assertIn(index, queryset.explain())
@@ -0,0 +1,369 @@
+"""
+In-memory TF-IDF index over active jobs for skill-based recommendations.
+
+Each job becomes a sparse, L2-normalized row of term frequencies over its
+skills, title and description; inverse document frequencies are applied on
+the query side so they never go stale in stored rows. Terms are hashed
+into a fixed number of columns, so new jobs never require refitting a
+vocabulary. Rows are kept in a CSC matrix, which lets a query touch only
+the columns of its own terms, plus a small CSR delta of recently changed
+rows that is folded into the main matrix once it grows past
+``TEXT_INDEX_MERGE_ROWS``.
+
+Every process builds its index from the database once, in a background
+thread started with the server (``build_in_background``), and then
+catches up incrementally with the jobs whose ``updated_at`` is past the
+last seen watermark. Changed jobs get a new row and their previous row is
+masked out; deactivated jobs are only masked. Document frequencies grow
+with every indexed row and are recounted from the live rows whenever
+masked rows are compacted away.
+"""
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from datetime import timedelta
+from operator import attrgetter
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from scipy import sparse
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]', re.UNICODE)
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has in is it of on or our the to we will with you your'.split()
+)
+# Weight of each job field in its term frequencies.
+FIELD_WEIGHTS = (
+    ('skills_required', 3.0),
+    ('title', 2.0),
+    ('description', 1.0),
+)
+SYNC_BATCH_SIZE = 2000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def term_frequencies(weighted_texts, n_features):
+    """``{column: weight}`` with sublinear term frequencies per field."""
+    counts = {}
+    for text, weight in weighted_texts:
+        for token in tokenize(text):
+            column = zlib.crc32(token.encode('utf-8')) % n_features
+            counts[column] = counts.get(column, 0.0) + weight
+    return {column: 1.0 + math.log(count) for column, count in counts.items()}
+
+
+def job_terms(job, n_features, field_weights=FIELD_WEIGHTS):
+    # A dotted field name follows a foreign key, e.g. "company.industry".
+    return term_frequencies(
+        ((attrgetter(field)(job), weight) for field, weight in field_weights), n_features
+    )
+
+
+class TextIndex:
+    """Incrementally maintained TF-IDF matrix of active jobs."""
+
+    def __init__(self, field_weights=FIELD_WEIGHTS, n_features=None, max_terms=None):
+        self.field_weights = field_weights
+        self.n_features = n_features or _setting('TEXT_INDEX_FEATURES', 2 ** 18)
+        self.max_terms = max_terms or _setting('TEXT_INDEX_MAX_TERMS', 64)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.main = sparse.csc_matrix((0, self.n_features), dtype=np.float32)
+        self.delta_rows = []
+        self.delta = None
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        # updated_at timestamp of the job version each row was built from
+        self.row_version = np.zeros(0, dtype=np.float64)
+        self.row_of_job = {}
+        self.doc_freq = np.zeros(self.n_features, dtype=np.int32)
+        self.n_docs = 0
+        self.watermark = None
+        self.last_sync = None
+
+    # -- weights ---------------------------------------------------------
+
+    def idf(self, columns):
+        return np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq[columns])) + 1.0
+
+    def _document_row(self, terms):
+        """Columns and L2-normalized term frequencies, most frequent terms only."""
+        if not terms:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        columns = np.fromiter(terms.keys(), dtype=np.int32, count=len(terms))
+        weights = np.fromiter(terms.values(), dtype=np.float64, count=len(terms))
+        if len(columns) > self.max_terms:
+            keep = np.argpartition(weights, -self.max_terms)[-self.max_terms:]
+            columns, weights = columns[keep], weights[keep]
+        weights /= np.linalg.norm(weights)
+        return columns, weights.astype(np.float32)
+
+    # -- maintenance -----------------------------------------------------
+
+    def _remove(self, job_id):
+        row = self.row_of_job.pop(job_id, None)
+        if row is not None:
+            self.alive[row] = False
+
+    def _append(self, jobs):
+        """Add a batch of jobs as new rows of the delta matrix."""
+        if not jobs:
+            return
+        indptr, indices, data = [0], [], []
+        start = len(self.job_ids)
+        for offset, job in enumerate(jobs):
+            columns, weights = self._document_row(job_terms(job, self.n_features, self.field_weights))
+            self.doc_freq[columns] += 1
+            self.n_docs += 1
+            indices.append(columns)
+            data.append(weights)
+            indptr.append(indptr[-1] + len(columns))
+            self.row_of_job[job.pk] = start + offset
+        block = sparse.csr_matrix(
+            (np.concatenate(data), np.concatenate(indices), np.array(indptr, dtype=np.int64)),
+            shape=(len(jobs), self.n_features),
+        )
+        self.delta_rows.append(block)
+        self.job_ids = np.concatenate([self.job_ids, [job.pk for job in jobs]])
+        self.alive = np.concatenate([self.alive, np.ones(len(jobs), dtype=bool)])
+        self.row_version = np.concatenate([self.row_version, [job.updated_at.timestamp() for job in jobs]])
+
+    def _publish(self):
+        """Make appended rows visible to queries, merging a large delta."""
+        if self.delta_rows:
+            self.delta = sparse.vstack(self.delta_rows, format='csr')
+            self.delta_rows = [self.delta]
+        if self.delta is not None and self.delta.shape[0] >= _setting('TEXT_INDEX_MERGE_ROWS', 5000):
+            self._merge()
+
+    def _merge(self):
+        if self.delta_rows:
+            self.main = sparse.vstack([self.main, *self.delta_rows], format='csc')
+            self.delta_rows, self.delta = [], None
+        dead = len(self.alive) - int(self.alive.sum())
+        if dead > max(len(self.alive) // 4, 1000):
+            self._compact()
+
+    def _compact(self):
+        """Drop masked rows and renumber the remaining ones."""
+        keep = np.flatnonzero(self.alive)
+        self.main = self.main.tocsr()[keep].tocsc()
+        # Replaced rows only ever add to the frequencies, recount them here.
+        self.doc_freq = np.diff(self.main.indptr).astype(np.int32)
+        self.n_docs = len(keep)
+        self.job_ids = self.job_ids[keep]
+        self.row_version = self.row_version[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.row_of_job = {int(job_id): row for row, job_id in enumerate(self.job_ids)}
+
+    def apply(self, jobs):
+        """Index changed jobs: replace active ones, drop inactive ones."""
+        active = []
+        for job in jobs:
+            row = self.row_of_job.get(job.pk)
+            if row is not None and job.is_active and self.row_version[row] == job.updated_at.timestamp():
+                continue
+            self._remove(job.pk)
+            if job.is_active:
+                active.append(job)
+        self._append(active)
+
+    def _changed_jobs(self, since):
+        text_fields = [field.replace('.', '__') for field, _ in self.field_weights]
+        queryset = Job.objects.only('id', 'is_active', 'updated_at', *text_fields).order_by('updated_at', 'id')
+        related = {field.rsplit('__', 1)[0] for field in text_fields if '__' in field}
+        if related:
+            queryset = queryset.select_related(*related)
+        if since is None:
+            queryset = queryset.filter(is_active=True)
+        else:
+            # Look back a little for rows committed late with an older updated_at.
+            overlap = timedelta(seconds=_setting('TEXT_INDEX_SYNC_OVERLAP', 60))
+            queryset = queryset.filter(updated_at__gt=since - overlap)
+        return queryset.iterator(chunk_size=SYNC_BATCH_SIZE)
+
+    def sync(self, force=False):
+        """Catch up with jobs changed since the watermark."""
+        interval = _setting('TEXT_INDEX_SYNC_INTERVAL', 5.0)
+        if not force and self.last_sync is not None and time.monotonic() - self.last_sync < interval:
+            return
+        with self._lock:
+            if not force and self.last_sync is not None and time.monotonic() - self.last_sync < interval:
+                return
+            batch = []
+            for job in self._changed_jobs(self.watermark):
+                batch.append(job)
+                if self.watermark is None or job.updated_at > self.watermark:
+                    self.watermark = job.updated_at
+                if len(batch) == SYNC_BATCH_SIZE:
+                    self.apply(batch)
+                    batch = []
+            self.apply(batch)
+            self._publish()
+            self.last_sync = time.monotonic()
+
+    def rebuild(self):
+        with self._lock:
+            self.reset()
+            self.last_sync = None
+        self.sync(force=True)
+        with self._lock:
+            self._merge()
+            self._compact()
+
+    # -- queries ---------------------------------------------------------
+
+    def _query_weights(self, terms):
+        """
+        Query weights with the IDF applied twice: once for the query's own
+        TF-IDF vector and once for the documents, whose stored rows are plain
+        term frequencies so frequency changes apply to them immediately.
+        """
+        if not terms:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        columns = np.fromiter(terms.keys(), dtype=np.int32, count=len(terms))
+        idf = self.idf(columns)
+        weights = np.fromiter(terms.values(), dtype=np.float64, count=len(terms)) * idf
+        weights /= np.linalg.norm(weights)
+        return columns, (weights * idf).astype(np.float32)
+
+    def query_vector(self, text):
+        return self._query_weights(term_frequencies([(text, 1.0)], self.n_features))
+
+    def job_vector(self, job):
+        return self._query_weights(job_terms(job, self.n_features, self.field_weights))
+
+    def top_k(self, text, k=10, exclude=()):
+        """``[(job_id, score)]`` of the active jobs best matching a text."""
+        with self._lock:
+            columns, weights = self.query_vector(text)
+        return self.top_k_vector(columns, weights, k, exclude)
+
+    def top_k_vector(self, columns, weights, k=10, exclude=()):
+        if not len(columns):
+            return []
+        with self._lock:
+            main, delta, alive, job_ids = self.main, self.delta, self.alive, self.job_ids
+            excluded = [self.row_of_job[job_id] for job_id in exclude if job_id in self.row_of_job]
+
+        # Only the query's columns of the CSC matrix are read.
+        scores = np.asarray(main[:, columns] @ weights).ravel()
+        if delta is not None:
+            scores = np.concatenate([scores, np.asarray(delta[:, columns] @ weights).ravel()])
+        scores = np.where(alive[:len(scores)], scores, 0.0)
+        scores[excluded] = 0.0
+
+        rows = np.flatnonzero(scores > 0)
+        return _best(rows, scores[rows], job_ids, k)
+
+    def top_k_many(self, vectors, k=10, excludes=None):
+        """
+        ``top_k_vector`` for many ``(columns, weights)`` queries at once, as
+        one sparse matrix product. ``excludes`` holds a job id set per query.
+        """
+        if not vectors:
+            return []
+        excludes = excludes or [()] * len(vectors)
+        with self._lock:
+            main, delta, alive, job_ids = self.main, self.delta, self.alive, self.job_ids
+            excluded = [
+                [self.row_of_job[job_id] for job_id in exclude if job_id in self.row_of_job]
+                for exclude in excludes
+            ]
+
+        indptr = np.cumsum([0] + [len(columns) for columns, _ in vectors])
+        queries = sparse.csr_matrix(
+            (
+                np.concatenate([weights for _, weights in vectors]),
+                np.concatenate([columns for columns, _ in vectors]),
+                indptr,
+            ),
+            shape=(len(vectors), self.n_features),
+        ).T.tocsc()
+        scores = main @ queries
+        if delta is not None:
+            scores = sparse.vstack([scores, delta @ queries])
+        scores = scores.tocsc()
+
+        results = []
+        for index in range(len(vectors)):
+            start, end = scores.indptr[index], scores.indptr[index + 1]
+            rows, values = scores.indices[start:end], scores.data[start:end]
+            keep = (values > 0) & alive[rows] & ~np.isin(rows, excluded[index])
+            results.append(_best(rows[keep], values[keep], job_ids, k))
+        return results
+
+
+def _best(rows, values, job_ids, k):
+    """The ``k`` highest ``values`` as ``[(job_id, score)]``, best first."""
+    if len(rows) > k:
+        top = np.argpartition(values, -k)[-k:]
+        rows, values = rows[top], values[top]
+    order = np.argsort(-values, kind='stable')
+    return [(int(job_ids[row]), float(value)) for row, value in zip(rows[order], values[order])]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_text_index(name='recommendations', field_weights=FIELD_WEIGHTS):
+    """A process-wide index, built on first use and kept in sync."""
+    index = _indexes.get(name)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(name)
+            if index is None:
+                index = _indexes[name] = TextIndex(field_weights)
+    index.sync()
+    return index
+
+
+def loaded_text_index(name='recommendations'):
+    """The process-wide index if it has been built already, as it is; else None."""
+    index = _indexes.get(name)
+    if index is not None and index.last_sync is not None:
+        return index
+    return None
+
+
+_building = set()
+
+
+def _build(name, field_weights):
+    try:
+        get_text_index(name, field_weights)
+    except Exception:
+        logger.exception('Building the %s text index failed', name)
+    finally:
+        with _indexes_lock:
+            _building.discard(name)
+        connections.close_all()
+
+
+def build_in_background(name='recommendations', field_weights=FIELD_WEIGHTS):
+    """Start building the process-wide index in a thread, unless built or building."""
+    with _indexes_lock:
+        if name in _building or loaded_text_index(name) is not None:
+            return
+        _building.add(name)
+    threading.Thread(
+        target=_build, args=(name, field_weights), name=f'text-index-{name}', daemon=True,
+    ).start()
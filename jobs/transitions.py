@@ -0,0 +1,72 @@
+"""
+Bulk status changes of job applications.
+
+Ownership is checked with one ``job__posted_by`` query per chunk of ids and
+the change is written with one ``UPDATE`` per chunk, instead of loading,
+validating and saving every application. Chunks keep the id lists under
+the database's bound parameter limit.
+"""
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import JobApplication
+from .signals import applications_status_changed
+
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+
+
+def _chunk_size(using):
+    max_params = connections[using].features.max_query_params or 10000
+    # Leave room for the other parameters of the query.
+    return max(min(max_params - 10, 10000), 1)
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _apply(employer, rows, status, using, results):
+    """Update the owned ``(id, status)`` rows that are not at ``status`` yet."""
+    to_update = []
+    for pk, current in rows:
+        if current == status:
+            results[pk] = UNCHANGED
+        else:
+            to_update.append(pk)
+            results[pk] = UPDATED
+    for chunk in _chunks(to_update, _chunk_size(using)):
+        JobApplication.objects.using(using).filter(pk__in=chunk).update(
+            status=status, updated_at=timezone.now()
+        )
+    if to_update:
+        applications_status_changed.send(
+            sender=JobApplication, employer=employer, ids=to_update, status=status, using=using
+        )
+
+
+def transition_ids(employer, ids, status, using='default'):
+    """
+    Move the employer's applications in ``ids`` to ``status``. Returns
+    ``{id: 'updated' | 'unchanged' | 'not_found'}`` in the order given.
+    """
+    ids = list(dict.fromkeys(ids))
+    results = dict.fromkeys(ids, NOT_FOUND)
+    owned = JobApplication.objects.using(using).filter(job__posted_by=employer)
+    with transaction.atomic(using=using):
+        for chunk in _chunks(ids, _chunk_size(using)):
+            rows = owned.filter(pk__in=chunk).values_list('id', 'status')
+            _apply(employer, list(rows), status, using, results)
+    return results
+
+
+def transition_queryset(employer, queryset, status, using='default'):
+    """Move every application in ``queryset`` that belongs to the employer."""
+    results = {}
+    queryset = queryset.using(using).filter(job__posted_by=employer)
+    with transaction.atomic(using=using):
+        rows = list(queryset.order_by('pk').values_list('id', 'status'))
+        _apply(employer, rows, status, using, results)
+    return results
@@ -8,7 +8,10 @@ router = DefaultRouter()
 router.register(r'jobs', views.JobViewSet)
 router.register(r'applications', views.JobApplicationViewSet, basename='application')
 router.register(r'bookmarks', views.BookmarkViewSet, basename='bookmark')
+router.register(r'saved-searches', views.SavedSearchViewSet, basename='saved-search')
 
 urlpatterns = [
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('jobs/stream/', views.job_stream, name='job-stream'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
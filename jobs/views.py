@@ -1,15 +1,39 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from django.shortcuts import get_object_or_404
-from .models import Job, JobApplication, Bookmark
+from django.conf import settings
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from jobapi.async_views import AsyncReadMixin
+from jobapi.broadcast import TooManySubscribers, get_broadcast
+from jobapi.query_optimization import QueryOptimizationMixin
+from jobapi.response_cache import CachedResponseMixin
+from .autocomplete import KINDS, MAX_LIMIT, get_autocomplete
+from .dashboard import get_dashboard
+from .exporters import EXPORT_FORMATS, stream_applications
+from .facets import compute_facets
+from .filters import JobApplicationFilter, JobFilter
+from .importers import IMPORT_FORMATS, JobImporter, guess_format, iter_rows
+from .models import Job, JobApplication, Bookmark, JobAlert, SavedSearch, SimilarJob
+from .pagination import FeedPagination, KeysetPagination
+from .ranking import score_applications
+from .search import JobSearchFilter
 from .serializers import (
     JobSerializer, JobDetailSerializer,
-    JobApplicationSerializer, BookmarkSerializer
+    JobApplicationSerializer, BookmarkSerializer, BulkStatusSerializer,
+    SavedSearchSerializer, JobAlertSerializer
 )
+from .stream import JOB_CHANNEL, event_filter, event_stream
+from .text_index import build_in_background, loaded_text_index
+from .transitions import NOT_FOUND, UNCHANGED, UPDATED, transition_ids, transition_queryset
 
 
 class IsEmployerOrReadOnly(permissions.BasePermission):
@@ -33,23 +57,44 @@ class IsEmployerOrReadOnly(permissions.BasePermission):
         return obj.posted_by == request.user
 
 
-class JobViewSet(viewsets.ModelViewSet):
-    queryset = Job.objects.filter(is_active=True).order_by('-posted_at')
+class JobViewSet(AsyncReadMixin, CachedResponseMixin, QueryOptimizationMixin, viewsets.ModelViewSet):
+    queryset = Job.objects.filter(is_active=True).annotate(
+        popularity=F('application_count') + F('bookmark_count')
+    ).order_by('-posted_at')
     permission_classes = [IsAuthenticatedOrReadOnly, IsEmployerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['job_type', 'experience_level', 'location', 'company']
+    pagination_class = FeedPagination
+    filter_backends = [DjangoFilterBackend, JobSearchFilter, filters.OrderingFilter]
+    filterset_class = JobFilter
     search_fields = ['title', 'description', 'skills_required', 'company__name']
-    ordering_fields = ['posted_at', 'salary_min', 'salary_max']
+    ordering_fields = [
+        'posted_at', 'salary_min', 'salary_max',
+        'application_count', 'bookmark_count', 'popularity',
+    ]
+    cache_name = 'jobs'
+    cache_namespaces = ('jobs', 'companies')
+    cache_actions = ('list', 'retrieve', 'facets', 'similar')
+    cache_personal_fields = {'is_bookmarked': False, 'has_applied': False}
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return JobDetailSerializer
         return JobSerializer
+
+    def get_personal_data(self, request, data):
+        return {
+            'is_bookmarked': Bookmark.objects.filter(job_id=data['id'], user=request.user).exists(),
+            'has_applied': JobApplication.objects.filter(job_id=data['id'], applicant=request.user).exists(),
+        }
     
     def perform_create(self, serializer):
         # Set the job poster to the current user
         serializer.save(posted_by=self.request.user)
     
+    def get_my_jobs_queryset(self):
+        return self.optimize_queryset(
+            Job.objects.filter(posted_by=self.request.user).order_by('-posted_at'), JobSerializer
+        )
+
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_jobs(self, request):
         """Return jobs posted by the current employer"""
@@ -59,7 +104,7 @@ class JobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        jobs = Job.objects.filter(posted_by=request.user).order_by('-posted_at')
+        jobs = self.get_my_jobs_queryset()
         page = self.paginate_queryset(jobs)
         
         if page is not None:
@@ -69,10 +114,125 @@ class JobViewSet(viewsets.ModelViewSet):
         serializer = JobSerializer(jobs, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """The most similar active jobs, from the precomputed neighbors"""
+        return self.dispatch_cached(self.similar_response, request, pk=pk)
+
+    def similar_response(self, request, pk=None):
+        limit = getattr(settings, 'SIMILAR_JOBS_SHOWN', 10)
+        links = (
+            SimilarJob.objects.filter(job_id=pk, similar__is_active=True)
+            .select_related('similar__company')
+            .defer('similar__search_document')
+            .order_by('rank')[:limit]
+        )
+        results = []
+        for link in links:
+            data = JobSerializer(link.similar, context=self.get_serializer_context()).data
+            data['score'] = round(link.score, 4)
+            results.append(data)
+        return Response({"results": results})
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Facet counts for the current filters and search"""
+        # Only the unfiltered facets are shared by enough callers to cache.
+        filtered = any(
+            value for key, value in request.query_params.items() if key != 'facet_limit'
+        )
+        if filtered:
+            return self.facet_response(request)
+        return self.dispatch_cached(self.facet_response, request)
+
+    def facet_response(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('facet_limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(compute_facets(queryset, limit))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def recommendations(self, request):
+        """Active jobs that best match the job seeker's skills"""
+        if request.user.user_type != 'job_seeker':
+            return Response(
+                {"error": "Only job seekers get recommendations"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if not (request.user.skills or '').strip():
+            return Response({"results": [], "detail": "Add skills to your profile to get recommendations"})
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        applied = JobApplication.objects.filter(applicant=request.user).values_list('job_id', flat=True)
+        index = loaded_text_index()
+        if index is None:
+            # Until this process has built its index, show the latest jobs.
+            build_in_background()
+            jobs = self.optimize_queryset(
+                Job.objects.filter(is_active=True).exclude(pk__in=applied).order_by('-posted_at', '-id'),
+                JobSerializer,
+            )[:limit]
+            results = JobSerializer(jobs, many=True, context=self.get_serializer_context()).data
+            for job in results:
+                job['score'] = None
+            return Response({"results": results, "degraded": True})
+
+        index.sync()
+        # Ask for spares in case some jobs were deactivated since the last sync.
+        matches = index.top_k(request.user.skills, limit * 2, exclude=set(applied))
+        scores = dict(matches)
 
-class JobApplicationViewSet(viewsets.ModelViewSet):
+        jobs = self.optimize_queryset(
+            Job.objects.filter(pk__in=scores, is_active=True), JobSerializer
+        )
+        jobs = sorted(jobs, key=lambda job: -scores[job.pk])[:limit]
+        results = JobSerializer(jobs, many=True, context=self.get_serializer_context()).data
+        for job in results:
+            job['score'] = round(scores[job['id']], 4)
+        return Response({"results": results})
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def dashboard(self, request):
+        """Application counts per status for each of the employer's jobs"""
+        if request.user.user_type != 'employer':
+            return Response(
+                {"error": "Only employers can view the dashboard"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response(get_dashboard(request.user))
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """Create many jobs from an uploaded CSV or NDJSON file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload the jobs as a 'file' field"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or guess_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {"error": f"file_format must be one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = JobImporter(posted_by=request.user).run(iter_rows(upload.file, file_format))
+        if report.created and report.stopped_at is None:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(report.as_dict(), status=response_status)
+
+
+class JobApplicationViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
+    filterset_class = JobApplicationFilter
     
     def get_queryset(self):
         user = self.request.user
@@ -104,10 +264,92 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         
         serializer.save(applicant=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the employer's applications as CSV or NDJSON"""
+        if request.user.user_type != 'employer':
+            return Response(
+                {"error": "Only employers can export applications"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-class BookmarkViewSet(viewsets.ModelViewSet):
+        filterset = JobApplicationFilter(request.query_params, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return stream_applications(filterset.qs, file_format)
+
+    @action(detail=False, methods=['get'])
+    def ranked(self, request):
+        """Applications to one of the employer's jobs, best skill match first"""
+        if request.user.user_type != 'employer':
+            return Response(
+                {"error": "Only employers can rank applicants"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            job_id = int(request.query_params['job'])
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "job must be the id of one of your jobs"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job = get_object_or_404(Job.objects.only('id', 'skills_required'), id=job_id, posted_by=request.user)
+        # Scores are stored lazily, so a GET that finds unscored applications
+        # writes them and pins the employer to the primary like any write.
+        score_applications(job)
+
+        queryset = self.optimize_queryset(
+            JobApplication.objects.filter(job=job).order_by('-match_score', '-id')
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """Move many of the employer's applications to one status"""
+        if request.user.user_type != 'employer':
+            return Response(
+                {"error": "Only employers can change application status"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = BulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data['status']
+
+        if 'ids' in serializer.validated_data:
+            results = transition_ids(request.user, serializer.validated_data['ids'], target)
+        else:
+            filterset = JobApplicationFilter(
+                serializer.validated_data['filter'], queryset=self.get_queryset(), request=request
+            )
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            results = transition_queryset(request.user, filterset.qs, target)
+
+        outcomes = list(results.values())
+        return Response({
+            "status": target,
+            "updated": outcomes.count(UPDATED),
+            "unchanged": outcomes.count(UNCHANGED),
+            "not_found": outcomes.count(NOT_FOUND),
+            "results": [{"id": pk, "result": result} for pk, result in results.items()],
+        })
+
+
+class BookmarkViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     serializer_class = BookmarkSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
     
     def get_queryset(self):
         return Bookmark.objects.filter(user=self.request.user).order_by('-created_at')
@@ -137,3 +379,61 @@ class BookmarkViewSet(viewsets.ModelViewSet):
         else:
             Bookmark.objects.create(job=job, user=request.user)
             return Response({"status": "Bookmark added"}, status=status.HTTP_201_CREATED)
+
+
+class SavedSearchViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).order_by('-created_at', '-id')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def alerts(self, request):
+        """Jobs matched by the user's saved searches, newest first"""
+        queryset = self.optimize_queryset(
+            JobAlert.objects.filter(saved_search__user=request.user).order_by('-id'),
+            JobAlertSerializer,
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = JobAlertSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+
+@require_GET
+def autocomplete(request):
+    """Typeahead suggestions served from the in-memory prefix indexes"""
+    prefix = request.GET.get('q', '')[:100]
+    kinds = [kind for kind in request.GET.get('type', '').split(',') if kind in KINDS] or KINDS
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = 10
+    index = get_autocomplete()
+    if not index.ready:
+        # Still building in the background: nothing to suggest, nothing to cache.
+        response = JsonResponse({**{kind: [] for kind in kinds}, 'degraded': True})
+        patch_cache_control(response, no_store=True)
+        return response
+    response = JsonResponse(index.lookup(prefix, kinds, limit))
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 60))
+    return response
+
+
+@require_GET
+async def job_stream(request):
+    """Server-sent events for jobs created or deactivated from now on"""
+    try:
+        subscription = get_broadcast().subscribe(JOB_CHANNEL, event_filter(request.GET))
+    except TooManySubscribers:
+        return JsonResponse({"error": "Too many open streams, poll /api/jobs/ instead"}, status=503)
+    response = StreamingHttpResponse(event_stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx style proxies from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response